@@ -0,0 +1,2 @@
+# importing the package has no side effect, the deploy entry points call _session.install before creating
+# clients so every aws call retries throttling adaptively and read calls are cached while a deployment runs
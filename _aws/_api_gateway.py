@@ -1,13 +1,23 @@
-from typing import Union, List
+from typing import Union, List, Dict
 from logging import Logger as Log
 from inspect import currentframe
 from time import sleep
+from threading import RLock
 from boto3 import client
 from _common import _common as _common_
 import boto3
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 
 _WAIT_TIME_ = 4
+_PAGE_SIZE_ = 500
+
+# in-memory index of rest apis and their resource trees, loaded once per region / api with paginators
+# and kept up to date by the create and delete calls below, so later steps never have to re-list
+# {aws_region: {api_name: api_id}}
+_API_INDEX_ = {}
+# {(aws_region, api_id): {"path": {path: resource}, "path_part": {path_part: [path, ...]}}}
+_RESOURCE_INDEX_ = {}
+_INDEX_LOCK_ = RLock()
 
 
 @_common_.aws_client_handle_exceptions()
@@ -15,6 +25,153 @@ def aws_client(service_name: str, aws_region: str):
     return boto3.client(service_name, region_name=aws_region)
 
 
+def reset_api_gateway_index(aws_region: str = None) -> None:
+    """drop the cached rest api and resource index, forces the next lookup to re-list
+
+    Args:
+        aws_region: aws region, drop every region if not specified
+
+    Returns:
+        No return value.
+
+    """
+    with _INDEX_LOCK_:
+        for _region in [aws_region] if aws_region else list(_API_INDEX_.keys()):
+            _API_INDEX_.pop(_region, None)
+        for _key in list(_RESOURCE_INDEX_.keys()):
+            if aws_region is None or _key[0] == aws_region:
+                _RESOURCE_INDEX_.pop(_key, None)
+
+
+@_common_.aws_client_handle_exceptions()
+def load_rest_api_index(aws_region: str = "us-east-1",
+                        refresh: bool = False,
+                        logger: Log = None
+                        ) -> Dict[str, str]:
+    """list every rest api in the region once and index them by name
+
+    Args:
+        aws_region: aws region
+        refresh: re-list even if the region is already indexed
+        logger: logger object
+
+    Returns:
+        a map of api gateway name to api gateway id
+
+    """
+    with _INDEX_LOCK_:
+        if not refresh and aws_region in _API_INDEX_:
+            return _API_INDEX_[aws_region]
+
+        apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+        _api_index = {}
+        paginator = apigateway_client.get_paginator("get_rest_apis")
+        for page in paginator.paginate(PaginationConfig={"PageSize": _PAGE_SIZE_}):
+            for item in page.get("items", []):
+                # keep the first api if several share the same name, same as the previous lookup
+                _api_index.setdefault(item.get("name"), item.get("id"))
+
+        _API_INDEX_[aws_region] = _api_index
+        _common_.info_logger(f"indexed {len(_api_index)} rest apis in {aws_region}", logger=logger)
+        return _api_index
+
+
+@_common_.aws_client_handle_exceptions()
+def load_resource_index(api_gateway_api_id: str,
+                        aws_region: str = "us-east-1",
+                        refresh: bool = False,
+                        logger: Log = None
+                        ) -> Dict[str, Dict]:
+    """list the full resource tree of a rest api once and index it by path and path part
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        aws_region: aws region
+        refresh: re-list even if the api is already indexed
+        logger: logger object
+
+    Returns:
+        the resource index of the api, {"path": {path: resource}, "path_part": {path_part: [path, ...]}}
+
+    """
+    with _INDEX_LOCK_:
+        if not refresh and (aws_region, api_gateway_api_id) in _RESOURCE_INDEX_:
+            return _RESOURCE_INDEX_[(aws_region, api_gateway_api_id)]
+
+        apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+        # built aside and only published once complete, a listing failing halfway must not leave a partial index
+        _resource_index = {"path": {}, "path_part": {}}
+        paginator = apigateway_client.get_paginator("get_resources")
+        for page in paginator.paginate(restApiId=api_gateway_api_id, PaginationConfig={"PageSize": _PAGE_SIZE_}):
+            for item in page.get("items", []):
+                _index_resource(_resource_index, item)
+
+        _RESOURCE_INDEX_[(aws_region, api_gateway_api_id)] = _resource_index
+        _common_.info_logger(f"indexed {len(_resource_index['path'])} resources for api {api_gateway_api_id}", logger=logger)
+        return _resource_index
+
+
+def index_add_api(api_gateway_name: str,
+                  api_gateway_api_id: str,
+                  aws_region: str = "us-east-1"
+                  ) -> None:
+    """record a newly created rest api in the index, no-op if the region has not been indexed yet"""
+    with _INDEX_LOCK_:
+        if aws_region in _API_INDEX_:
+            _API_INDEX_[aws_region].setdefault(api_gateway_name, api_gateway_api_id)
+
+
+def index_remove_api(api_gateway_name: str,
+                     aws_region: str = "us-east-1"
+                     ) -> None:
+    """remove a deleted rest api and its resource tree from the index"""
+    with _INDEX_LOCK_:
+        api_gateway_api_id = _API_INDEX_.get(aws_region, {}).pop(api_gateway_name, None)
+        _RESOURCE_INDEX_.pop((aws_region, api_gateway_api_id), None)
+
+
+def index_add_resource(api_gateway_api_id: str,
+                       resource: Dict,
+                       aws_region: str = "us-east-1"
+                       ) -> None:
+    """record a resource (as returned by get_resources / create_resource) in the index of its api"""
+    with _INDEX_LOCK_:
+        if (_index := _RESOURCE_INDEX_.get((aws_region, api_gateway_api_id))) is None:
+            return
+        _index_resource(_index, resource)
+
+
+def _index_resource(_index: Dict, resource: Dict) -> None:
+    _resource = {_key: resource.get(_key) for _key in ("id", "parentId", "pathPart", "path")}
+    _index["path"][_resource.get("path")] = _resource
+    if _resource.get("pathPart"):
+        _paths = _index["path_part"].setdefault(_resource.get("pathPart"), [])
+        if _resource.get("path") not in _paths:
+            _paths.append(_resource.get("path"))
+
+
+def index_remove_resource(api_gateway_api_id: str,
+                          resource_id: str,
+                          aws_region: str = "us-east-1"
+                          ) -> None:
+    """remove a deleted resource and all of its descendants from the index of its api"""
+    with _INDEX_LOCK_:
+        if (_index := _RESOURCE_INDEX_.get((aws_region, api_gateway_api_id))) is None:
+            return
+        _root_path = next((_path for _path, _resource in _index["path"].items() if _resource.get("id") == resource_id), None)
+        if _root_path is None:
+            return
+        for _path in [_path for _path in _index["path"] if _path == _root_path or _path.startswith(_root_path.rstrip("/") + "/")]:
+            _resource = _index["path"].pop(_path)
+            _paths = _index["path_part"].get(_resource.get("pathPart"), [])
+            if _path in _paths:
+                _paths.remove(_path)
+            if not _paths:
+                _index["path_part"].pop(_resource.get("pathPart"), None)
+
+
 @_common_.aws_client_handle_exceptions()
 def api_gateway_get_name(api_gateway_name: str,
                          aws_region: str = "us-east-1",
@@ -31,20 +188,8 @@ def api_gateway_get_name(api_gateway_name: str,
         the id of the resource if it exists otherwise None
 
     """
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-
-    # Get the list of all APIs
-    response = apigateway_client.get_rest_apis()
-
-    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"operation failed, reason response code is not 200",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
-
-    api_gateway_api_id = [item.get("id") for item in response.get("items") if api_gateway_name == item.get("name")]
-    return api_gateway_api_id[0] if len(api_gateway_api_id) > 0 else None
+    # all rest apis are listed once per region, subsequent lookups are served from the index
+    return load_rest_api_index(aws_region=aws_region, logger=logger).get(api_gateway_name)
 
 
 @_common_.aws_client_handle_exceptions()
@@ -75,13 +220,51 @@ def api_gateway_delete_by_name(api_gateway_name: str,
                                   mode="error",
                                   ignore_flag=False)
 
+        index_remove_api(api_gateway_name, aws_region)
         _common_.info_logger(f"API {api_gateway_name} with ID {api_id} has been deleted")
     return True
 
 
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+def api_gateway_delete_by_id(api_gateway_api_id: str,
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> bool:
+    """delete the API Gateway by id
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful otherwise False
+
+    """
+    apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+    response = apigateway_client.delete_rest_api(restApiId=api_gateway_api_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    with _INDEX_LOCK_:
+        for api_gateway_name, each_api_id in list(_API_INDEX_.get(aws_region, {}).items()):
+            if each_api_id == api_gateway_api_id:
+                index_remove_api(api_gateway_name, aws_region)
+
+    _common_.info_logger(f"API with ID {api_gateway_api_id} has been deleted")
+    return True
+
+
 # @_common_.aws_client_handle_exceptions()
 def api_gateway_create_by_name(api_gateway_name: str,
                                aws_region: str = "us-east-1",
+                               tags: Dict = None,
                                logger: Log = None
                                ) -> str:
     """delete the API Gateway by name
@@ -89,6 +272,7 @@ def api_gateway_create_by_name(api_gateway_name: str,
     Args:
         aws_region: aws region
         api_gateway_name: the name of the api gateway api
+        tags: tags of the api, tag key -> tag value, only applied when the api is created
         logger: logger object
 
     Returns:
@@ -109,6 +293,8 @@ def api_gateway_create_by_name(api_gateway_name: str,
         "version": "1.0.0",
         # "apiKeySource": "HEADER"
     }
+    if tags:
+        _parameter["tags"] = tags
     response = apigateway_client.create_rest_api(**_parameter)
     # from pprint import pprint
     # pprint(response)
@@ -121,7 +307,8 @@ def api_gateway_create_by_name(api_gateway_name: str,
                               mode="error",
                               ignore_flag=False)
 
-    _common_.info_logger(f"Created API '{api_gateway_name}' with ID: {api_id}")
+    index_add_api(api_gateway_name, response.get("id"), aws_region)
+    _common_.info_logger(f"Created API '{api_gateway_name}' with ID: {response.get('id')}")
     return response.get("id")
 
 
@@ -139,26 +326,12 @@ def api_gateway_get_root_resource(api_gateway_api_id: str,
         the id of the resource if it exists otherwise None
     """
 
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-
-    # Get the list of all APIs
-    response = apigateway_client.get_resources(restApiId=api_gateway_api_id)
-
-    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"operation failed, reason response code is not 200",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
-
-    sleep(_WAIT_TIME_)
     # Get the Root Resource ID
+    _index = load_resource_index(api_gateway_api_id=api_gateway_api_id, aws_region=aws_region, logger=logger)
+    return _index.get("path", {}).get("/", {}).get("id")
 
-    api_gateway_root_res_id = [item.get("id") for item in response.get("items") if item.get("path") == '/']
-    return api_gateway_root_res_id[0] if len(api_gateway_root_res_id) > 0 else None
 
-
-@_common_.aws_client_handle_exceptions()
+@_common_.aws_client_handle_exceptions(idempotent=True)
 def get_api_gateway_resource_id(api_gateway_api_id: str,
                                 lambda_function_name: str,
                                 aws_region: str = "us-east-1",
@@ -177,20 +350,14 @@ def get_api_gateway_resource_id(api_gateway_api_id: str,
         the id of the resource if it exists, None otherwise.
 
     """
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
+    _index = load_resource_index(api_gateway_api_id=api_gateway_api_id, aws_region=aws_region, logger=logger)
 
-    # Get the list of resources
-    response = apigateway_client.get_resources(restApiId=api_gateway_api_id)
-
-    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"operation failed, reason response code is not 200",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
-
-    api_gateway_res_id = [item.get("id") for item in response.get("items") if item.get("pathPart") == lambda_function_name]
-    return api_gateway_res_id[0] if len(api_gateway_res_id) > 0 else None
+    # prefer the resource directly under root, otherwise the first resource with a matching path part
+    if _resource := _index.get("path", {}).get(f"/{lambda_function_name}"):
+        return _resource.get("id")
+    if _paths := _index.get("path_part", {}).get(lambda_function_name):
+        return _index.get("path", {}).get(_paths[0], {}).get("id")
+    return None
 
 
 @_common_.aws_client_handle_exceptions()
@@ -226,6 +393,7 @@ def delete_api_gateway_resource(api_gateway_api_id: str,
                               mode="error",
                               ignore_flag=False)
 
+    index_remove_resource(api_gateway_api_id, resource_id, aws_region)
     _common_.info_logger(f"Resource with ID '{resource_id}' deleted successfully.")
     return True
 
@@ -267,12 +435,13 @@ def create_api_gateway_resource(api_gateway_api_id: str,
                               mode="error",
                               ignore_flag=False)
 
+    index_add_resource(api_gateway_api_id, response, aws_region)
     _common_.info_logger(f"Resource '{lambda_function_name}' created successfully")
     return response.get("id")
 
 
 # @_common_.aws_client_handle_exceptions()
-@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException, idempotent=True)
 def get_api_gateway_method(api_gateway_api_id: str,
                            resource_id: str,
                            http_method: str,
@@ -374,6 +543,7 @@ def delete_api_gateway_method(api_gateway_api_id: str,
 def create_api_gateway_method(api_gateway_api_id: str,
                               resource_id: str,
                               http_method='GET',
+                              request_parameters: Dict = None,
                               aws_region: str = "us-east-1",
                               logger: Log = None
                               ) -> bool:
@@ -384,6 +554,8 @@ def create_api_gateway_method(api_gateway_api_id: str,
         api_gateway_api_id: the id of the api gateway api
         resource_id: the id of the resource that contains the method
         http_method: the http method
+        request_parameters: method request parameters, e.g. {"method.request.querystring.name": False},
+                            needs to be declared for any parameter used as a cache key
         aws_region: aws region
         logger: logger object
 
@@ -400,6 +572,8 @@ def create_api_gateway_method(api_gateway_api_id: str,
         "authorizationType": "NONE",
         "apiKeyRequired": False
     }
+    if request_parameters:
+        _parameters["requestParameters"] = request_parameters
     response = apigateway_client.put_method(**_parameters)
     if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
         _common_.error_logger(currentframe().f_code.co_name,
@@ -412,7 +586,7 @@ def create_api_gateway_method(api_gateway_api_id: str,
     return True
 
 
-@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException, idempotent=True)
 def get_api_gateway_integration(api_gateway_api_id: str,
                                 resource_id: str,
                                 http_method='GET',
@@ -502,6 +676,7 @@ def create_api_gateway_integration(api_gateway_api_id: str,
                                    aws_account_number: str,
                                    lambda_function_name: str,
                                    aws_execution_role_arn: str,
+                                   cache_key_parameters: List[str] = None,
                                    aws_region: str = "us-east-1",
                                    logger: Log = None
                                    ) -> bool:
@@ -513,6 +688,9 @@ def create_api_gateway_integration(api_gateway_api_id: str,
         http_method: the http method
         aws_account_number: the aws account number
         lambda_function_name: the name of the Lambda function
+        aws_execution_role_arn: the role api gateway assumes to invoke the lambda function
+        cache_key_parameters: method request parameters the stage cache is keyed on,
+                              e.g. ["method.request.querystring.name"]
         aws_region: aws region
         logger: logger object
 
@@ -533,6 +711,8 @@ def create_api_gateway_integration(api_gateway_api_id: str,
         # "credentials": f"arn:aws:iam::{aws_account_number}:role/role-api-gateway-ex"
         "credentials": aws_execution_role_arn
     }
+    if cache_key_parameters:
+        _parameters["cacheKeyParameters"] = cache_key_parameters
     response = apigateway_client.put_integration(**_parameters)
 
     if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
@@ -547,7 +727,7 @@ def create_api_gateway_integration(api_gateway_api_id: str,
     return True
 
 
-@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException, idempotent=True)
 def get_api_gateway_method_response(api_gateway_api_id: str,
                                     resource_id: str,
                                     http_method: str,
@@ -720,8 +900,142 @@ def create_api_gateway_deployment(api_gateway_api_id: str,
     return True
 
 
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException, idempotent=True)
+def get_api_gateway_stage(api_gateway_api_id: str,
+                          api_stage_name: str,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> Union[Dict, None]:
+    """ get the settings of an api gateway stage
 
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        api_stage_name: the name of the stage
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the stage description if the stage exists, None otherwise
+
+    """
+    apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+    _parameters = {
+        "restApiId": api_gateway_api_id,
+        "stageName": api_stage_name
+    }
+    response = apigateway_client.get_stage(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return response
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+def update_api_gateway_stage(api_gateway_api_id: str,
+                             api_stage_name: str,
+                             patch_operations: List[Dict],
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> bool:
+    """ apply patch operations to an api gateway stage (cache cluster, method settings...)
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        api_stage_name: the name of the stage
+        patch_operations: list of patch operations, e.g. [{"op": "replace", "path": "/cacheClusterEnabled", "value": "true"}]
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the stage is updated successfully
+
+    """
+    apigateway_client = boto3.client('apigateway', region_name=aws_region)
 
+    _parameters = {
+        "restApiId": api_gateway_api_id,
+        "stageName": api_stage_name,
+        "patchOperations": patch_operations
+    }
+    response = apigateway_client.update_stage(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
 
+    _common_.info_logger(f"stage {api_stage_name} of {api_gateway_api_id} updated with {len(patch_operations)} patch operations")
+    return True
 
 
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException, idempotent=True)
+def get_api_gateway_rest_api(api_gateway_api_id: str,
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> Union[Dict, None]:
+    """ get the settings of a rest api
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the rest api description if it exists, None otherwise
+
+    """
+    apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+    response = apigateway_client.get_rest_api(restApiId=api_gateway_api_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return response
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigateway", "us-east-1").exceptions.NotFoundException)
+def update_api_gateway_rest_api(api_gateway_api_id: str,
+                                patch_operations: List[Dict],
+                                aws_region: str = "us-east-1",
+                                logger: Log = None
+                                ) -> bool:
+    """ apply patch operations to a rest api (minimumCompressionSize...)
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        patch_operations: list of patch operations, e.g. [{"op": "replace", "path": "/minimumCompressionSize", "value": "1024"}]
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the rest api is updated successfully
+
+    """
+    apigateway_client = boto3.client('apigateway', region_name=aws_region)
+
+    _parameters = {
+        "restApiId": api_gateway_api_id,
+        "patchOperations": patch_operations
+    }
+    response = apigateway_client.update_rest_api(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"rest api {api_gateway_api_id} updated with {len(patch_operations)} patch operations")
+    return True
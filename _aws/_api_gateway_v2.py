@@ -0,0 +1,503 @@
+from typing import Union, List, Dict
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+import boto3
+from botocore.exceptions import ClientError
+
+_WAIT_TIME_ = 4
+_PAYLOAD_FORMAT_VERSION_ = "2.0"
+_DEFAULT_STAGE_NAME_ = "$default"
+
+
+@_common_.aws_client_handle_exceptions()
+def aws_client(service_name: str, aws_region: str):
+    return boto3.client(service_name, region_name=aws_region)
+
+
+@_common_.aws_client_handle_exceptions()
+def http_api_get_by_name(api_gateway_name: str,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> Union[Dict, None]:
+    """find an http api (api gateway v2) by name
+
+    Args:
+        api_gateway_name: the name of the http api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the api description (ApiId, ApiEndpoint...) if it exists otherwise None
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    paginator = apigatewayv2_client.get_paginator("get_apis")
+    for page in paginator.paginate():
+        for item in page.get("Items", []):
+            if item.get("Name") == api_gateway_name and item.get("ProtocolType") == "HTTP":
+                return item
+    return None
+
+
+@_common_.aws_client_handle_exceptions()
+def http_api_quick_create(api_gateway_name: str,
+                          route_key: str,
+                          lambda_function_arn: str,
+                          aws_region: str = "us-east-1",
+                          tags: Dict = None,
+                          logger: Log = None
+                          ) -> Union[Dict, None]:
+    """create an http api with a lambda proxy route in a single call
+
+    quick create wires the route, the lambda proxy integration (payload format 2.0) and an
+    auto-deployed $default stage as part of create_api
+
+    Args:
+        api_gateway_name: the name of the http api
+        route_key: route key, e.g. "GET /lambda-my_project"
+        lambda_function_arn: arn of the lambda function the route is proxied to
+        aws_region: aws region
+        tags: tags of the api, tag key -> tag value
+        logger: logger object
+
+    Returns:
+        the api description (ApiId, ApiEndpoint...)
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    _parameters = {
+        "Name": api_gateway_name,
+        "ProtocolType": "HTTP",
+        "Description": "resource created via api",
+        "RouteKey": route_key,
+        "Target": lambda_function_arn
+    }
+    if tags:
+        _parameters["Tags"] = tags
+    response = apigatewayv2_client.create_api(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"Created http api '{api_gateway_name}' with ID: {response.get('ApiId')}")
+    return response
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def delete_http_api(api_gateway_api_id: str,
+                    aws_region: str = "us-east-1",
+                    logger: Log = None
+                    ) -> bool:
+    """delete an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    response = apigatewayv2_client.delete_api(ApiId=api_gateway_api_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"http api with ID {api_gateway_api_id} has been deleted")
+    return True
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException, idempotent=True)
+def get_http_api_integrations(api_gateway_api_id: str,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None
+                              ) -> List[Dict]:
+    """list all integrations of an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        list of integrations
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    paginator = apigatewayv2_client.get_paginator("get_integrations")
+    return [item for page in paginator.paginate(ApiId=api_gateway_api_id) for item in page.get("Items", [])]
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def create_http_api_lambda_integration(api_gateway_api_id: str,
+                                       lambda_function_arn: str,
+                                       timeout_in_millis: int = 30000,
+                                       aws_region: str = "us-east-1",
+                                       logger: Log = None
+                                       ) -> Union[str, None]:
+    """create a lambda proxy integration with payload format 2.0
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        lambda_function_arn: arn of the lambda function
+        timeout_in_millis: integration timeout
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the id of the integration
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    _parameters = {
+        "ApiId": api_gateway_api_id,
+        "IntegrationType": "AWS_PROXY",
+        "IntegrationUri": lambda_function_arn,
+        "PayloadFormatVersion": _PAYLOAD_FORMAT_VERSION_,
+        "TimeoutInMillis": timeout_in_millis
+    }
+    response = apigatewayv2_client.create_integration(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"lambda integration {response.get('IntegrationId')} created for {lambda_function_arn}")
+    return response.get("IntegrationId")
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def delete_http_api_integration(api_gateway_api_id: str,
+                                integration_id: str,
+                                aws_region: str = "us-east-1",
+                                logger: Log = None
+                                ) -> bool:
+    """delete an integration of an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        integration_id: the id of the integration
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    response = apigatewayv2_client.delete_integration(ApiId=api_gateway_api_id, IntegrationId=integration_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"integration {integration_id} of http api {api_gateway_api_id} deleted")
+    return True
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException, idempotent=True)
+def get_http_api_routes(api_gateway_api_id: str,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> List[Dict]:
+    """list all routes of an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        list of routes
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    paginator = apigatewayv2_client.get_paginator("get_routes")
+    return [item for page in paginator.paginate(ApiId=api_gateway_api_id) for item in page.get("Items", [])]
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def create_http_api_route(api_gateway_api_id: str,
+                          route_key: str,
+                          integration_id: str,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> Union[str, None]:
+    """create a route pointing at an integration
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        route_key: route key, e.g. "GET /lambda-my_project"
+        integration_id: the id of the integration
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the id of the route
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    _parameters = {
+        "ApiId": api_gateway_api_id,
+        "RouteKey": route_key,
+        "Target": f"integrations/{integration_id}"
+    }
+    response = apigatewayv2_client.create_route(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"route '{route_key}' created for http api {api_gateway_api_id}")
+    return response.get("RouteId")
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def update_http_api_route(api_gateway_api_id: str,
+                          route_id: str,
+                          integration_id: str,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """point an existing route at a different integration
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        route_id: the id of the route
+        integration_id: the id of the integration
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    _parameters = {
+        "ApiId": api_gateway_api_id,
+        "RouteId": route_id,
+        "Target": f"integrations/{integration_id}"
+    }
+    response = apigatewayv2_client.update_route(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"route {route_id} of http api {api_gateway_api_id} now targets integration {integration_id}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def delete_http_api_route(api_gateway_api_id: str,
+                          route_id: str,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """delete a route of an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        route_id: the id of the route
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    response = apigatewayv2_client.delete_route(ApiId=api_gateway_api_id, RouteId=route_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"route {route_id} of http api {api_gateway_api_id} deleted")
+    return True
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException, idempotent=True)
+def get_http_api_stage(api_gateway_api_id: str,
+                       api_stage_name: str = _DEFAULT_STAGE_NAME_,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> Union[Dict, None]:
+    """get a stage of an http api
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        api_stage_name: the name of the stage
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the stage description if it exists otherwise None
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    response = apigatewayv2_client.get_stage(ApiId=api_gateway_api_id, StageName=api_stage_name)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return response
+
+
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client("apigatewayv2", "us-east-1").exceptions.NotFoundException)
+def create_http_api_stage(api_gateway_api_id: str,
+                          api_stage_name: str = _DEFAULT_STAGE_NAME_,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """create an auto-deployed stage, route changes go live without an explicit deployment
+
+    Args:
+        api_gateway_api_id: the id of the http api
+        api_stage_name: the name of the stage
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    apigatewayv2_client = boto3.client('apigatewayv2', region_name=aws_region)
+
+    _parameters = {
+        "ApiId": api_gateway_api_id,
+        "StageName": api_stage_name,
+        "AutoDeploy": True
+    }
+    response = apigatewayv2_client.create_stage(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"auto deploy stage {api_stage_name} created for http api {api_gateway_api_id}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def add_lambda_invoke_permission(lambda_function_name: str,
+                                 source_arn: str,
+                                 statement_id: str,
+                                 aws_region: str = "us-east-1",
+                                 logger: Log = None
+                                 ) -> bool:
+    """allow api gateway to invoke the lambda function, no-op if the statement already exists
+
+    Args:
+        lambda_function_name: the name of the lambda function
+        source_arn: execute-api arn the permission is restricted to
+        statement_id: statement id of the permission
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the permission is in place
+
+    """
+    lambda_client = boto3.client('lambda', region_name=aws_region)
+
+    _parameters = {
+        "FunctionName": lambda_function_name,
+        "StatementId": statement_id,
+        "Action": "lambda:InvokeFunction",
+        "Principal": "apigateway.amazonaws.com",
+        "SourceArn": source_arn
+    }
+    try:
+        response = lambda_client.add_permission(**_parameters)
+    except ClientError as err:
+        if err.response.get("Error", {}).get("Code") == "ResourceConflictException":
+            _common_.info_logger(f"invoke permission {statement_id} already exists for {lambda_function_name}")
+            return True
+        raise
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"invoke permission {statement_id} added to {lambda_function_name}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions("ResourceNotFoundException")
+def remove_lambda_invoke_permission(lambda_function_name: str,
+                                    statement_id: str,
+                                    aws_region: str = "us-east-1",
+                                    logger: Log = None
+                                    ) -> bool:
+    """remove an api gateway invoke permission from the lambda function
+
+    Args:
+        lambda_function_name: the name of the lambda function
+        statement_id: statement id of the permission
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the permission is removed
+
+    """
+    lambda_client = boto3.client('lambda', region_name=aws_region)
+
+    response = lambda_client.remove_permission(FunctionName=lambda_function_name, StatementId=statement_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") // 100 != 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"invoke permission {statement_id} removed from {lambda_function_name}")
+    return True
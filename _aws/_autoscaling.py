@@ -0,0 +1,359 @@
+from typing import List, Union, Dict
+import boto3
+from time import sleep, monotonic
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_WAIT_TIME_ = 10
+_WAIT_TIMEOUT_ = 900
+
+# predefined target tracking metrics
+_METRIC_CPU_ = "ASGAverageCPUUtilization"
+_METRIC_REQUEST_COUNT_ = "ALBRequestCountPerTarget"
+
+
+def _launch_specification(launch_template_id: str,
+                          launch_template_version: str,
+                          instance_types: List[str] = None,
+                          instance_requirements: Dict = None,
+                          on_demand_base_capacity: int = 0,
+                          on_demand_percentage_above_base_capacity: int = 0
+                          ) -> Dict:
+    # a plain launch template, or a mixed instances policy spreading spot capacity over several instance types
+    _launch_template = {
+        "LaunchTemplateId": launch_template_id,
+        "Version": launch_template_version
+    }
+    if not instance_types and not instance_requirements:
+        return {"LaunchTemplate": _launch_template}
+
+    if instance_requirements:
+        _overrides = [{"InstanceRequirements": instance_requirements}]
+    else:
+        _overrides = [{"InstanceType": each_type} for each_type in dict.fromkeys(instance_types)]
+    return {
+        "MixedInstancesPolicy": {
+            "LaunchTemplate": {
+                "LaunchTemplateSpecification": _launch_template,
+                "Overrides": _overrides
+            },
+            "InstancesDistribution": {
+                "OnDemandBaseCapacity": on_demand_base_capacity,
+                "OnDemandPercentageAboveBaseCapacity": on_demand_percentage_above_base_capacity,
+                "SpotAllocationStrategy": "price-capacity-optimized",
+                "OnDemandAllocationStrategy": "lowest-price"
+            }
+        },
+        # spot instances at risk of interruption are replaced ahead of time
+        "CapacityRebalance": True
+    }
+
+
+@_common_.aws_client_handle_exceptions()
+def get_auto_scaling_group(auto_scaling_group_name: str,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> Union[Dict, None]:
+    """find an auto scaling group by name
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the auto scaling group description, None if it does not exist
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    response = autoscaling_client.describe_auto_scaling_groups(AutoScalingGroupNames=[auto_scaling_group_name])
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("AutoScalingGroups", [])), None)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_auto_scaling_group(auto_scaling_group_name: str,
+                              launch_template_id: str,
+                              subnet_ids: List[str],
+                              min_size: int,
+                              max_size: int,
+                              desired_capacity: int,
+                              target_group_arns: List[str] = None,
+                              health_check_grace_period: int = 120,
+                              launch_template_version: str = "$Latest",
+                              instance_types: List[str] = None,
+                              instance_requirements: Dict = None,
+                              on_demand_base_capacity: int = 0,
+                              on_demand_percentage_above_base_capacity: int = 0,
+                              tags: Dict[str, str] = None,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None
+                              ) -> bool:
+    """create an auto scaling group from a launch template spread over the subnets, instances registered to a
+    target group are replaced when they fail the load balancer health check
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        launch_template_id: launch template id
+        subnet_ids: subnet ids, one per availability zone
+        min_size: minimum number of instances
+        max_size: maximum number of instances
+        desired_capacity: initial number of instances
+        target_group_arns: target groups the instances are registered to
+        health_check_grace_period: seconds after launch before health checks count
+        launch_template_version: launch template version
+        instance_types: spread the instances over these instance types with a mixed instances policy, spot
+                        capacity is allocated price-capacity-optimized
+        instance_requirements: attribute based instance type selection instead of instance types
+        on_demand_base_capacity: instances always launched on-demand, mixed instances policy only
+        on_demand_percentage_above_base_capacity: share of on-demand instances above the base capacity
+        tags: tags of the auto scaling group, the instances are tagged by the launch template
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    _parameters = {
+        "AutoScalingGroupName": auto_scaling_group_name,
+        **_launch_specification(launch_template_id,
+                                launch_template_version,
+                                instance_types=instance_types,
+                                instance_requirements=instance_requirements,
+                                on_demand_base_capacity=on_demand_base_capacity,
+                                on_demand_percentage_above_base_capacity=on_demand_percentage_above_base_capacity),
+        "MinSize": min_size,
+        "MaxSize": max_size,
+        "DesiredCapacity": desired_capacity,
+        "VPCZoneIdentifier": ",".join(subnet_ids),
+        "HealthCheckGracePeriod": health_check_grace_period,
+        "Tags": [{"Key": _key, "Value": _value, "PropagateAtLaunch": False} for _key, _value in (tags or {}).items()]
+    }
+    if target_group_arns:
+        _parameters["TargetGroupARNs"] = target_group_arns
+        _parameters["HealthCheckType"] = "ELB"
+
+    response = autoscaling_client.create_auto_scaling_group(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"created auto scaling group {auto_scaling_group_name}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def update_auto_scaling_group(auto_scaling_group_name: str,
+                              launch_template_id: str,
+                              subnet_ids: List[str],
+                              min_size: int,
+                              max_size: int,
+                              launch_template_version: str = "$Latest",
+                              instance_types: List[str] = None,
+                              instance_requirements: Dict = None,
+                              on_demand_base_capacity: int = 0,
+                              on_demand_percentage_above_base_capacity: int = 0,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None
+                              ) -> bool:
+    """point an existing auto scaling group to a launch template and update its size limits, the desired
+    capacity is left to the scaling policies
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        launch_template_id: launch template id
+        subnet_ids: subnet ids, one per availability zone
+        min_size: minimum number of instances
+        max_size: maximum number of instances
+        launch_template_version: launch template version
+        instance_types: see create_auto_scaling_group
+        instance_requirements: see create_auto_scaling_group
+        on_demand_base_capacity: see create_auto_scaling_group
+        on_demand_percentage_above_base_capacity: see create_auto_scaling_group
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    _parameters = {
+        "AutoScalingGroupName": auto_scaling_group_name,
+        **_launch_specification(launch_template_id,
+                                launch_template_version,
+                                instance_types=instance_types,
+                                instance_requirements=instance_requirements,
+                                on_demand_base_capacity=on_demand_base_capacity,
+                                on_demand_percentage_above_base_capacity=on_demand_percentage_above_base_capacity),
+        "MinSize": min_size,
+        "MaxSize": max_size,
+        "VPCZoneIdentifier": ",".join(subnet_ids)
+    }
+    response = autoscaling_client.update_auto_scaling_group(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"updated auto scaling group {auto_scaling_group_name}")
+    return True
+
+
+# a refresh already replacing the instances picks up the latest launch template version by itself
+@_common_.aws_client_handle_exceptions("InstanceRefreshInProgress")
+def start_instance_refresh(auto_scaling_group_name: str,
+                           min_healthy_percentage: int = 100,
+                           max_healthy_percentage: int = 200,
+                           instance_warmup: int = 120,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> Union[str, bool]:
+    """roll the instances of an auto scaling group onto its current launch template, instances already matching it
+    are skipped. with the default percentages a replacement is launched and healthy before an old instance goes
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        min_healthy_percentage: share of the desired capacity kept in service during the refresh
+        max_healthy_percentage: share of the desired capacity the group can grow to during the refresh
+        instance_warmup: seconds a new instance needs before it counts as healthy
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the instance refresh id, False if a refresh is already in progress
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    _parameters = {
+        "AutoScalingGroupName": auto_scaling_group_name,
+        "Strategy": "Rolling",
+        "Preferences": {
+            "MinHealthyPercentage": min_healthy_percentage,
+            "MaxHealthyPercentage": max_healthy_percentage,
+            "InstanceWarmup": instance_warmup,
+            "SkipMatching": True
+        }
+    }
+    response = autoscaling_client.start_instance_refresh(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"started instance refresh {response.get('InstanceRefreshId')} of {auto_scaling_group_name}")
+    return response.get("InstanceRefreshId")
+
+
+@_common_.aws_client_handle_exceptions()
+def put_target_tracking_policy(auto_scaling_group_name: str,
+                               policy_name: str,
+                               metric: str,
+                               target_value: float,
+                               resource_label: str = None,
+                               aws_region: str = "us-east-1",
+                               logger: Log = None
+                               ) -> str:
+    """create or replace a target tracking scaling policy
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        policy_name: policy name
+        metric: ASGAverageCPUUtilization or ALBRequestCountPerTarget
+        target_value: value of the metric the group is scaled to keep
+        resource_label: target group resource label, required for ALBRequestCountPerTarget
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the policy arn
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    _metric_specification = {"PredefinedMetricType": metric}
+    if resource_label:
+        _metric_specification["ResourceLabel"] = resource_label
+
+    _parameters = {
+        "AutoScalingGroupName": auto_scaling_group_name,
+        "PolicyName": policy_name,
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingConfiguration": {
+            "PredefinedMetricSpecification": _metric_specification,
+            "TargetValue": target_value
+        }
+    }
+    response = autoscaling_client.put_scaling_policy(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"scaling {auto_scaling_group_name} to keep {metric} at {target_value}")
+    return response.get("PolicyARN")
+
+
+@_common_.aws_client_handle_exceptions()
+def delete_auto_scaling_group(auto_scaling_group_name: str,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None
+                              ) -> bool:
+    """delete an auto scaling group together with its instances and wait until it is gone
+
+    Args:
+        auto_scaling_group_name: auto scaling group name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the group is gone
+
+    """
+    autoscaling_client = boto3.client("autoscaling", region_name=aws_region)
+
+    if not get_auto_scaling_group(auto_scaling_group_name, aws_region=aws_region):
+        _common_.info_logger(f"auto scaling group {auto_scaling_group_name} does not exist")
+        return True
+
+    response = autoscaling_client.delete_auto_scaling_group(AutoScalingGroupName=auto_scaling_group_name,
+                                                            ForceDelete=True)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    # there is no waiter for auto scaling groups, the group disappears once its instances are terminated
+    deadline = monotonic() + _WAIT_TIMEOUT_
+    while get_auto_scaling_group(auto_scaling_group_name, aws_region=aws_region):
+        if monotonic() > deadline:
+            _common_.info_logger(f"auto scaling group {auto_scaling_group_name} still exists after {_WAIT_TIMEOUT_} seconds")
+            return False
+        sleep(_WAIT_TIME_)
+
+    _common_.info_logger(f"deleted auto scaling group {auto_scaling_group_name}")
+    return True
@@ -0,0 +1,226 @@
+from typing import Dict, Set, Tuple, Callable, Any
+import re
+import json
+import copy
+import functools
+from time import monotonic
+from threading import Lock, Event
+from contextlib import contextmanager
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+# read calls repeated across the steps of a deployment, keyed by the hyphenized service id of the events,
+# calls polled until something changes are deliberately left out (describe_instances, describe_images of the
+# image_available waiter, get_instance_profile of wait_for_instance_profile, lambda get_function, ...), a cached
+# transitional state would be served to every poll until the entry expires
+_CACHEABLE_OPERATIONS_ = {
+    "iam": {"GetRole", "ListAttachedRolePolicies", "ListRolePolicies", "ListRoles",
+            "ListInstanceProfilesForRole", "GetPolicy", "ListPolicies"},
+    "api-gateway": {"GetRestApis", "GetRestApi", "GetResources", "GetMethod", "GetIntegration", "GetMethodResponse",
+                    "GetStage"},
+    "apigatewayv2": {"GetApis", "GetRoutes", "GetIntegrations", "GetStage"},
+    "ec2": {"DescribeSecurityGroups", "DescribeVpcs", "DescribeSubnets", "DescribeAvailabilityZones",
+            "DescribeRouteTables", "DescribeInternetGateways", "DescribeKeyPairs"},
+    "ecr": {"DescribeRepositories"},
+    "kms": {"DescribeKey"},
+    "ssm": {"GetParameter"},
+}
+_READ_OPERATION_PATTERN_ = re.compile(r"^(Describe|Get|List|Head|Search|Lookup)")
+# parameters naming a resource, e.g. RoleName, GroupId, restApiId, InstanceIds, PolicyArn
+_IDENTIFIER_PATTERN_ = re.compile(r"(Name|Names|Id|Ids|Arn|Arns)$", re.IGNORECASE)
+
+# an entry outliving its deployment would be stale, a deployment rarely takes longer
+_TTL_ = 900
+# a coalesced request stops waiting for the one in flight and makes its own call
+_IN_FLIGHT_TIMEOUT_ = 60
+
+_CONTEXT_KEY_ = "pg_auto_cache_key"
+_CONTEXT_HIT_ = "pg_auto_cache_hit"
+_CONTEXT_EPOCH_ = "pg_auto_cache_epoch"
+_CONTEXT_PARAMS_ = "pg_auto_cache_params"
+_HANDLER_ID_ = "pg_auto_describe_cache"
+
+_LOCK_ = Lock()
+# the cache of the running deployment, None outside of a deployment
+_STATE_ = {"depth": 0, "entries": None, "in_flight": {}, "epochs": {}, "stats": {}}
+
+
+def _identifiers(params: Any, key: str = "") -> Set[str]:
+    # the string values of identifier parameters at any depth
+    if isinstance(params, dict):
+        return {each_value for _key, _value in params.items() for each_value in _identifiers(_value, _key)}
+    if isinstance(params, list):
+        return {each_value for _value in params for each_value in _identifiers(_value, key)}
+    return {params} if isinstance(params, str) and _IDENTIFIER_PATTERN_.search(key) else set()
+
+
+def _is_collection(params: Dict) -> bool:
+    # a filtered or unfiltered listing, any change of the service can add or remove a resource in it
+    return "Filters" in params or not any(_IDENTIFIER_PATTERN_.search(_key) for _key in params)
+
+
+def _record(stat: str) -> None:
+    _STATE_["stats"][stat] = _STATE_["stats"].get(stat, 0) + 1
+
+
+def _before_parameter_build(event_name: str = "", params: Dict = None, model=None, context: Dict = None, **kwargs) -> None:
+    # the key is taken from the api parameters, the serialized request carries per attempt headers
+    _, service, operation = event_name.split(".", 2)
+    if context is None or operation not in _CACHEABLE_OPERATIONS_.get(service, ()):
+        return
+    context[_CONTEXT_KEY_] = (service, operation, context.get("client_region"),
+                              json.dumps(params or {}, sort_keys=True, default=str))
+
+
+def _before_call(event_name: str = "", context: Dict = None, **kwargs) -> Any:
+    if not (cache_key := (context or {}).get(_CONTEXT_KEY_)):
+        return None
+
+    with _LOCK_:
+        if _STATE_["entries"] is None:
+            context.pop(_CONTEXT_KEY_)
+            return None
+        if (entry := _STATE_["entries"].get(cache_key)) and monotonic() - entry.get("cached_at") < _TTL_:
+            _record("hits")
+            context[_CONTEXT_HIT_] = True
+            return entry.get("http"), copy.deepcopy(entry.get("parsed"))
+        if in_flight := _STATE_["in_flight"].get(cache_key):
+            context.pop(_CONTEXT_KEY_)
+        else:
+            _STATE_["in_flight"][cache_key] = Event()
+            context[_CONTEXT_EPOCH_] = _STATE_["epochs"].get(cache_key[0], 0)
+            _record("misses")
+            return None
+
+    # the same request is already in flight, its response is shared
+    in_flight.wait(_IN_FLIGHT_TIMEOUT_)
+    with _LOCK_:
+        if (entry := (_STATE_["entries"] or {}).get(cache_key)) is not None:
+            _record("coalesced")
+            context[_CONTEXT_HIT_] = True
+            return entry.get("http"), copy.deepcopy(entry.get("parsed"))
+    return None
+
+
+def _release(cache_key: Tuple, http=None, parsed: Dict = None, epoch: int = None) -> None:
+    with _LOCK_:
+        # a response raced by a change of its service is not kept, it may predate the change
+        if http is not None and _STATE_["entries"] is not None and epoch == _STATE_["epochs"].get(cache_key[0], 0):
+            _STATE_["entries"][cache_key] = {"http": http,
+                                             "parsed": copy.deepcopy(parsed),
+                                             "params": json.loads(cache_key[3]),
+                                             "cached_at": monotonic()}
+        if in_flight := _STATE_["in_flight"].pop(cache_key, None):
+            in_flight.set()
+
+
+def _invalidate(service: str, params: Dict) -> None:
+    identifiers = _identifiers(params)
+    with _LOCK_:
+        _STATE_["epochs"][service] = _STATE_["epochs"].get(service, 0) + 1
+        if not _STATE_["entries"]:
+            return
+        for cache_key in [cache_key for cache_key, entry in _STATE_["entries"].items()
+                          if cache_key[0] == service and
+                          (_is_collection(entry.get("params")) or _identifiers(entry.get("params")) & identifiers)]:
+            _STATE_["entries"].pop(cache_key)
+            _record("invalidated")
+
+
+def _after_call(event_name: str = "", http_response=None, parsed: Dict = None, context: Dict = None,
+                model=None, **kwargs) -> None:
+    context = context or {}
+    if context.get(_CONTEXT_HIT_):
+        return
+    if cache_key := context.get(_CONTEXT_KEY_):
+        failed = http_response is None or http_response.status_code >= 300 or "Error" in (parsed or {})
+        _release(cache_key,
+                 http=None if failed else http_response,
+                 parsed=parsed,
+                 epoch=context.get(_CONTEXT_EPOCH_))
+        return
+
+    _, service, operation = event_name.split(".", 2)
+    if _STATE_["entries"] is not None and not _READ_OPERATION_PATTERN_.match(operation):
+        _invalidate(service, context.get(_CONTEXT_PARAMS_) or {})
+
+
+def _after_call_error(context: Dict = None, **kwargs) -> None:
+    if cache_key := (context or {}).get(_CONTEXT_KEY_):
+        _release(cache_key)
+
+
+def _keep_mutation_params(event_name: str = "", params: Dict = None, context: Dict = None, **kwargs) -> None:
+    # the parameters of a mutating call decide which entries it invalidates once it went through
+    _, service, operation = event_name.split(".", 2)
+    if context is not None and not _READ_OPERATION_PATTERN_.match(operation):
+        context[_CONTEXT_PARAMS_] = params or {}
+
+
+def install(session=None) -> None:
+
+    """hook the cache into the events of the session (the default boto3 session if empty), it only serves
+    requests while a deployment is running, see deployment. installing again is a no-op
+
+    Args:
+        session: boto3 session
+
+    """
+    import boto3
+
+    if session is None:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+
+    for event_name, handler in (("before-parameter-build", _before_parameter_build),
+                                ("before-parameter-build", _keep_mutation_params),
+                                ("before-call", _before_call),
+                                ("after-call", _after_call),
+                                ("after-call-error", _after_call_error)):
+        session.events.register(event_name, handler, unique_id=f"{_HANDLER_ID_}-{event_name}-{handler.__name__}")
+
+
+@contextmanager
+def deployment(logger: Log = None):
+
+    """cache the read calls of a deployment
+
+    identical describe, get and list calls are served from memory, concurrent identical calls share a single
+    request, and a mutating call (anything but describe, get and list) drops the entries of its service naming
+    the same resource as well as the listings of the service. nested deployments share the outer cache
+
+    Args:
+        logger: logger object
+
+    """
+    # clients created during the deployment get the handlers even if no entry point installed them
+    from _aws import _session
+    _session.install()
+
+    with _LOCK_:
+        if _STATE_["depth"] == 0:
+            _STATE_.update({"entries": {}, "in_flight": {}, "epochs": {}, "stats": {}})
+        _STATE_["depth"] += 1
+    try:
+        yield
+    finally:
+        with _LOCK_:
+            _STATE_["depth"] -= 1
+            if _STATE_["depth"] == 0:
+                stats, _STATE_["entries"] = _STATE_["stats"], None
+            else:
+                stats = None
+        if stats:
+            _common_.info_logger(f"describe cache: {stats.get('hits', 0)} hits, {stats.get('coalesced', 0)} coalesced, "
+                                 f"{stats.get('misses', 0)} misses, {stats.get('invalidated', 0)} invalidated", logger=logger)
+
+
+def per_deployment(func: Callable) -> Callable:
+    """run the function as a deployment, see deployment"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with deployment():
+            return func(*args, **kwargs)
+    return wrapper
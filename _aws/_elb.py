@@ -0,0 +1,336 @@
+from typing import List, Union, Dict
+import boto3
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_WAIT_TIME_ = 15
+_WAIT_TIMEOUT_ = 600
+
+
+@_common_.aws_client_handle_exceptions("LoadBalancerNotFound")
+def get_load_balancer_by_name(load_balancer_name: str,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None
+                              ) -> Union[Dict, None]:
+    """find an application load balancer by name
+
+    Args:
+        load_balancer_name: load balancer name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the load balancer description, False if it does not exist
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    response = elb_client.describe_load_balancers(Names=[load_balancer_name])
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("LoadBalancers", [])), None)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_load_balancer(load_balancer_name: str,
+                         subnet_ids: List[str],
+                         security_group_ids: Union[str, List],
+                         tags: Dict[str, str] = None,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> Dict:
+    """create an internet facing application load balancer, the subnets need to be in at least two availability
+    zones with at most one subnet per zone
+
+    Args:
+        load_balancer_name: load balancer name, at most 32 alphanumeric characters or hyphens
+        subnet_ids: subnet ids
+        security_group_ids: security group ids
+        tags: tags of the load balancer
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the load balancer description
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    if isinstance(security_group_ids, str):
+        security_group_ids = [security_group_ids]
+
+    _parameters = {
+        "Name": load_balancer_name,
+        "Subnets": subnet_ids,
+        "SecurityGroups": security_group_ids,
+        "Scheme": "internet-facing",
+        "Type": "application",
+        "IpAddressType": "ipv4"
+    }
+    if tags:
+        from _aws import _tagging
+        _parameters["Tags"] = _tagging.to_tag_list(tags)
+
+    response = elb_client.create_load_balancer(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    load_balancer = response.get("LoadBalancers", [{}])[0]
+    _common_.info_logger(f"created load balancer {load_balancer_name}: {load_balancer.get('DNSName')}")
+    return load_balancer
+
+
+@_common_.aws_client_handle_exceptions()
+def wait_for_load_balancer_available(load_balancer_arn: str,
+                                     aws_region: str = "us-east-1",
+                                     logger: Log = None
+                                     ) -> bool:
+    """wait until the load balancer is active
+
+    Args:
+        load_balancer_arn: load balancer arn
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True once the load balancer is active
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    waiter = elb_client.get_waiter("load_balancer_available")
+    waiter.wait(LoadBalancerArns=[load_balancer_arn],
+                WaiterConfig={"Delay": _WAIT_TIME_, "MaxAttempts": _WAIT_TIMEOUT_ // _WAIT_TIME_})
+    return True
+
+
+@_common_.aws_client_handle_exceptions("LoadBalancerNotFound")
+def delete_load_balancer(load_balancer_arn: str,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> bool:
+    """delete a load balancer with its listeners and wait until it is gone
+
+    Args:
+        load_balancer_arn: load balancer arn
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    response = elb_client.delete_load_balancer(LoadBalancerArn=load_balancer_arn)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    waiter = elb_client.get_waiter("load_balancers_deleted")
+    waiter.wait(LoadBalancerArns=[load_balancer_arn],
+                WaiterConfig={"Delay": _WAIT_TIME_, "MaxAttempts": _WAIT_TIMEOUT_ // _WAIT_TIME_})
+    _common_.info_logger(f"deleted load balancer {load_balancer_arn}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions("TargetGroupNotFound")
+def get_target_group_by_name(target_group_name: str,
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> Union[Dict, None]:
+    """find a target group by name
+
+    Args:
+        target_group_name: target group name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the target group description, False if it does not exist
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    response = elb_client.describe_target_groups(Names=[target_group_name])
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("TargetGroups", [])), None)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_target_group(target_group_name: str,
+                        port: int,
+                        vpc_id: str,
+                        health_check_path: str = "/",
+                        deregistration_delay: int = 30,
+                        tags: Dict[str, str] = None,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> str:
+    """create an http instance target group with a health check
+
+    Args:
+        target_group_name: target group name, at most 32 alphanumeric characters or hyphens
+        port: port the instances serve on
+        vpc_id: vpc id
+        health_check_path: http path of the health check
+        deregistration_delay: seconds in-flight requests are drained before a target is removed
+        tags: tags of the target group
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the target group arn
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    _parameters = {
+        "Name": target_group_name,
+        "Protocol": "HTTP",
+        "Port": port,
+        "VpcId": vpc_id,
+        "TargetType": "instance",
+        "HealthCheckProtocol": "HTTP",
+        "HealthCheckPort": "traffic-port",
+        "HealthCheckPath": health_check_path,
+        "HealthCheckIntervalSeconds": 10,
+        "HealthCheckTimeoutSeconds": 5,
+        "HealthyThresholdCount": 2,
+        "UnhealthyThresholdCount": 3,
+        "Matcher": {"HttpCode": "200-399"}
+    }
+    if tags:
+        from _aws import _tagging
+        _parameters["Tags"] = _tagging.to_tag_list(tags)
+
+    response = elb_client.create_target_group(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    target_group_arn = response.get("TargetGroups", [{}])[0].get("TargetGroupArn")
+    elb_client.modify_target_group_attributes(TargetGroupArn=target_group_arn,
+                                              Attributes=[{"Key": "deregistration_delay.timeout_seconds",
+                                                           "Value": str(deregistration_delay)}])
+    _common_.info_logger(f"created target group {target_group_name}")
+    return target_group_arn
+
+
+@_common_.aws_client_handle_exceptions("TargetGroupNotFound")
+def delete_target_group(target_group_arn: str,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> bool:
+    """delete a target group, it can not be in use by a listener or an auto scaling group anymore
+
+    Args:
+        target_group_arn: target group arn
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    response = elb_client.delete_target_group(TargetGroupArn=target_group_arn)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"deleted target group {target_group_arn}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def get_listeners(load_balancer_arn: str,
+                  aws_region: str = "us-east-1",
+                  logger: Log = None
+                  ) -> List[Dict]:
+    """list the listeners of a load balancer
+
+    Args:
+        load_balancer_arn: load balancer arn
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the listener descriptions
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    paginator = elb_client.get_paginator("describe_listeners")
+    return [each_listener for page in paginator.paginate(LoadBalancerArn=load_balancer_arn)
+            for each_listener in page.get("Listeners", [])]
+
+
+@_common_.aws_client_handle_exceptions()
+def create_listener(load_balancer_arn: str,
+                    target_group_arn: str,
+                    port: int = 80,
+                    aws_region: str = "us-east-1",
+                    logger: Log = None
+                    ) -> str:
+    """create an http listener forwarding to the target group
+
+    Args:
+        load_balancer_arn: load balancer arn
+        target_group_arn: target group arn
+        port: listener port
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the listener arn
+
+    """
+    elb_client = boto3.client("elbv2", region_name=aws_region)
+
+    _parameters = {
+        "LoadBalancerArn": load_balancer_arn,
+        "Protocol": "HTTP",
+        "Port": port,
+        "DefaultActions": [{"Type": "forward", "TargetGroupArn": target_group_arn}]
+    }
+    response = elb_client.create_listener(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"created listener on port {port} for {load_balancer_arn}")
+    return response.get("Listeners", [{}])[0].get("ListenerArn")
+
+
+def get_resource_label(load_balancer_arn: str, target_group_arn: str) -> str:
+    """resource label identifying the target group behind the load balancer for the ALBRequestCountPerTarget
+    metric, app/<lb name>/<lb id>/targetgroup/<tg name>/<tg id>"""
+    return f"{load_balancer_arn.split(':loadbalancer/')[-1]}/{target_group_arn.split(':')[-1]}"
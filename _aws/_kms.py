@@ -1,15 +1,25 @@
+import os
 from typing import List, Union, Dict
 import boto3
+from time import time
+from threading import RLock
 from logging import Logger as Log
 from inspect import currentframe
 
-from jinja2.nodes import Tuple
-
 from _common import _common as _common_
 
 
 _WAIT_TIME_ = 4
 
+# alias -> key id / arn per region, kept in memory and in the user cache directory so deploys skip the lookup
+# within the ttl, only aws managed aliases are served from it without checking the key, see resolve_key
+_KEY_CACHE_FILEPATH_ = os.path.join(os.path.expanduser("~"), ".cache", "pg_auto", "kms_key_cache.json")
+_KEY_CACHE_TTL_ = 86400
+_KEY_CACHE_ = {}
+_KEY_CACHE_LOCK_ = RLock()
+# a key losing the race for its alias is scheduled for deletion after the minimum waiting period
+_PENDING_WINDOW_IN_DAYS_ = 7
+
 
 @_common_.aws_client_handle_exceptions()
 def aws_client(service_name: str, aws_region: str):
@@ -32,19 +42,9 @@ def get_aws_managed_keys(kms_alias: str,
         return the list of AWS managed keys else an empty list
 
     """
-    # Initialize a session using AWS KMS
-    kms_client = boto3.client("kms", region_name=aws_region)
-
-    response = kms_client.list_aliases()
-    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"operation failed, reason response code is not 200",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
-
-    return [each_key.get("TargetKeyId") for each_key in
-            response.get("Aliases") if each_key.get("AliasName") == kms_alias]
+    # describing an aws managed alias, e.g. alias/aws/ebs, also creates the key if it is not used yet
+    key = resolve_key(kms_alias, aws_region=aws_region, logger=logger)
+    return [key.get("key_id")] if key else []
 
 
 @_common_.aws_client_handle_exceptions()
@@ -81,7 +81,7 @@ def create_kms_keys(aws_region: str = "us-east-1",
     return response.get("KeyMetadata", {}).get("KeyId"), response.get("KeyMetadata", {}).get("Arn")
 
 
-@_common_.aws_client_handle_exceptions()
+@_common_.aws_client_handle_exceptions("AlreadyExistsException")
 def create_kms_key_alias(alias_name: str,
                          key_id: str,
                          aws_region: str = "us-east-1",
@@ -96,14 +96,14 @@ def create_kms_key_alias(alias_name: str,
         logger: logger object
 
     Returns:
-        return the list of AWS managed keys else an empty list
+        return True if the alias is created, False if it already exists
 
     """
     # Initialize a session using AWS KMS
     kms_client = boto3.client("kms", region_name=aws_region)
 
     _parameters = {
-        "AliasName": "alias/" + alias_name,
+        "AliasName": _alias_name(alias_name),
         "TargetKeyId": key_id
     }
 
@@ -128,7 +128,6 @@ def check_alias_exists(alias_name: str,
 
     Args:
         alias_name: alias name
-        key_id: key id
         aws_region: aws region
         logger: logger object
 
@@ -136,16 +135,7 @@ def check_alias_exists(alias_name: str,
         return true if the alias exists else false
 
     """
-    # Initialize the KMS client
-    kms_client = boto3.client("kms", region_name=aws_region)
-
-    # List all aliases and check for the specified alias
-    paginator = kms_client.get_paginator('list_aliases')
-    for page in paginator.paginate():
-        for alias in page['Aliases']:
-            if alias.get("AliasName") == alias_name:
-                return True  # Alias exists
-    return False  # Alias does not exist
+    return bool(describe_key(_alias_name(alias_name), aws_region=aws_region, logger=logger))
 
 
 @_common_.aws_client_handle_exceptions()
@@ -163,15 +153,220 @@ def get_key_alias_arn(alias_name: str,
     Returns:
         return arn of key alias if the alias exists else None
 
+    """
+    if not (key := resolve_key(alias_name, aws_region=aws_region, logger=logger)):
+        return None
+    # arn:aws:kms:<region>:<account>:key/<key id> -> arn:aws:kms:<region>:<account>:alias/<alias name>
+    return f"{key.get('key_arn').rsplit(':', 1)[0]}:{_alias_name(alias_name)}"
+
+
+def _alias_name(alias_name: str) -> str:
+    return alias_name if alias_name.startswith("alias/") else f"alias/{alias_name}"
+
+
+def _key_cache_get(cache_key: str, cache_ttl: int) -> Union[Dict, None]:
+    # the disk cache is loaded once per process, entries older than the ttl are ignored
+    from _util import _util_file as _util_file_
+
+    if not _KEY_CACHE_ and _util_file_.is_file_exist(_KEY_CACHE_FILEPATH_):
+        _KEY_CACHE_.update(_util_file_.json_load(_KEY_CACHE_FILEPATH_) or {})
+    if (entry := _KEY_CACHE_.get(cache_key)) and time() - entry.get("resolved_at", 0) < cache_ttl:
+        return {"key_id": entry.get("key_id"), "key_arn": entry.get("key_arn")}
+    return None
+
+
+def _key_cache_put(cache_key: str, key_id: str, key_arn: str) -> None:
+    from _util import _util_file as _util_file_
+
+    _KEY_CACHE_[cache_key] = {"key_id": key_id, "key_arn": key_arn, "resolved_at": time()}
+    os.makedirs(os.path.dirname(_KEY_CACHE_FILEPATH_), exist_ok=True)
+    _util_file_.json_dump(_KEY_CACHE_FILEPATH_, _KEY_CACHE_)
+
+
+def _key_cache_drop(cache_key: str) -> None:
+    from _util import _util_file as _util_file_
+
+    if _KEY_CACHE_.pop(cache_key, None) is not None:
+        _util_file_.json_dump(_KEY_CACHE_FILEPATH_, _KEY_CACHE_)
+
+
+def _is_aws_managed_alias(alias_name: str) -> bool:
+    # aws managed keys can not be disabled, deleted or retargeted, e.g. alias/aws/ebs
+    return _alias_name(alias_name).startswith("alias/aws/")
+
+
+@_common_.aws_client_handle_exceptions("NotFoundException")
+def describe_key(key_id: str,
+                 aws_region: str = "us-east-1",
+                 logger: Log = None
+                 ) -> Union[Dict, bool]:
+    """describe a key by key id, key arn, alias name (alias/...) or alias arn
+
+    Args:
+        key_id: key id, key arn, alias name or alias arn
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the key metadata (KeyId, Arn, KeyState, ...), False if the key or alias does not exist
+
+    """
+    # Initialize the KMS client
+    kms_client = boto3.client("kms", region_name=aws_region)
+
+    response = kms_client.describe_key(KeyId=key_id)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return response.get("KeyMetadata", {})
+
+
+def resolve_key(alias_name: str,
+                cache_ttl: int = _KEY_CACHE_TTL_,
+                aws_region: str = "us-east-1",
+                logger: Log = None
+                ) -> Union[Dict, None]:
+
+    """resolve an alias to its key with a single describe_key call instead of paging through every alias, the
+    result is cached per region in memory and on disk
+
+    a cached aws managed key is returned as is, any other alias is described again so that a key which was
+    disabled, scheduled for deletion or replaced by retargeting the alias is never returned from the cache
+
+    Args:
+        alias_name: alias name, with or without the alias/ prefix
+        cache_ttl: seconds a resolved key is reused, 0 to always resolve
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        {"key_id", "key_arn"}, None if the alias does not exist or its key is not enabled
+
+    """
+    cache_key = f"{aws_region}/{_alias_name(alias_name)}"
+    with _KEY_CACHE_LOCK_:
+        cached_key = _key_cache_get(cache_key, cache_ttl)
+        if cached_key and _is_aws_managed_alias(alias_name):
+            return cached_key
+
+        if not (key_metadata := describe_key(_alias_name(alias_name), aws_region=aws_region, logger=logger)):
+            _key_cache_drop(cache_key)
+            return None
+        if key_metadata.get("KeyState") != "Enabled":
+            _common_.info_logger(f"{_alias_name(alias_name)} in {aws_region} points to key {key_metadata.get('KeyId')} "
+                                 f"which is {key_metadata.get('KeyState')}", logger=logger)
+            _key_cache_drop(cache_key)
+            return None
+        if cached_key and cached_key.get("key_id") == key_metadata.get("KeyId"):
+            return cached_key
+
+        _key_cache_put(cache_key, key_metadata.get("KeyId"), key_metadata.get("Arn"))
+        _common_.info_logger(f"resolved {_alias_name(alias_name)} in {aws_region}: {key_metadata.get('KeyId')}",
+                             logger=logger)
+        return {"key_id": key_metadata.get("KeyId"), "key_arn": key_metadata.get("Arn")}
+
+
+@_common_.aws_client_handle_exceptions()
+def schedule_key_deletion(key_id: str,
+                          pending_window_in_days: int = _PENDING_WINDOW_IN_DAYS_,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """schedule the deletion of a key
+
+    Args:
+        key_id: key id
+        pending_window_in_days: days before the key is deleted, 7 to 30
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        return True if successful
+
     """
     # Initialize the KMS client
     kms_client = boto3.client("kms", region_name=aws_region)
-    print(alias_name)
-
-    # List all aliases and check for the specified alias
-    paginator = kms_client.get_paginator('list_aliases')
-    for page in paginator.paginate():
-        for alias in page['Aliases']:
-            if alias.get("AliasName") == alias_name:
-                return alias.get("AliasArn")  # Alias exists
-    return None  # Alias does not exist
\ No newline at end of file
+
+    response = kms_client.schedule_key_deletion(KeyId=key_id, PendingWindowInDays=pending_window_in_days)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"scheduled kms key {key_id} for deletion in {pending_window_in_days} days", logger=logger)
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def update_kms_key_alias(alias_name: str,
+                         key_id: str,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> bool:
+    """point an existing alias to another key
+
+    Args:
+        alias_name: alias name
+        key_id: key id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        return True if successful
+
+    """
+    # Initialize the KMS client
+    kms_client = boto3.client("kms", region_name=aws_region)
+
+    response = kms_client.update_alias(AliasName=_alias_name(alias_name), TargetKeyId=key_id)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"updated kms key alias {alias_name} to key_id {key_id}", logger=logger)
+    return True
+
+
+def get_or_create_key(alias_name: str,
+                      cache_ttl: int = _KEY_CACHE_TTL_,
+                      aws_region: str = "us-east-1",
+                      logger: Log = None
+                      ) -> Union[Dict, None]:
+
+    """resolve the alias, or create a key with the alias if it does not exist or its key is not enabled any more
+
+    safe under concurrent deploys: threads of a process are serialized, across processes the alias decides, a
+    deploy whose alias creation loses to another one schedules its own key for deletion and uses the winner
+
+    Args:
+        alias_name: alias name, with or without the alias/ prefix
+        cache_ttl: seconds a resolved key is reused, 0 to always resolve
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        {"key_id", "key_arn"}
+
+    """
+    with _KEY_CACHE_LOCK_:
+        if key := resolve_key(alias_name, cache_ttl=cache_ttl, aws_region=aws_region, logger=logger):
+            return key
+
+        key_id, key_arn = create_kms_keys(aws_region=aws_region, logger=logger)
+        if check_alias_exists(alias_name, aws_region=aws_region, logger=logger):
+            # the alias points to a key which is disabled or pending deletion, move it to the new key
+            update_kms_key_alias(alias_name=alias_name, key_id=key_id, aws_region=aws_region, logger=logger)
+        elif not create_kms_key_alias(alias_name=alias_name, key_id=key_id, aws_region=aws_region, logger=logger):
+            _common_.info_logger(f"{_alias_name(alias_name)} was created concurrently, discarding key {key_id}",
+                                 logger=logger)
+            schedule_key_deletion(key_id, aws_region=aws_region, logger=logger)
+            return resolve_key(alias_name, cache_ttl=0, aws_region=aws_region, logger=logger)
+
+        _key_cache_put(f"{aws_region}/{_alias_name(alias_name)}", key_id, key_arn)
+        return {"key_id": key_id, "key_arn": key_arn}
@@ -0,0 +1,57 @@
+from typing import Union
+import json
+import boto3
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+# the price list api is only served from a few regions, the prices cover every region
+_PRICING_REGION_ = "us-east-1"
+
+
+# the price is informational, a missing pricing:GetProducts permission is not an error
+@_common_.aws_client_handle_exceptions("AccessDeniedException")
+def get_on_demand_price(instance_type: str,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> Union[float, None]:
+    """hourly on-demand price of a shared tenancy linux instance
+
+    Args:
+        instance_type: instance type
+        aws_region: region the instance runs in
+        logger: logger object
+
+    Returns:
+        hourly price in usd, None if the instance type is not offered in the region
+
+    """
+    pricing_client = boto3.client("pricing", region_name=_PRICING_REGION_)
+
+    _parameters = {
+        "ServiceCode": "AmazonEC2",
+        "Filters": [
+            {"Type": "TERM_MATCH", "Field": _field, "Value": _value}
+            for _field, _value in (("instanceType", instance_type),
+                                   ("regionCode", aws_region),
+                                   ("operatingSystem", "Linux"),
+                                   ("tenancy", "Shared"),
+                                   ("preInstalledSw", "NA"),
+                                   ("capacitystatus", "Used"))
+        ],
+        "MaxResults": 1
+    }
+    response = pricing_client.get_products(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    for each_product in response.get("PriceList", []):
+        for each_term in json.loads(each_product).get("terms", {}).get("OnDemand", {}).values():
+            for each_dimension in each_term.get("priceDimensions", {}).values():
+                return float(each_dimension.get("pricePerUnit", {}).get("USD"))
+    return None
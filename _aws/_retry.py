@@ -0,0 +1,177 @@
+from typing import Dict, Union
+import os
+import atexit
+from time import sleep, monotonic
+from threading import Lock
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+# every client retries with botocore adaptive mode: exponential backoff plus a client side rate limiter
+_RETRY_MODE_ = "adaptive"
+_MAX_ATTEMPTS_ = 10
+
+# requests per second shared by all threads of the process, keyed by the hyphenized service id of the events,
+# the control plane limits of api gateway and iam are per account and far lower than the ones of ec2
+_SERVICE_RATES_ = {
+    "api-gateway": 5,
+    "apigatewayv2": 5,
+    "iam": 10,
+    "lambda": 10,
+    "ecr": 20,
+    "elastic-load-balancing-v2": 10,
+    "auto-scaling": 10,
+    "ec2": 50,
+}
+_DEFAULT_RATE_ = 20
+# a throttled request halves the rate of its service down to this floor, every success adds back a fraction
+_MIN_RATE_ = 0.5
+_RATE_DECREASE_ = 0.5
+_RATE_INCREASE_ = 0.05
+
+_HANDLER_ID_ = "pg_auto_retry"
+
+
+class _TokenBucket:
+    """token bucket holding one second of requests (at least one request), the rate adapts to throttling"""
+
+    def __init__(self, rate: float):
+        self._max_rate = rate
+        self._rate = rate
+        self._tokens = rate
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> float:
+        """take a token, waiting for it if the bucket is empty, returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+            sleep(delay)
+            waited += delay
+
+    def _capacity(self) -> float:
+        # below one request per second the bucket still has to fill up to the one token a request takes
+        return max(self._rate, 1)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self._rate = max(self._rate * _RATE_DECREASE_, _MIN_RATE_)
+            self._tokens = min(self._tokens, self._capacity())
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._rate = min(self._rate + self._max_rate * _RATE_INCREASE_, self._max_rate)
+
+
+_BUCKETS_ = {}
+_METRICS_ = {}
+_LOCK_ = Lock()
+
+
+def _service(event_name: str) -> str:
+    # e.g. before-send.api-gateway.GetRestApis -> api-gateway
+    return event_name.split(".")[1] if event_name.count(".") >= 2 else event_name
+
+
+def _bucket(service: str) -> _TokenBucket:
+    with _LOCK_:
+        if service not in _BUCKETS_:
+            _BUCKETS_[service] = _TokenBucket(_SERVICE_RATES_.get(service, _DEFAULT_RATE_))
+        return _BUCKETS_.get(service)
+
+
+def _record(service: str, **increments: Union[int, float]) -> None:
+    with _LOCK_:
+        metrics = _METRICS_.setdefault(service, {"calls": 0, "retries": 0, "throttles": 0, "throttle_delay_seconds": 0.0})
+        for _key, _value in increments.items():
+            metrics[_key] += _value
+
+
+def _before_send(event_name: str = "", **kwargs) -> None:
+    # every attempt, retries included, takes a token of its service
+    if waited := _bucket(service := _service(event_name)).acquire():
+        _record(service, throttle_delay_seconds=waited)
+
+
+def _response_received(event_name: str = "", parsed_response: Dict = None, **kwargs) -> None:
+    error_code = (parsed_response or {}).get("Error", {}).get("Code")
+    if error_code in _common_._THROTTLING_ERROR_CODES_:
+        _bucket(service := _service(event_name)).throttled()
+        _record(service, throttles=1)
+    elif not error_code:
+        _bucket(_service(event_name)).succeeded()
+
+
+def _after_call(event_name: str = "", parsed: Dict = None, context: Dict = None, **kwargs) -> None:
+    if (context or {}).get("pg_auto_cache_hit"):
+        # served by _describe_cache, no request was sent
+        return
+    _record(_service(event_name), calls=1, retries=(parsed or {}).get("ResponseMetadata", {}).get("RetryAttempts", 0))
+
+
+def _after_call_error(event_name: str = "", exception: Exception = None, **kwargs) -> None:
+    response = getattr(exception, "response", None) or {}
+    _record(_service(event_name), calls=1, retries=response.get("ResponseMetadata", {}).get("RetryAttempts", 0))
+
+
+def install(session=None) -> None:
+
+    """retry every aws call with botocore adaptive mode and rate limit it per service across threads
+
+    the retry mode is set through the environment so it also applies to clients created directly with
+    boto3.client, the rate limiter and the metrics hook into the events of the session (the default boto3
+    session if empty), clients created before are not affected. installing again is a no-op
+
+    Args:
+        session: boto3 session
+
+    """
+    import boto3
+
+    os.environ.setdefault("AWS_RETRY_MODE", _RETRY_MODE_)
+    os.environ.setdefault("AWS_MAX_ATTEMPTS", str(_MAX_ATTEMPTS_))
+
+    if session is None:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+
+    for event_name, handler in (("before-send", _before_send),
+                                ("response-received", _response_received),
+                                ("after-call", _after_call),
+                                ("after-call-error", _after_call_error)):
+        session.events.register(event_name, handler, unique_id=f"{_HANDLER_ID_}-{event_name}")
+
+
+def get_metrics() -> Dict[str, Dict]:
+    """per service: calls, retries (attempts after the first), throttles (throttled attempts) and
+    throttle_delay_seconds (time requests waited for the rate limiter)"""
+    with _LOCK_:
+        return {service: dict(metrics) for service, metrics in _METRICS_.items()}
+
+
+def reset_metrics() -> None:
+    with _LOCK_:
+        _METRICS_.clear()
+
+
+def report_metrics(logger: Log = None) -> Dict[str, Dict]:
+    """log the metrics of the services that were retried, throttled or rate limited"""
+    metrics = get_metrics()
+    for service, each_metrics in sorted(metrics.items()):
+        if each_metrics.get("retries") or each_metrics.get("throttles") or each_metrics.get("throttle_delay_seconds"):
+            _common_.info_logger(f"aws {service}: {each_metrics.get('calls')} calls, {each_metrics.get('retries')} retries, "
+                                 f"{each_metrics.get('throttles')} throttled, "
+                                 f"{each_metrics.get('throttle_delay_seconds'):.1f}s rate limited", logger=logger)
+    return metrics
+
+
+atexit.register(report_metrics)
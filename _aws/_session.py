@@ -0,0 +1,13 @@
+def install() -> None:
+
+    """adaptive retry, per service rate limiting and the describe cache for every aws call of the process
+
+    a client keeps the event handlers its session had when it was created, so the deploy entry points call it
+    before importing the modules creating clients at import (iam_role, _api_gateway, ...). installing again is
+    a no-op, see _retry.install and _describe_cache.install
+
+    """
+    from _aws import _retry, _describe_cache
+
+    _retry.install()
+    _describe_cache.install()
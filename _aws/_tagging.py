@@ -0,0 +1,188 @@
+from typing import List, Dict, Union
+from datetime import datetime, timezone
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+import boto3
+
+
+_PROJECT_TAG_KEY_ = "pg_auto_project_name"
+_MANAGED_BY_TAG_KEY_ = "pg_auto_managed_by"
+_CREATED_AT_TAG_KEY_ = "pg_auto_created_at"
+_MANAGED_BY_ = "pg_aws_deployment"
+
+# tag_resources accepts at most 20 arns per call
+_TAG_BATCH_SIZE_ = 20
+
+
+def project_tags(project_name: str) -> Dict[str, str]:
+    """the tags every resource created for a project carries
+
+    Args:
+        project_name: project name
+
+    Returns:
+        tag key -> tag value
+
+    """
+    return {
+        _PROJECT_TAG_KEY_: project_name,
+        _MANAGED_BY_TAG_KEY_: _MANAGED_BY_,
+        _CREATED_AT_TAG_KEY_: datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    }
+
+
+def to_tag_list(tags: Dict[str, str]) -> List[Dict[str, str]]:
+    """convert tags to the [{"Key": ..., "Value": ...}] shape used by ec2, ecr and iam"""
+    return [{"Key": _key, "Value": _value} for _key, _value in (tags or {}).items()]
+
+
+def get_created_at(tags: Dict[str, str]) -> Union[datetime, None]:
+    """creation time recorded in the tags, None if the resource predates tagging"""
+    if not (created_at := (tags or {}).get(_CREATED_AT_TAG_KEY_)):
+        return None
+    try:
+        return datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+@_common_.aws_client_handle_exceptions()
+def get_resources_by_tag(tag_key: str = _PROJECT_TAG_KEY_,
+                         tag_values: List[str] = None,
+                         resource_type_filters: List[str] = None,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> List[Dict]:
+    """list all tagged resources of a region in bulk through the resource groups tagging api
+
+    Args:
+        tag_key: tag key the resources need to carry
+        tag_values: restrict to these tag values, any value if empty
+        resource_type_filters: restrict to resource types, e.g. ["ec2:instance", "lambda:function"]
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        list of {"ResourceARN": ..., "Tags": {key: value}}
+
+    """
+    tagging_client = boto3.client('resourcegroupstaggingapi', region_name=aws_region)
+
+    _tag_filter = {"Key": tag_key}
+    if tag_values:
+        _tag_filter["Values"] = tag_values
+    _parameters = {
+        "TagFilters": [_tag_filter],
+        "ResourcesPerPage": 100
+    }
+    if resource_type_filters:
+        _parameters["ResourceTypeFilters"] = resource_type_filters
+
+    paginator = tagging_client.get_paginator("get_resources")
+    return [{"ResourceARN": each_resource.get("ResourceARN"),
+             "Tags": {each_tag.get("Key"): each_tag.get("Value") for each_tag in each_resource.get("Tags", [])}}
+            for page in paginator.paginate(**_parameters)
+            for each_resource in page.get("ResourceTagMappingList", [])]
+
+
+def group_by_project(resources: List[Dict]) -> Dict[str, List[Dict]]:
+    """group the output of get_resources_by_tag by project name"""
+    projects = {}
+    for each_resource in resources:
+        projects.setdefault(each_resource.get("Tags", {}).get(_PROJECT_TAG_KEY_), []).append(each_resource)
+    return projects
+
+
+@_common_.aws_client_handle_exceptions()
+def tag_resources(resource_arns: List[str],
+                  tags: Dict[str, str],
+                  aws_region: str = "us-east-1",
+                  logger: Log = None
+                  ) -> List[str]:
+    """tag existing resources in bulk, e.g. resources created before tagging was introduced
+
+    Args:
+        resource_arns: arns of the resources
+        tags: tag key -> tag value
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        arns that could not be tagged
+
+    """
+    tagging_client = boto3.client('resourcegroupstaggingapi', region_name=aws_region)
+
+    failed = []
+    for _index in range(0, len(resource_arns), _TAG_BATCH_SIZE_):
+        response = tagging_client.tag_resources(ResourceARNList=resource_arns[_index: _index + _TAG_BATCH_SIZE_],
+                                                Tags=tags)
+        if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"operation failed, reason response code is not 200",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+        failed.extend(response.get("FailedResourcesMap", {}).keys())
+
+    if failed:
+        _common_.info_logger(f"unable to tag {failed}", logger=logger)
+    return failed
+
+
+@_common_.aws_client_handle_exceptions()
+def get_iam_roles_by_tag(tag_key: str = _PROJECT_TAG_KEY_,
+                         iam_role_name_prefixes: List[str] = None,
+                         logger: Log = None
+                         ) -> List[Dict]:
+    """iam is global and not covered by the resource groups tagging api, roles are listed with pagination
+    and only the candidates matching the name prefixes have their tags read
+
+    Args:
+        tag_key: tag key the roles need to carry
+        iam_role_name_prefixes: only roles starting with one of these prefixes are inspected
+        logger: logger object
+
+    Returns:
+        list of {"ResourceARN": ..., "RoleName": ..., "Tags": {key: value}}
+
+    """
+    iam_client = boto3.client('iam')
+
+    roles = []
+    paginator = iam_client.get_paginator("list_roles")
+    for page in paginator.paginate():
+        for each_role in page.get("Roles", []):
+            if iam_role_name_prefixes and not each_role.get("RoleName", "").startswith(tuple(iam_role_name_prefixes)):
+                continue
+            _tags = {each_tag.get("Key"): each_tag.get("Value")
+                     for each_tag in iam_client.list_role_tags(RoleName=each_role.get("RoleName")).get("Tags", [])}
+            if tag_key in _tags:
+                roles.append({"ResourceARN": each_role.get("Arn"), "RoleName": each_role.get("RoleName"), "Tags": _tags})
+    return roles
+
+
+@_common_.aws_client_handle_exceptions()
+def get_auto_scaling_groups_by_tag(tag_key: str = _PROJECT_TAG_KEY_,
+                                   aws_region: str = "us-east-1",
+                                   logger: Log = None
+                                   ) -> List[Dict]:
+    """auto scaling groups are filtered by tag key on the autoscaling api itself
+
+    Args:
+        tag_key: tag key the groups need to carry
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        list of {"ResourceARN": ..., "Tags": {key: value}}
+
+    """
+    autoscaling_client = boto3.client('autoscaling', region_name=aws_region)
+
+    paginator = autoscaling_client.get_paginator("describe_auto_scaling_groups")
+    return [{"ResourceARN": each_group.get("AutoScalingGroupARN"),
+             "Tags": {each_tag.get("Key"): each_tag.get("Value") for each_tag in each_group.get("Tags", [])}}
+            for page in paginator.paginate(Filters=[{"Name": "tag-key", "Values": [tag_key]}])
+            for each_group in page.get("AutoScalingGroups", [])]
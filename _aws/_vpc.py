@@ -0,0 +1,551 @@
+from typing import List, Union, Dict
+import boto3
+from time import sleep, monotonic
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_WAIT_TIME_ = 5
+_WAIT_TIMEOUT_ = 600
+
+# tag telling the public and private subnets and route tables of a project vpc apart
+_TIER_TAG_KEY_ = "pg_auto_subnet_tier"
+
+
+def _tag_specifications(resource_type: str, name: str, tags: Dict[str, str] = None, tier: str = None) -> List[Dict]:
+    from _aws import _tagging
+
+    _tags = {"Name": name, **(tags or {})}
+    if tier:
+        _tags[_TIER_TAG_KEY_] = tier
+    return [{"ResourceType": resource_type, "Tags": _tagging.to_tag_list(_tags)}]
+
+
+@_common_.aws_client_handle_exceptions()
+def find_vpc_by_tag(tag_key: str,
+                    tag_value: str,
+                    aws_region: str = "us-east-1",
+                    logger: Log = None
+                    ) -> Union[Dict, None]:
+    """find the vpc carrying a tag
+
+    Args:
+        tag_key: tag key, e.g. pg_auto_project_name
+        tag_value: tag value
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the vpc description, None if there is no such vpc
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.describe_vpcs(Filters=[{"Name": f"tag:{tag_key}", "Values": [tag_value]}])
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("Vpcs", [])), None)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_vpc(cidr_block: str,
+               vpc_name: str,
+               tags: Dict[str, str] = None,
+               aws_region: str = "us-east-1",
+               logger: Log = None
+               ) -> str:
+    """create a vpc with dns support and dns hostnames, both are needed for the private dns names of interface
+    endpoints
+
+    Args:
+        cidr_block: ipv4 cidr block, e.g. 10.0.0.0/16
+        vpc_name: Name tag of the vpc
+        tags: tags of the vpc
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the vpc id
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "CidrBlock": cidr_block,
+        "TagSpecifications": _tag_specifications("vpc", vpc_name, tags)
+    }
+    response = ec2_client.create_vpc(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    vpc_id = response.get("Vpc", {}).get("VpcId")
+    ec2_client.get_waiter("vpc_available").wait(VpcIds=[vpc_id])
+    # only one attribute can be modified per call
+    ec2_client.modify_vpc_attribute(VpcId=vpc_id, EnableDnsSupport={"Value": True})
+    ec2_client.modify_vpc_attribute(VpcId=vpc_id, EnableDnsHostnames={"Value": True})
+    _common_.info_logger(f"created vpc {vpc_name} {vpc_id} ({cidr_block})")
+    return vpc_id
+
+
+@_common_.aws_client_handle_exceptions()
+def get_availability_zones(aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> List[str]:
+    """names of the available availability zones of the region, local and wavelength zones excluded
+
+    Args:
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        sorted availability zone names
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "Filters": [
+            {"Name": "state", "Values": ["available"]},
+            {"Name": "zone-type", "Values": ["availability-zone"]}
+        ]
+    }
+    response = ec2_client.describe_availability_zones(**_parameters)
+    return sorted(each_zone.get("ZoneName") for each_zone in response.get("AvailabilityZones", []))
+
+
+@_common_.aws_client_handle_exceptions()
+def get_subnets(vpc_id: str,
+                aws_region: str = "us-east-1",
+                logger: Log = None
+                ) -> List[Dict]:
+    """list the subnets of a vpc
+
+    Args:
+        vpc_id: vpc id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        {"SubnetId", "CidrBlock", "AvailabilityZone", "Tier"} per subnet, Tier is public or private for subnets
+        created by create_subnet
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    paginator = ec2_client.get_paginator("describe_subnets")
+    return [{"SubnetId": each_subnet.get("SubnetId"),
+             "CidrBlock": each_subnet.get("CidrBlock"),
+             "AvailabilityZone": each_subnet.get("AvailabilityZone"),
+             "Tier": next((each_tag.get("Value") for each_tag in each_subnet.get("Tags", [])
+                           if each_tag.get("Key") == _TIER_TAG_KEY_), None)}
+            for page in paginator.paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+            for each_subnet in page.get("Subnets", [])]
+
+
+@_common_.aws_client_handle_exceptions()
+def create_subnet(vpc_id: str,
+                  cidr_block: str,
+                  availability_zone: str,
+                  subnet_name: str,
+                  tier: str,
+                  tags: Dict[str, str] = None,
+                  aws_region: str = "us-east-1",
+                  logger: Log = None
+                  ) -> str:
+    """create a subnet, instances in a public subnet get a public ip address
+
+    Args:
+        vpc_id: vpc id
+        cidr_block: ipv4 cidr block within the vpc
+        availability_zone: availability zone
+        subnet_name: Name tag of the subnet
+        tier: public or private
+        tags: tags of the subnet
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the subnet id
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "VpcId": vpc_id,
+        "CidrBlock": cidr_block,
+        "AvailabilityZone": availability_zone,
+        "TagSpecifications": _tag_specifications("subnet", subnet_name, tags, tier)
+    }
+    response = ec2_client.create_subnet(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    subnet_id = response.get("Subnet", {}).get("SubnetId")
+    if tier == "public":
+        ec2_client.modify_subnet_attribute(SubnetId=subnet_id, MapPublicIpOnLaunch={"Value": True})
+    _common_.info_logger(f"created {tier} subnet {subnet_id} ({cidr_block}) in {availability_zone}")
+    return subnet_id
+
+
+@_common_.aws_client_handle_exceptions()
+def get_internet_gateway(vpc_id: str,
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> Union[str, None]:
+    """id of the internet gateway attached to the vpc, None if there is none"""
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.describe_internet_gateways(Filters=[{"Name": "attachment.vpc-id", "Values": [vpc_id]}])
+    return next((each_gateway.get("InternetGatewayId") for each_gateway in response.get("InternetGateways", [])), None)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_internet_gateway(vpc_id: str,
+                            gateway_name: str,
+                            tags: Dict[str, str] = None,
+                            aws_region: str = "us-east-1",
+                            logger: Log = None
+                            ) -> str:
+    """create an internet gateway and attach it to the vpc
+
+    Args:
+        vpc_id: vpc id
+        gateway_name: Name tag of the internet gateway
+        tags: tags of the internet gateway
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the internet gateway id
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.create_internet_gateway(TagSpecifications=_tag_specifications("internet-gateway",
+                                                                                          gateway_name,
+                                                                                          tags))
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    gateway_id = response.get("InternetGateway", {}).get("InternetGatewayId")
+    ec2_client.attach_internet_gateway(InternetGatewayId=gateway_id, VpcId=vpc_id)
+    _common_.info_logger(f"created internet gateway {gateway_id} for {vpc_id}")
+    return gateway_id
+
+
+@_common_.aws_client_handle_exceptions()
+def get_route_tables(vpc_id: str,
+                     aws_region: str = "us-east-1",
+                     logger: Log = None
+                     ) -> List[Dict]:
+    """list the route tables of a vpc
+
+    Args:
+        vpc_id: vpc id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        {"RouteTableId", "Main", "SubnetIds", "Tier"} per route table
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    paginator = ec2_client.get_paginator("describe_route_tables")
+    return [{"RouteTableId": each_table.get("RouteTableId"),
+             "Main": any(each_association.get("Main") for each_association in each_table.get("Associations", [])),
+             "SubnetIds": [each_association.get("SubnetId") for each_association in each_table.get("Associations", [])
+                           if each_association.get("SubnetId")],
+             "Tier": next((each_tag.get("Value") for each_tag in each_table.get("Tags", [])
+                           if each_tag.get("Key") == _TIER_TAG_KEY_), None)}
+            for page in paginator.paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+            for each_table in page.get("RouteTables", [])]
+
+
+@_common_.aws_client_handle_exceptions()
+def create_route_table(vpc_id: str,
+                       route_table_name: str,
+                       tier: str,
+                       internet_gateway_id: str = None,
+                       tags: Dict[str, str] = None,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> str:
+    """create a route table, a public one routes 0.0.0.0/0 to the internet gateway
+
+    Args:
+        vpc_id: vpc id
+        route_table_name: Name tag of the route table
+        tier: public or private
+        internet_gateway_id: internet gateway id, required for a public route table
+        tags: tags of the route table
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the route table id
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "VpcId": vpc_id,
+        "TagSpecifications": _tag_specifications("route-table", route_table_name, tags, tier)
+    }
+    response = ec2_client.create_route_table(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    route_table_id = response.get("RouteTable", {}).get("RouteTableId")
+    if internet_gateway_id:
+        ec2_client.create_route(RouteTableId=route_table_id,
+                                DestinationCidrBlock="0.0.0.0/0",
+                                GatewayId=internet_gateway_id)
+    _common_.info_logger(f"created {tier} route table {route_table_id}")
+    return route_table_id
+
+
+@_common_.aws_client_handle_exceptions()
+def associate_route_table(route_table_id: str,
+                          subnet_ids: List[str],
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """associate subnets with a route table
+
+    Args:
+        route_table_id: route table id
+        subnet_ids: subnet ids
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    for each_subnet_id in subnet_ids:
+        ec2_client.associate_route_table(RouteTableId=route_table_id, SubnetId=each_subnet_id)
+    _common_.info_logger(f"associated {subnet_ids} with route table {route_table_id}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def get_vpc_endpoints(vpc_id: str,
+                      aws_region: str = "us-east-1",
+                      logger: Log = None
+                      ) -> Dict[str, Dict]:
+    """vpc endpoints of a vpc that are not being deleted
+
+    Args:
+        vpc_id: vpc id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        service name -> {"VpcEndpointId", "VpcEndpointType", "State"}
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    paginator = ec2_client.get_paginator("describe_vpc_endpoints")
+    return {each_endpoint.get("ServiceName"): {"VpcEndpointId": each_endpoint.get("VpcEndpointId"),
+                                               "VpcEndpointType": each_endpoint.get("VpcEndpointType"),
+                                               "State": each_endpoint.get("State", "").lower()}
+            for page in paginator.paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+            for each_endpoint in page.get("VpcEndpoints", [])
+            if each_endpoint.get("State", "").lower() not in ("deleting", "deleted")}
+
+
+@_common_.aws_client_handle_exceptions()
+def create_vpc_endpoint(vpc_id: str,
+                        service_name: str,
+                        endpoint_type: str,
+                        subnet_ids: List[str] = None,
+                        security_group_ids: List[str] = None,
+                        route_table_ids: List[str] = None,
+                        tags: Dict[str, str] = None,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> str:
+    """create an interface endpoint (one network interface per subnet, private dns enabled) or a gateway endpoint
+    (a route in every route table)
+
+    Args:
+        vpc_id: vpc id
+        service_name: service name, e.g. com.amazonaws.us-east-1.ecr.dkr
+        endpoint_type: Interface or Gateway
+        subnet_ids: subnets of an interface endpoint, at most one per availability zone
+        security_group_ids: security groups of an interface endpoint, need to allow https from the vpc
+        route_table_ids: route tables of a gateway endpoint
+        tags: tags of the endpoint
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the vpc endpoint id
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "VpcId": vpc_id,
+        "ServiceName": service_name,
+        "VpcEndpointType": endpoint_type,
+        "TagSpecifications": _tag_specifications("vpc-endpoint", service_name.split(".", 3)[-1], tags)
+    }
+    if endpoint_type == "Interface":
+        _parameters.update({"SubnetIds": subnet_ids,
+                            "SecurityGroupIds": security_group_ids,
+                            "PrivateDnsEnabled": True})
+    else:
+        _parameters["RouteTableIds"] = route_table_ids
+
+    response = ec2_client.create_vpc_endpoint(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    endpoint_id = response.get("VpcEndpoint", {}).get("VpcEndpointId")
+    _common_.info_logger(f"created {endpoint_type.lower()} endpoint {endpoint_id} for {service_name}")
+    return endpoint_id
+
+
+@_common_.aws_client_handle_exceptions()
+def wait_for_vpc_endpoints(vpc_id: str,
+                           endpoint_ids: List[str],
+                           deleted: bool = False,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> bool:
+    """wait until the endpoints are available, or gone if deleted, there is no waiter for vpc endpoints
+
+    Args:
+        vpc_id: vpc id
+        endpoint_ids: vpc endpoint ids
+        deleted: wait for the endpoints to be deleted instead
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True once all endpoints reached the state, False after _WAIT_TIMEOUT_ seconds
+
+    """
+    deadline = monotonic() + _WAIT_TIMEOUT_
+    while True:
+        _states = {each_endpoint.get("VpcEndpointId"): each_endpoint.get("State")
+                   for each_endpoint in (get_vpc_endpoints(vpc_id, aws_region=aws_region) or {}).values()}
+        if deleted:
+            _pending = [each_id for each_id in endpoint_ids if each_id in _states]
+        else:
+            _pending = [each_id for each_id in endpoint_ids if _states.get(each_id) != "available"]
+        if not _pending:
+            return True
+        if monotonic() > deadline:
+            _common_.info_logger(f"vpc endpoints {_pending} are still {[_states.get(each_id) for each_id in _pending]} "
+                                 f"after {_WAIT_TIMEOUT_} seconds")
+            return False
+        sleep(_WAIT_TIME_)
+
+
+@_common_.aws_client_handle_exceptions("InvalidVpcEndpointId.NotFound")
+def delete_vpc_endpoints(endpoint_ids: List[str],
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> bool:
+    """delete vpc endpoints with a single call
+
+    Args:
+        endpoint_ids: vpc endpoint ids
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    if isinstance(endpoint_ids, str): endpoint_ids = [endpoint_ids]
+    response = ec2_client.delete_vpc_endpoints(VpcEndpointIds=endpoint_ids)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200 or response.get("Unsuccessful"):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, {response.get('Unsuccessful')}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"deleted vpc endpoints {endpoint_ids}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions("InvalidVpcID.NotFound")
+def delete_vpc(vpc_id: str,
+               aws_region: str = "us-east-1",
+               logger: Log = None
+               ) -> bool:
+    """delete a vpc together with its endpoints, subnets, route tables, internet gateway and security groups,
+    instances and load balancers in the vpc need to be gone
+
+    Args:
+        vpc_id: vpc id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    # endpoint network interfaces keep the subnets and security groups in use until the endpoints are gone
+    if endpoint_ids := [each_endpoint.get("VpcEndpointId")
+                        for each_endpoint in (get_vpc_endpoints(vpc_id, aws_region=aws_region) or {}).values()]:
+        delete_vpc_endpoints(endpoint_ids, aws_region=aws_region)
+        wait_for_vpc_endpoints(vpc_id, endpoint_ids, deleted=True, aws_region=aws_region)
+
+    for each_subnet in get_subnets(vpc_id, aws_region=aws_region) or []:
+        ec2_client.delete_subnet(SubnetId=each_subnet.get("SubnetId"))
+    for each_table in get_route_tables(vpc_id, aws_region=aws_region) or []:
+        if not each_table.get("Main"):
+            ec2_client.delete_route_table(RouteTableId=each_table.get("RouteTableId"))
+    if gateway_id := get_internet_gateway(vpc_id, aws_region=aws_region):
+        ec2_client.detach_internet_gateway(InternetGatewayId=gateway_id, VpcId=vpc_id)
+        ec2_client.delete_internet_gateway(InternetGatewayId=gateway_id)
+    for each_group in ec2_client.describe_security_groups(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}]).get("SecurityGroups", []):
+        if each_group.get("GroupName") != "default":
+            ec2_client.delete_security_group(GroupId=each_group.get("GroupId"))
+
+    response = ec2_client.delete_vpc(VpcId=vpc_id)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"deleted vpc {vpc_id}")
+    return True
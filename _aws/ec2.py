@@ -1,7 +1,8 @@
-from typing import List, Union, Dict, Optional
+from typing import List, Union, Dict, Optional, Tuple
 import boto3
 from botocore.exceptions import ClientError
-from time import sleep
+from time import sleep, monotonic, time
+from threading import RLock
 from logging import Logger as Log
 from inspect import currentframe
 from _common import _common as _common_
@@ -11,36 +12,161 @@ from _util import _util_common as _util_common_
 
 __WAIT_TIME__ = 10
 
+_FLEET_POLL_INTERVAL_ = 2
+_FLEET_MAX_POLL_INTERVAL_ = 15
+_FLEET_WAIT_TIMEOUT_ = 900
+# describe_instance_status accepts at most 100 instance ids per call
+_FLEET_BATCH_SIZE_ = 100
+_AMI_CACHE_FILEPATH_ = "pg_auto_ami_cache.json"
+_AMI_CACHE_TTL_ = 86400
+_AMI_CACHE_ = {}
+_AMI_CACHE_LOCK_ = RLock()
+
+# public parameters holding the latest amazon linux image id of every region
+_AMI_SSM_PARAMETERS_ = {
+    ("al2", "x86_64"): "/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2",
+    ("al2", "arm64"): "/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-arm64-gp2",
+    ("al2023", "x86_64"): "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-default-x86_64",
+    ("al2023", "arm64"): "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-default-arm64",
+}
+_AMI_NAME_PATTERNS_ = {
+    "al2": "amzn2-ami-hvm-*-{kernel_arch}-gp2",
+    "al2023": "al2023-ami-2023.*-kernel-*-{kernel_arch}",
+}
+
+# states an instance can not recover from while waiting for the target state
+_FLEET_FAILED_STATES_ = {
+    "running": ("shutting-down", "terminated", "stopping", "stopped"),
+    "status_ok": ("shutting-down", "terminated", "stopping", "stopped"),
+    "stopped": ("shutting-down", "terminated"),
+}
+
+
+def _ami_cache_get(cache_key: str, cache_ttl: int) -> Union[str, None]:
+    # the disk cache is loaded once per process, entries older than the ttl are ignored
+    from _util import _util_file as _util_file_
+
+    if not _AMI_CACHE_ and _util_file_.is_file_exist(_AMI_CACHE_FILEPATH_):
+        _AMI_CACHE_.update(_util_file_.json_load(_AMI_CACHE_FILEPATH_) or {})
+    if (entry := _AMI_CACHE_.get(cache_key)) and time() - entry.get("resolved_at", 0) < cache_ttl:
+        return entry.get("image_id")
+    return None
+
+
+def _ami_cache_put(cache_key: str, image_id: str) -> None:
+    from _util import _util_file as _util_file_
+
+    _AMI_CACHE_[cache_key] = {"image_id": image_id, "resolved_at": time()}
+    _util_file_.json_dump(_AMI_CACHE_FILEPATH_, _AMI_CACHE_)
+
+
+def _find_image_from_ssm(parameter_name: str, aws_region: str) -> Union[str, None]:
+    ssm_client = boto3.client('ssm', region_name=aws_region)
+    try:
+        return ssm_client.get_parameter(Name=parameter_name).get("Parameter", {}).get("Value")
+    except ClientError as err:
+        # e.g. no ssm:GetParameter permission, the images are described instead
+        _common_.info_logger(f"unable to read {parameter_name}: {err.response.get('Error', {}).get('Code')}")
+        return None
+
+
+def _find_image_from_describe(name_pattern: str,
+                              kernel_arch: str,
+                              aws_region: str
+                              ) -> Union[str, None]:
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "Owners": ["amazon"],
+        "Filters": [
+            {"Name": "name", "Values": [name_pattern]},
+            {"Name": "architecture", "Values": [kernel_arch]},
+            {"Name": "root-device-type", "Values": ["ebs"]},
+            {"Name": "virtualization-type", "Values": ["hvm"]},
+            {"Name": "state", "Values": ["available"]}
+        ]
+    }
+    # keep only the newest image while paging instead of sorting the whole listing
+    latest = None
+    for page in ec2_client.get_paginator("describe_images").paginate(**_parameters):
+        for each_image in page.get("Images", []):
+            if latest is None or each_image.get("CreationDate") > latest.get("CreationDate"):
+                latest = each_image
+    return latest.get("ImageId") if latest else None
+
 
 def find_image(aws_region: str,
                kernel_arch: str = "x86_64",
+               os_version: str = "al2",
+               cache_ttl: int = _AMI_CACHE_TTL_,
                logger: Log = None
                ) -> Union[str, None]:
 
-    """obtain aws linux 2 image id in the specified region
+    """obtain the latest amazon linux image id in the specified region
+
+    the id is read from the public ssm parameter published by aws, if that is not possible the matching images
+    are described (filtered and paginated), the result is cached per region in memory and on disk so every
+    deploy within the ttl uses the same image
 
     Args:
         aws_region: aws region
         kernel_arch: kernel architecture, x86_64 for x86_64 architecture (default) or arm64 for ARM64 architecture
+        os_version: al2 for amazon linux 2 (default) or al2023 for amazon linux 2023
+        cache_ttl: seconds a resolved image id is reused, 0 to always resolve
         logger: logger
 
     Returns:
         return image id if successful, None otherwise
 
     """
+    if (os_version, kernel_arch) not in _AMI_SSM_PARAMETERS_:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"{os_version} on {kernel_arch} is not supported, use one of {list(_AMI_SSM_PARAMETERS_)}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    cache_key = f"{aws_region}/{os_version}/{kernel_arch}"
+    with _AMI_CACHE_LOCK_:
+        if image_id := _ami_cache_get(cache_key, cache_ttl):
+            return image_id
+
+        image_id = _find_image_from_ssm(_AMI_SSM_PARAMETERS_.get((os_version, kernel_arch)), aws_region) or \
+            _find_image_from_describe(_AMI_NAME_PATTERNS_.get(os_version).format(kernel_arch=kernel_arch),
+                                      kernel_arch,
+                                      aws_region)
+        if image_id:
+            _ami_cache_put(cache_key, image_id)
+            _common_.info_logger(f"resolved {os_version} {kernel_arch} image in {aws_region}: {image_id}", logger=logger)
+        return image_id
+
+
+@_common_.aws_client_handle_exceptions()
+def find_images_by_tag(tag_key: str,
+                       tag_value: str,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> List[Dict]:
+    """find the images owned by this account carrying the tag, newest first
+
+    Args:
+        tag_key: tag key
+        tag_value: tag value
+        aws_region: aws region
+        logger: logger
 
+    Returns:
+        list of {"ImageId": ..., "Name": ..., "State": ..., "CreationDate": ..., "Tags": {key: value}}
+
+    """
     # initialize the boto3 client for ec2
     ec2_client = boto3.client('ec2', region_name=aws_region)
 
-    # Describe images with the specified filters
-    # 'amzn2-ami-hvm-*-arm64-gp2' for ARM64 architecture
-    response = ec2_client.describe_images(
-        Owners=['amazon'],
-        Filters=[
-            {'Name': 'name', 'Values': [f"amzn2-ami-hvm-*-{kernel_arch}-gp2"]},
-            {'Name': 'state', 'Values': ['available']}
-        ]
-    )
+    _parameters = {
+        "Owners": ["self"],
+        "Filters": [{"Name": f"tag:{tag_key}", "Values": [tag_value]}]
+    }
+    response = ec2_client.describe_images(**_parameters)
     if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
         _common_.error_logger(currentframe().f_code.co_name,
                               f"operation failed, reason response code is not 200",
@@ -48,11 +174,204 @@ def find_image(aws_region: str,
                               mode="error",
                               ignore_flag=False)
 
-    image = sorted(response['Images'], key=lambda x: x['CreationDate'], reverse=True)
-    if len(image) > 0:
-        return image[0].get("ImageId")
-    else:
-        return None
+    images = [{"ImageId": each_image.get("ImageId"),
+               "Name": each_image.get("Name"),
+               "State": each_image.get("State"),
+               "CreationDate": each_image.get("CreationDate"),
+               "Tags": {each_tag.get("Key"): each_tag.get("Value") for each_tag in each_image.get("Tags", [])}}
+              for each_image in response.get("Images", [])]
+    return sorted(images, key=lambda x: x.get("CreationDate"), reverse=True)
+
+
+@_common_.aws_client_handle_exceptions()
+def create_image(instance_id: str,
+                 image_name: str,
+                 image_description: str = "",
+                 tags: Dict[str, str] = None,
+                 aws_region: str = "us-east-1",
+                 logger: Log = None
+                 ) -> Union[str, None]:
+    """create an image from an instance, the instance is expected to be stopped so no reboot is needed
+
+    Args:
+        instance_id: instance id
+        image_name: image name, unique within the account and region
+        image_description: image description
+        tags: tags of the image
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        the image id
+
+    """
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "InstanceId": instance_id,
+        "Name": image_name,
+        "Description": image_description,
+        "NoReboot": True
+    }
+    if tags:
+        from _aws import _tagging
+        _parameters["TagSpecifications"] = [{"ResourceType": "image", "Tags": _tagging.to_tag_list(tags)}]
+
+    response = ec2_client.create_image(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"image {image_name} ({response.get('ImageId')}) is being created from {instance_id}")
+    return response.get("ImageId")
+
+
+@_common_.aws_client_handle_exceptions()
+def wait_for_image_available(image_id: str,
+                             timeout: int = _FLEET_WAIT_TIMEOUT_,
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> bool:
+    """wait until the image is available
+
+    Args:
+        image_id: image id
+        timeout: timeout in seconds
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        True once the image is available
+
+    """
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    waiter = ec2_client.get_waiter('image_available')
+    waiter.wait(ImageIds=[image_id],
+                WaiterConfig={"Delay": _FLEET_MAX_POLL_INTERVAL_, "MaxAttempts": timeout // _FLEET_MAX_POLL_INTERVAL_})
+    _common_.info_logger(f"image {image_id} is available")
+    return True
+
+
+@_common_.aws_client_handle_exceptions("InvalidAMIID.NotFound")
+def deregister_image(image_id: str,
+                     aws_region: str = "us-east-1",
+                     logger: Log = None
+                     ) -> bool:
+    """deregister an image owned by this account and delete its snapshots
+
+    Args:
+        image_id: image id
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        True if the operation is successful
+
+    """
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.describe_images(ImageIds=[image_id])
+    snapshot_ids = [each_mapping.get("Ebs", {}).get("SnapshotId")
+                    for each_image in response.get("Images", [])
+                    for each_mapping in each_image.get("BlockDeviceMappings", [])
+                    if each_mapping.get("Ebs", {}).get("SnapshotId")]
+
+    response = ec2_client.deregister_image(ImageId=image_id)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    for snapshot_id in snapshot_ids:
+        ec2_client.delete_snapshot(SnapshotId=snapshot_id)
+    _common_.info_logger(f"image {image_id} and snapshot(s) {snapshot_ids} are deleted")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def launch_instance(image_id: str,
+                    instance_type: str,
+                    subnet_id: str,
+                    security_group_ids: Union[str, List],
+                    instance_name: str,
+                    iam_instance_role: str = "",
+                    user_data: str = "",
+                    tags: Dict[str, str] = None,
+                    aws_region: str = "us-east-1",
+                    logger: Log = None
+                    ) -> Union[str, None]:
+    """launch a single on-demand instance outside of the launch template, e.g. an image builder, a shutdown
+    from inside the instance stops it
+
+    Args:
+        image_id: image id
+        instance_type: instance type
+        subnet_id: subnet id
+        security_group_ids: security group
+        instance_name: instance name
+        iam_instance_role: instance profile name
+        user_data: user data plain text
+        tags: tags of the instance and its volumes
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        the instance id
+
+    """
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    if isinstance(security_group_ids, str):
+        security_group_ids = [security_group_ids]
+
+    from _aws import _tagging
+    _tags = _tagging.to_tag_list(tags)
+    _parameters = {
+        "ImageId": image_id,
+        "InstanceType": instance_type,
+        "MinCount": 1,
+        "MaxCount": 1,
+        "NetworkInterfaces": [
+            {
+                "AssociatePublicIpAddress": True,
+                "DeviceIndex": 0,
+                "SubnetId": subnet_id,
+                "Groups": security_group_ids,
+            },
+        ],
+        "InstanceInitiatedShutdownBehavior": "stop",
+        "UserData": user_data,
+        "TagSpecifications": [
+            {"ResourceType": "instance", "Tags": [{"Key": "Name", "Value": instance_name}] + _tags},
+            {"ResourceType": "volume", "Tags": _tags},
+        ] if _tags else [{"ResourceType": "instance", "Tags": [{"Key": "Name", "Value": instance_name}]}]
+    }
+    if iam_instance_role:
+        _parameters["IamInstanceProfile"] = {"Name": iam_instance_role}
+
+    # a new instance profile is reported as invalid until iam has propagated it
+    from _aws import iam_role
+    response = iam_role.retry_until_role_usable(lambda: ec2_client.run_instances(**_parameters), logger=logger)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    instance_id = response.get("Instances", [{}])[0].get("InstanceId")
+    _common_.info_logger(f"instance {instance_name} ({instance_id}) launched from {image_id}")
+    return instance_id
 
 
 @_common_.aws_client_handle_exceptions()
@@ -154,77 +473,6 @@ def find_instance_by_id(instance_id: str,
     return instances
 
 
-@_common_.aws_client_handle_exceptions()
-def run_ec2_from_template(launch_template_id: str,
-                          version: str = "$Latest",
-                          aws_region: str = "us-east-1",
-                          logger: Log = None
-                          ) -> List[str]:
-    """launch an ec2 instance from the specified launch template
-
-    Args:
-        launch_template_id: launch template id
-        aws_region: aws region
-        version: version, default to latest
-        logger: logger
-
-    Returns:
-        True if the instance is launched successfully, False otherwise
-
-    """
-    # initialize the boto3 client for ec2
-    ec2_client = boto3.client('ec2', region_name=aws_region)
-    _parameters = {
-        "LaunchTemplate": {
-            "LaunchTemplateId": launch_template_id,
-            "Version": version
-        },
-        # # "SubnetId": subnet_id,
-        # "NetworkInterfaces": [
-        #     {
-        #         "AssociatePublicIpAddress": False,
-        #         "SubnetId": subnet_id,
-        #         "Groups": ["sg-0cea0bd861446063b"],
-        #         "DeviceIndex": 0,
-        #     }],
-        "MinCount": 1,
-        "MaxCount": 1
-    }
-
-    _response = ec2_client.run_instances(**_parameters)
-    if _response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"not able to retrieve object",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
-    else:
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Waiting for instance {instance_id} to reach the 'running' state...")
-
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            waiter = ec2_client.get_waiter('instance_running')
-            waiter.wait(InstanceIds=[instance_id])
-
-            # Wait for the instance to pass both system and instance status checks
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Waiting for instance {instance_id} to pass all status checks...")
-
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            status_waiter = ec2_client.get_waiter('instance_status_ok')
-            status_waiter.wait(InstanceIds=[instance_id])
-
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Instance {instance_id} has passed all status checks and is fully operational.")
-
-        return [each_instance.get("InstanceId") for each_instance in _response.get("Instances", [])]
-
-
 @_common_.aws_client_handle_exceptions()
 def describe_ec2_get_spot_request(instance_id: str,
                                   aws_region: str = "us-east-1",
@@ -375,10 +623,10 @@ def terminate_spot_request_and_instances(spot_request_id: str,
         _common_.info_logger(f"No EC2 instance associated with Spot Request ID {spot_request_id}.")
         return False
 
-    # Terminate the associated EC2 instance
-    for instance_id in get_spot_request_associated_instance(spot_request_id, aws_region):
-        _common_.info_logger(f"Terminating Instance ID {instance_id} associated with Spot Request ID {spot_request_id}")
-        terminate_instance_and_wait(instance_id)
+    # Terminate the associated EC2 instances
+    if instance_ids := get_spot_request_associated_instance(spot_request_id, aws_region):
+        _common_.info_logger(f"Terminating Instance IDs {instance_ids} associated with Spot Request ID {spot_request_id}")
+        terminate_instances(instance_ids, aws_region=aws_region)
 
     # Cancel the spot instance request
     _parameter = {
@@ -428,6 +676,92 @@ def terminate_instance_and_wait(instance_id: str,
     return True
 
 
+@_common_.aws_client_handle_exceptions("InvalidInstanceID.NotFound")
+def terminate_instances(instance_ids: List[str],
+                        wait: bool = True,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None) -> bool:
+
+    """terminate instances with a single call and optionally one shared waiter
+
+    Args:
+        instance_ids: instance ids
+        wait: wait until every instance is terminated
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        return True if the instances were terminated successfully otherwise False
+
+    """
+    if not instance_ids:
+        return True
+
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _common_.info_logger(f"Terminating instances {instance_ids}...")
+    response = ec2_client.terminate_instances(InstanceIds=instance_ids)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    if wait:
+        waiter = ec2_client.get_waiter('instance_terminated')
+        waiter.wait(InstanceIds=instance_ids)
+        _common_.info_logger(f"Instances {instance_ids} have been successfully terminated.")
+    return True
+
+
+@_common_.aws_client_handle_exceptions("InvalidInstanceID.NotFound")
+def terminate_instances_and_spot_requests(instance_ids: List[str],
+                                          aws_region: str = "us-east-1",
+                                          logger: Log = None) -> bool:
+
+    """cancel the spot requests of the instances and terminate them, whatever the number of instances it takes
+    one describe, one cancel and one terminate call and a single shared waiter
+
+    Args:
+        instance_ids: instance ids, spot and on-demand
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        return True if the instances were terminated successfully otherwise False
+
+    """
+    if not instance_ids:
+        return True
+
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    # the spot requests are cancelled first so a persistent request does not launch a replacement
+    _parameters = {
+        "Filters": [
+            {"Name": "instance-id", "Values": instance_ids},
+            {"Name": "state", "Values": ["open", "active"]}
+        ]
+    }
+    spot_request_ids = [each_request.get("SpotInstanceRequestId")
+                        for page in ec2_client.get_paginator("describe_spot_instance_requests").paginate(**_parameters)
+                        for each_request in page.get("SpotInstanceRequests", [])]
+    if spot_request_ids:
+        response = ec2_client.cancel_spot_instance_requests(SpotInstanceRequestIds=spot_request_ids)
+        if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"operation failed, reason response code is not 200",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+        _common_.info_logger(f"Spot Request IDs {spot_request_ids} have been canceled.")
+
+    return terminate_instances(instance_ids, aws_region=aws_region, logger=logger)
+
+
 @_common_.aws_client_handle_exceptions("InvalidKeyPair.NotFound")
 def describe_key_pair(key_pair_name: str,
                       aws_region: str = "us-east-1",
@@ -495,10 +829,42 @@ def delete_key_pair(key_pair_name: str,
     return response.get("KeyPairId")
 
 
+@_common_.aws_client_handle_exceptions("InvalidKeyPair.NotFound")
+def delete_key_pair_by_id(key_pair_id: str,
+                          aws_region: str = "us-east-1",
+                          logger: Log = None
+                          ) -> bool:
+    """delete the specified key pair by its id, e.g. an id taken from a tagged resource arn
+
+    Args:
+        key_pair_id: The id of the key pair
+        aws_region: aws region
+        logger: log object
+
+    Returns:
+        true if the key pair is deleted
+
+    """
+    # initialize the boto3 client for ec2
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.delete_key_pair(KeyPairId=key_pair_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"Key pair '{key_pair_id}' deleted.")
+    return True
+
+
 @_common_.aws_client_handle_exceptions()
 def create_key_pair(aws_region: str,
                     key_name: str,
                     file_path: str,
+                    tags: Dict = None,
                     logger: Log = None
                     ):
 
@@ -506,7 +872,13 @@ def create_key_pair(aws_region: str,
     ec2_client = boto3.client('ec2', region_name=aws_region)
 
     # Create a key pair
-    response = ec2_client.create_key_pair(KeyName=key_name)
+    _parameters = {
+        "KeyName": key_name
+    }
+    if tags:
+        from _aws import _tagging
+        _parameters["TagSpecifications"] = [{"ResourceType": "key-pair", "Tags": _tagging.to_tag_list(tags)}]
+    response = ec2_client.create_key_pair(**_parameters)
 
     # Save the private key to a file
     with open(file_path, 'w') as file:
@@ -673,6 +1045,35 @@ def get_public_subnets(vpc_id: str,
     return list(public_subnets)
 
 
+@_common_.aws_client_handle_exceptions()
+def get_subnet_availability_zones(subnet_ids: List[str],
+                                  aws_region: str = "us-east-1",
+                                  logger: Log = None
+                                  ) -> Dict[str, str]:
+    """find the availability zone of each subnet
+
+    Args:
+        subnet_ids: subnet ids
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        subnet id -> availability zone
+
+    """
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.describe_subnets(SubnetIds=subnet_ids)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return {each_subnet.get("SubnetId"): each_subnet.get("AvailabilityZone") for each_subnet in response.get("Subnets", [])}
+
+
 @_common_.aws_client_handle_exceptions()
 def define_network(vpc_id: str = None,
                    aws_region: str = "us-east-1",
@@ -686,8 +1087,8 @@ def define_network(vpc_id: str = None,
         logger: logger
 
     Returns:
-        return the first public subnet in the specified VPC if found and if no vpc id is provided then search for all
-        vpcs and return the first public subnet found else None
+        return the first public subnet (and all public subnets) in the specified VPC if found and if no vpc id is
+        provided then search for all vpcs and return the first public subnet found else None
 
     """
     # initialize the boto3 ec2 client
@@ -709,7 +1110,8 @@ def define_network(vpc_id: str = None,
         if public_subnets := get_public_subnets(**_parameter):
             return {
                 "vpc_id": vpc_id,
-                "public_subnet": public_subnets[0]
+                "public_subnet": public_subnets[0],
+                "public_subnets": public_subnets
             }
         else:
             return None
@@ -725,7 +1127,8 @@ def define_network(vpc_id: str = None,
         if public_subnets := get_public_subnets(**_parameter):
             return {
                 "vpc_id": vpc_id,
-                "public_subnet": public_subnets[0]
+                "public_subnet": public_subnets[0],
+                "public_subnets": public_subnets
             }
 
     return None
@@ -854,10 +1257,44 @@ def get_security_groups_in_vpc(vpc_id: str,
             response.get("SecurityGroups", [])]
 
 
+@_common_.aws_client_handle_exceptions("InvalidGroup.NotFound")
+def get_security_group_network_interfaces(sg_id: str,
+                                          aws_region: str = "us-east-1",
+                                          logger: Log = None
+                                          ) -> List[str]:
+    """list the network interfaces still using the security group, it can only be deleted once this is empty
+
+    Args:
+        sg_id: security group id
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        list of network interface ids
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "Filters": [
+            {
+                "Name": "group-id",
+                "Values": [sg_id]
+            }
+        ]
+    }
+    paginator = ec2_client.get_paginator("describe_network_interfaces")
+    return [each_eni.get("NetworkInterfaceId")
+            for page in paginator.paginate(**_parameters)
+            for each_eni in page.get("NetworkInterfaces", [])]
+
+
 @_common_.aws_client_handle_exceptions()
 def create_security_group(sg_name: str,
                           vpc_id: str,
                           aws_region: str = "us-east-1",
+                          tags: Dict = None,
                           logger: Log = None
                           ) -> Union[None, str]:
     """create security group in aws
@@ -866,6 +1303,7 @@ def create_security_group(sg_name: str,
         sg_name: security group name
         vpc_id: vpc id
         aws_region: aws region
+        tags: tags of the security group, tag key -> tag value
         logger: logger
 
     Returns:
@@ -885,6 +1323,9 @@ def create_security_group(sg_name: str,
         "Description": description,
         "VpcId": vpc_id
     }
+    if tags:
+        from _aws import _tagging
+        _parameters["TagSpecifications"] = [{"ResourceType": "security-group", "Tags": _tagging.to_tag_list(tags)}]
     response = ec2_client.create_security_group(**_parameters)
 
     if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
@@ -936,6 +1377,132 @@ def create_sg_ingress_rules(sg_id: str,
     return True
 
 
+@_common_.aws_client_handle_exceptions("InvalidPermission.NotFound")
+def revoke_sg_ingress_rules(sg_id: str,
+                            sg_ingress_rules: List[Dict],
+                            aws_region: str = "us-east-1",
+                            logger: Log = None
+                            ) -> bool:
+    """Remove ingress rules from a security group.
+    Args:
+        aws_region: aws region
+        sg_id: security group id
+        sg_ingress_rules: list of ingress rules
+        logger: logger
+
+    Returns:
+        True if the rules were removed successfully otherwise False
+
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameter = {
+        "GroupId": sg_id,
+        "IpPermissions": sg_ingress_rules
+    }
+    response = ec2_client.revoke_security_group_ingress(**_parameter)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"Ingress rules removed from the security group {sg_id}")
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def get_security_group(sg_name: str,
+                       vpc_id: str,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> Union[None, Dict]:
+    """retrieve a security group with its rules by name
+
+    Args:
+        sg_name: security group name
+        vpc_id: vpc id
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        the security group (GroupId, IpPermissions, ...) if it exists else None
+
+    """
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "Filters": [
+            {"Name": "vpc-id", "Values": [vpc_id]},
+            {"Name": "group-name", "Values": [sg_name]}
+        ]
+    }
+    response = ec2_client.describe_security_groups(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("SecurityGroups", [])), None)
+
+
+# the sources of a rule, the key of each source entry and the key of its address
+_SG_RULE_SOURCES_ = (("IpRanges", "CidrIp"),
+                     ("Ipv6Ranges", "CidrIpv6"),
+                     ("UserIdGroupPairs", "GroupId"),
+                     ("PrefixListIds", "PrefixListId"))
+
+
+def _flatten_ip_permissions(ip_permissions: List[Dict]) -> Dict[tuple, Dict]:
+    # one entry per protocol, port range and source, describe returns no ports for all protocols (-1)
+    flattened = {}
+    for each_permission in ip_permissions:
+        protocol = str(each_permission.get("IpProtocol")).lower()
+        ports = (None, None) if protocol == "-1" else (each_permission.get("FromPort"), each_permission.get("ToPort"))
+        for source_key, address_key in _SG_RULE_SOURCES_:
+            for each_source in each_permission.get(source_key, []):
+                flattened[(protocol, *ports, source_key, each_source.get(address_key))] = each_source
+    return flattened
+
+
+def _to_ip_permissions(flattened: Dict[tuple, Dict], with_descriptions: bool = True) -> List[Dict]:
+    ip_permissions = {}
+    for (protocol, from_port, to_port, source_key, address), each_source in sorted(flattened.items(), key=lambda each: str(each[0])):
+        address_key = dict(_SG_RULE_SOURCES_).get(source_key)
+        if (protocol, from_port, to_port) not in ip_permissions:
+            ip_permissions[(protocol, from_port, to_port)] = {"IpProtocol": protocol} if protocol == "-1" else \
+                {"IpProtocol": protocol, "FromPort": from_port, "ToPort": to_port}
+        source = {address_key: address}
+        if with_descriptions and each_source.get("Description"):
+            source["Description"] = each_source.get("Description")
+        ip_permissions[(protocol, from_port, to_port)].setdefault(source_key, []).append(source)
+    return list(ip_permissions.values())
+
+
+def diff_sg_ingress_rules(current: List[Dict], desired: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+
+    """compare ingress rules source by source, descriptions are not compared
+
+    Args:
+        current: IpPermissions of the security group
+        desired: IpPermissions that should be in place
+
+    Returns:
+        (rules to authorize, rules to revoke), both empty if the security group is up to date
+
+    """
+    current_rules, desired_rules = _flatten_ip_permissions(current), _flatten_ip_permissions(desired)
+    return (_to_ip_permissions({key: value for key, value in desired_rules.items() if key not in current_rules}),
+            _to_ip_permissions({key: value for key, value in current_rules.items() if key not in desired_rules},
+                               with_descriptions=False))
+
+
 @_common_.aws_client_handle_exceptions("InvalidLaunchTemplateName.NotFoundException")
 def check_launch_template_exists(launch_template_name: str,
                                  aws_region: str,
@@ -1010,6 +1577,131 @@ def delete_launch_template(launch_template_name: str,
     return response
 
 
+@_common_.aws_client_handle_exceptions("InvalidLaunchTemplateId.NotFound")
+def delete_launch_template_by_id(launch_template_id: str,
+                                 aws_region: str = "us-east-1",
+                                 logger: Log = None
+                                 ) -> bool:
+
+    """delete the specified launch template by its id
+
+    Args:
+        launch_template_id: launch template id
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns True if the launch template is deleted successfully, False otherwise
+
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.delete_launch_template(LaunchTemplateId=launch_template_id)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"Launch template '{launch_template_id}' deleted successfully")
+    return True
+
+
+def build_launch_template_data(project_id: str,
+                               image_id: str,
+                               keypair_name: str,
+                               security_group_ids: Union[str, List],
+                               subnet_id: str,
+                               instance_name: str,
+                               instance_type: str,
+                               kms_id: str,
+                               user_data: str = "",
+                               iam_instance_role: str = "",
+                               spot: bool = False
+                               ) -> Dict:
+
+    """launch template data of a project instance, see create_launch_template for the arguments
+
+    Returns:
+        the LaunchTemplateData of create_launch_template and create_launch_template_version
+
+    """
+    if isinstance(security_group_ids, str):
+        security_group_ids = [security_group_ids]
+
+    # if not _util_common_.is_base64_encoded(user_data):
+    user_data = _util_common_.string_to_base64(user_data)
+
+    launch_template_data = {
+        "ImageId": image_id,
+        "InstanceType": instance_type,
+        'BlockDeviceMappings': [
+            {
+                'DeviceName': '/dev/xvda',
+                'Ebs': {
+                    'VolumeSize': 30,
+                    'VolumeType': 'gp2',
+                    'Encrypted': True,
+                    'KmsKeyId': kms_id
+                }
+            }
+        ],
+        'NetworkInterfaces': [
+            {
+                'AssociatePublicIpAddress': True,
+                'DeviceIndex': 0,
+                'SubnetId': subnet_id,
+                'Groups': security_group_ids,
+            },
+        ],
+        "KeyName": keypair_name,
+        # "SecurityGroupIds": security_group_ids,
+        "UserData": user_data,
+        "TagSpecifications": [
+            {
+                "ResourceType": "instance",
+                "Tags": [
+                    {
+                        "Key": "Name",
+                        "Value": instance_name
+                    },
+                    {
+                        'Key': 'pg_auto_project_name',
+                        'Value': project_id
+                    }
+                ]
+            }
+        ]
+    }
+
+    # instances keep their Name tag, every resource created from the template carries the project tags, except
+    # the creation time which would make every build differ from the current version (see diff_launch_template_data)
+    from _aws import _tagging
+    _project_tags = _tagging.to_tag_list({_key: _value for _key, _value in _tagging.project_tags(project_id).items()
+                                          if _key != _tagging._CREATED_AT_TAG_KEY_})
+    _instance_tags = launch_template_data["TagSpecifications"][0]["Tags"]
+    _instance_tags.extend(each_tag for each_tag in _project_tags if each_tag.get("Key") != "pg_auto_project_name")
+    launch_template_data["TagSpecifications"].extend(
+        [{"ResourceType": each_type, "Tags": _project_tags} for each_type in ("volume", "spot-instances-request")])
+
+    if spot:
+        launch_template_data["InstanceMarketOptions"] = {
+            'MarketType': 'spot',
+            'SpotOptions': {
+                'SpotInstanceType': 'one-time'
+            }
+        }
+    if iam_instance_role:
+        launch_template_data["IamInstanceProfile"] = {
+            "Name": iam_instance_role
+        }
+    return launch_template_data
+
+
 @_common_.aws_client_handle_exceptions()
 def create_launch_template(project_id: str,
                            launch_template_name: str,
@@ -1023,6 +1715,7 @@ def create_launch_template(project_id: str,
                            launch_template_description: str,
                            user_data: str = "",
                            iam_instance_role: str = "",
+                           spot: bool = False,
                            aws_region: str = "us-east-1",
                            logger: Log = None
                            ):
@@ -1043,6 +1736,8 @@ def create_launch_template(project_id: str,
         launch_template_description: launch template description
         user_data: user data plain text
         iam_instance_role:  iam role name
+        spot: instances launched from the template are one-time spot instances, leave it off when launching
+              through ec2 fleet or a mixed instances auto scaling group which decide the market themselves
         aws_region: aws region
         logger: logger object
 
@@ -1056,68 +1751,25 @@ def create_launch_template(project_id: str,
     # initialize the boto3 ec2 client
     ec2_client = boto3.client('ec2', region_name=aws_region)
 
-    if isinstance(security_group_ids, str):
-        security_group_ids = [security_group_ids]
-
-    # if not _util_common_.is_base64_encoded(user_data):
-    user_data = _util_common_.string_to_base64(user_data)
-
-
+    from _aws import _tagging
     _parameters = {
             "LaunchTemplateName": launch_template_name,
             "VersionDescription": launch_template_description,
-            "LaunchTemplateData": {
-                "ImageId": image_id,
-                "InstanceType": instance_type,
-                'BlockDeviceMappings': [
-                    {
-                        'DeviceName': '/dev/xvda',
-                        'Ebs': {
-                            'VolumeSize': 30,
-                            'VolumeType': 'gp2',
-                            'Encrypted': True,
-                            'KmsKeyId': kms_id
-                        }
-                    }
-                ],
-                'NetworkInterfaces': [
-                    {
-                        'AssociatePublicIpAddress': True,
-                        'DeviceIndex': 0,
-                        'SubnetId': subnet_id,
-                        'Groups': security_group_ids,
-                    },
-                ],
-                "KeyName": keypair_name,
-                # "SecurityGroupIds": security_group_ids,
-                'InstanceMarketOptions': {
-                    'MarketType': 'spot',
-                    'SpotOptions': {
-                        'SpotInstanceType': 'one-time'
-                    }
-                },
-                "UserData": user_data,
-                "TagSpecifications": [
-                    {
-                        "ResourceType": "instance",
-                        "Tags": [
-                            {
-                                "Key": "Name",
-                                "Value": instance_name
-                            },
-                            {
-                                'Key': 'pg_auto_project_name',
-                                'Value': project_id
-                            }
-                        ]
-                    }
-                ]
-            }
-        }
-    if iam_instance_role:
-        _parameters["LaunchTemplateData"]["IamInstanceProfile"] = {
-            "Name": iam_instance_role
+            "LaunchTemplateData": build_launch_template_data(project_id=project_id,
+                                                             image_id=image_id,
+                                                             keypair_name=keypair_name,
+                                                             security_group_ids=security_group_ids,
+                                                             subnet_id=subnet_id,
+                                                             instance_name=instance_name,
+                                                             instance_type=instance_type,
+                                                             kms_id=kms_id,
+                                                             user_data=user_data,
+                                                             iam_instance_role=iam_instance_role,
+                                                             spot=spot),
+            "TagSpecifications": [{"ResourceType": "launch-template",
+                                   "Tags": _tagging.to_tag_list(_tagging.project_tags(project_id))}]
         }
+
     _response = ec2_client.create_launch_template(**_parameters)
     if _response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
         _common_.error_logger(currentframe().f_code.co_name,
@@ -1130,22 +1782,266 @@ def create_launch_template(project_id: str,
     return _response.get("LaunchTemplate", {}).get("LaunchTemplateId")
 
 
+@_common_.aws_client_handle_exceptions("InvalidLaunchTemplateName.NotFoundException")
+def get_launch_template(launch_template_name: str,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> Union[Dict, bool]:
+
+    """describe the specified launch template
+
+    Args:
+        launch_template_name: launch template name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the launch template (LaunchTemplateId, DefaultVersionNumber, LatestVersionNumber, ...), False if it does
+        not exist
+
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    response = ec2_client.describe_launch_templates(LaunchTemplateNames=[launch_template_name])
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("LaunchTemplates", [])), False)
+
+
+@_common_.aws_client_handle_exceptions("InvalidLaunchTemplateId.NotFound")
+def get_launch_template_data(launch_template_id: str,
+                             version: str = "$Default",
+                             aws_region: str = "us-east-1",
+                             logger: Log = None
+                             ) -> Union[Dict, bool]:
+
+    """obtain the launch template data of a launch template version
+
+    Args:
+        launch_template_id: launch template id
+        version: version number, $Default or $Latest
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the LaunchTemplateData of the version, False if the launch template does not exist
+
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "LaunchTemplateId": launch_template_id,
+        "Versions": [str(version)]
+    }
+    response = ec2_client.describe_launch_template_versions(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next(iter(response.get("LaunchTemplateVersions", [])), {}).get("LaunchTemplateData", {})
+
+
+def diff_launch_template_data(current: Dict, desired: Dict, path: str = "") -> List[str]:
+
+    """compare launch template data, only the keys set in desired are compared as describe adds defaults
+
+    Args:
+        current: launch template data of the current version
+        desired: launch template data that should be in place
+        path: key path of the compared data, used for reporting
+
+    Returns:
+        the key paths that differ, empty if the current version is up to date
+
+    """
+    if isinstance(desired, dict):
+        if not isinstance(current, dict):
+            return [path or "."]
+        return [each_diff for _key, _value in desired.items()
+                for each_diff in diff_launch_template_data(current.get(_key), _value, f"{path}.{_key}".lstrip("."))]
+    if isinstance(desired, list):
+        if not isinstance(current, list) or len(current) != len(desired):
+            return [path]
+        if all(isinstance(each_item, str) for each_item in desired):
+            return [] if sorted(current) == sorted(desired) else [path]
+        return [each_diff for _index, (_current, _desired) in enumerate(zip(current, desired))
+                for each_diff in diff_launch_template_data(_current, _desired, f"{path}[{_index}]")]
+    return [] if current == desired else [path]
+
+
+@_common_.aws_client_handle_exceptions()
+def create_launch_template_version(launch_template_id: str,
+                                   launch_template_data: Dict,
+                                   launch_template_description: str = "",
+                                   set_default: bool = True,
+                                   aws_region: str = "us-east-1",
+                                   logger: Log = None
+                                   ) -> int:
+
+    """create a new version of a launch template and optionally make it the default version
+
+    Args:
+        launch_template_id: launch template id
+        launch_template_data: complete launch template data of the new version
+        launch_template_description: version description
+        set_default: make the new version the default version
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the new version number
+
+    """
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    _parameters = {
+        "LaunchTemplateId": launch_template_id,
+        "VersionDescription": launch_template_description,
+        "LaunchTemplateData": launch_template_data
+    }
+    response = ec2_client.create_launch_template_version(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    version_number = response.get("LaunchTemplateVersion", {}).get("VersionNumber")
+    if set_default:
+        response = ec2_client.modify_launch_template(LaunchTemplateId=launch_template_id,
+                                                     DefaultVersion=str(version_number))
+        if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"operation failed, reason response code is not 200",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+
+    _common_.info_logger(f"Launch template '{launch_template_id}' version {version_number} created"
+                         f"{' and set as default' if set_default else ''}")
+    return version_number
+
+
+@_common_.aws_client_handle_exceptions()
+def wait_for_instances(instance_ids: Union[str, List[str]],
+                       target_state: str = "status_ok",
+                       timeout: int = _FLEET_WAIT_TIMEOUT_,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> Dict[str, Union[float, None]]:
+    """wait for a fleet of instances with one batched describe_instance_status call per poll
+
+    the poll interval is reset whenever an instance becomes ready and doubles while nothing changes, every
+    instance is dropped from the poll as soon as it reaches the target state or fails
+
+    Args:
+        instance_ids: instance id(s)
+        target_state: running, status_ok (running and both the system and the instance status checks passed) or
+                      stopped
+        timeout: overall deadline in seconds for the whole fleet
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        instance id -> seconds until the instance was ready, None if it failed or missed the deadline
+
+    """
+    if target_state not in _FLEET_FAILED_STATES_:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"target state {target_state} is not supported, use {list(_FLEET_FAILED_STATES_)}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    if isinstance(instance_ids, str): instance_ids = [instance_ids]
+
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    pending = list(dict.fromkeys(instance_ids))
+    time_to_ready = {}
+    interval = _FLEET_POLL_INTERVAL_
+    started = monotonic()
+    deadline = started + timeout
+    _common_.info_logger(f"waiting for {len(pending)} instance(s) to be {target_state}: {pending}", logger=logger)
+
+    while pending:
+        _statuses = []
+        for _index in range(0, len(pending), _FLEET_BATCH_SIZE_):
+            try:
+                _statuses.extend(ec2_client.describe_instance_status(InstanceIds=pending[_index: _index + _FLEET_BATCH_SIZE_],
+                                                                     IncludeAllInstances=True).get("InstanceStatuses", []))
+            except ClientError as err:
+                # instances are eventually consistent right after run_instances, poll again later
+                if err.response.get("Error", {}).get("Code") != "InvalidInstanceID.NotFound":
+                    raise
+
+        _progress = False
+        for each_status in _statuses:
+            instance_id = each_status.get("InstanceId")
+            instance_state = each_status.get("InstanceState", {}).get("Name")
+            if instance_state in _FLEET_FAILED_STATES_.get(target_state):
+                _common_.info_logger(f"instance {instance_id} is {instance_state}, it will never be {target_state}",
+                                     logger=logger)
+                time_to_ready[instance_id] = None
+            elif instance_state == target_state or \
+                    (target_state == "status_ok" and instance_state == "running" and
+                     each_status.get("InstanceStatus", {}).get("Status") == "ok" and
+                     each_status.get("SystemStatus", {}).get("Status") == "ok"):
+                time_to_ready[instance_id] = round(monotonic() - started, 1)
+                _common_.info_logger(f"instance {instance_id} is {target_state} after {time_to_ready[instance_id]} seconds",
+                                     logger=logger)
+            else:
+                continue
+            pending.remove(instance_id)
+            _progress = True
+
+        if not pending:
+            break
+        if (remaining := deadline - monotonic()) <= 0:
+            _common_.info_logger(f"instance(s) {pending} are not {target_state} after {timeout} seconds", logger=logger)
+            time_to_ready.update({instance_id: None for instance_id in pending})
+            break
+        interval = _FLEET_POLL_INTERVAL_ if _progress else min(interval * 2, _FLEET_MAX_POLL_INTERVAL_)
+        sleep(min(interval, remaining))
+
+    _common_.info_logger(f"fleet wait finished in {monotonic() - started:.1f} seconds: {time_to_ready}", logger=logger)
+    return time_to_ready
+
+
 @_common_.aws_client_handle_exceptions()
 def run_ec2_from_template(launch_template_id: str,
                           version: str = "$Latest",
+                          count: int = 1,
+                          wait_until: str = "status_ok",
                           aws_region: str = "us-east-1",
                           logger: Log = None
                           ) -> List[str]:
-    """launch an ec2 instance from the specified launch template
+    """launch ec2 instances from the specified launch template and wait for the whole fleet at once
 
     Args:
         launch_template_id: launch template id
-        aws_region: aws region
         version: version, default to latest
+        count: number of instances to launch
+        wait_until: running or status_ok, see wait_for_instances
+        aws_region: aws region
         logger: logger
 
     Returns:
-        True if the instance is launched successfully, False otherwise
+        the instance ids
 
     """
     # initialize the boto3 ec2 client
@@ -1156,16 +2052,8 @@ def run_ec2_from_template(launch_template_id: str,
             "LaunchTemplateId": launch_template_id,
             "Version": version
         },
-        # # "SubnetId": subnet_id,
-        # "NetworkInterfaces": [
-        #     {
-        #         "AssociatePublicIpAddress": False,
-        #         "SubnetId": subnet_id,
-        #         "Groups": ["sg-0cea0bd861446063b"],
-        #         "DeviceIndex": 0,
-        #     }],
-        "MinCount": 1,
-        "MaxCount": 1
+        "MinCount": count,
+        "MaxCount": count
     }
 
     _response = ec2_client.run_instances(**_parameters)
@@ -1175,64 +2063,180 @@ def run_ec2_from_template(launch_template_id: str,
                               logger=logger,
                               mode="error",
                               ignore_flag=False)
+
+    instance_ids = [each_instance.get("InstanceId") for each_instance in _response.get("Instances", [])]
+    time_to_ready = wait_for_instances(instance_ids, target_state=wait_until, aws_region=aws_region, logger=logger)
+    if not time_to_ready or None in time_to_ready.values():
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"instance(s) did not become {wait_until}: {time_to_ready}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    _common_.info_logger(f"instance(s) {instance_ids} passed all status checks and are fully operational")
+    return instance_ids
+
+
+@_common_.aws_client_handle_exceptions()
+def create_instant_fleet(launch_template_id: str,
+                         count: int = 1,
+                         instance_types: List[str] = None,
+                         instance_requirements: Dict = None,
+                         capacity_type: str = "spot",
+                         version: str = "$Latest",
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> Dict:
+    """launch instances from a launch template through an instant ec2 fleet, spot capacity is picked with the
+    price-capacity-optimized strategy over all instance types, on-demand capacity with the lowest price
+
+    Args:
+        launch_template_id: launch template id, it must not set the instance market options
+        count: number of instances
+        instance_types: instance types to choose from, the launch template instance type if empty
+        instance_requirements: attribute based selection instead of instance types, e.g.
+                               {"VCpuCount": {"Min": 1, "Max": 2}, "MemoryMiB": {"Min": 1024}}
+        capacity_type: spot or on-demand
+        version: launch template version
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        {"instances": [{"InstanceId": ..., "InstanceType": ..., "Lifecycle": ...}], "errors": [error codes]}
+
+    """
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    if instance_requirements:
+        _overrides = [{"InstanceRequirements": instance_requirements}]
     else:
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Waiting for instance {instance_id} to reach the 'running' state...")
+        _overrides = [{"InstanceType": each_type} for each_type in dict.fromkeys(instance_types or [])]
 
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            waiter = ec2_client.get_waiter('instance_running')
-            waiter.wait(InstanceIds=[instance_id])
+    _launch_template_config = {
+        "LaunchTemplateSpecification": {
+            "LaunchTemplateId": launch_template_id,
+            "Version": version
+        }
+    }
+    if _overrides:
+        _launch_template_config["Overrides"] = _overrides
+
+    _parameters = {
+        "Type": "instant",
+        "LaunchTemplateConfigs": [_launch_template_config],
+        "TargetCapacitySpecification": {
+            "TotalTargetCapacity": count,
+            "DefaultTargetCapacityType": capacity_type
+        },
+        "SpotOptions": {"AllocationStrategy": "price-capacity-optimized"},
+        "OnDemandOptions": {"AllocationStrategy": "lowest-price"}
+    }
+    def _create_fleet():
+        _response = ec2_client.create_fleet(**_parameters)
+        # an instant fleet reports launch errors in the response, a new instance profile that has not propagated
+        # yet is raised so it is retried like for run_instances
+        if not _response.get("Instances"):
+            from _aws import iam_role
+            for each_error in _response.get("Errors", []):
+                _error = ClientError({"Error": {"Code": each_error.get("ErrorCode"), "Message": each_error.get("ErrorMessage", "")}},
+                                     "CreateFleet")
+                if iam_role.is_propagation_error(_error):
+                    raise _error
+        return _response
+
+    from _aws import iam_role
+    response = iam_role.retry_until_role_usable(_create_fleet, logger=logger)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
 
-        # Wait for the instance to pass both system and instance status checks
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Waiting for instance {instance_id} to pass all status checks...")
+    instances = [{"InstanceId": instance_id,
+                  "InstanceType": each_group.get("InstanceType"),
+                  "Lifecycle": each_group.get("Lifecycle", capacity_type)}
+                 for each_group in response.get("Instances", [])
+                 for instance_id in each_group.get("InstanceIds", [])]
+    errors = sorted({each_error.get("ErrorCode") for each_error in response.get("Errors", [])})
+    _common_.info_logger(f"{capacity_type} fleet launched {len(instances)} of {count} instance(s)"
+                         f"{f', errors {errors}' if errors else ''}", logger=logger)
+    return {"instances": instances, "errors": errors}
 
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            status_waiter = ec2_client.get_waiter('instance_status_ok')
-            status_waiter.wait(InstanceIds=[instance_id])
 
-        for each_instance in _response.get("Instances", []):
-            instance_id = each_instance.get("InstanceId")
-            _common_.info_logger(f"Instance {instance_id} has passed all status checks and is fully operational.")
+@_common_.aws_client_handle_exceptions()
+def get_instances_placement(instance_ids: List[str],
+                            aws_region: str = "us-east-1",
+                            logger: Log = None
+                            ) -> Dict[str, Dict]:
+    """instance type, availability zone, market and addresses of the instances
+
+    Args:
+        instance_ids: instance ids
+        aws_region: aws region
+        logger: logger
+
+    Returns:
+        instance id -> {"InstanceType": ..., "AvailabilityZone": ..., "Lifecycle": spot or on-demand,
+                        "PublicIpAddress": ..., "PublicDnsName": ..., "PrivateIpAddress": ...}
 
-        return [each_instance.get("InstanceId") for each_instance in _response.get("Instances", [])]
+    """
+    # initialize the boto3 ec2 client
+    ec2_client = boto3.client('ec2', region_name=aws_region)
+
+    paginator = ec2_client.get_paginator("describe_instances")
+    return {each_instance.get("InstanceId"): {"InstanceType": each_instance.get("InstanceType"),
+                                              "AvailabilityZone": each_instance.get("Placement", {}).get("AvailabilityZone"),
+                                              "Lifecycle": each_instance.get("InstanceLifecycle", "on-demand"),
+                                              "PublicIpAddress": each_instance.get("PublicIpAddress"),
+                                              "PublicDnsName": each_instance.get("PublicDnsName"),
+                                              "PrivateIpAddress": each_instance.get("PrivateIpAddress")}
+            for page in paginator.paginate(InstanceIds=instance_ids)
+            for each_reservation in page.get("Reservations", [])
+            for each_instance in each_reservation.get("Instances", [])}
 
 
 @_common_.aws_client_handle_exceptions()
-def wait_for_ec2_running(instance_id: str,
-                         aws_region: str = "us-east-1",
-                         logger: Log = None
-                         ):
+def get_spot_price(instance_type: str,
+                   availability_zone: str,
+                   aws_region: str = "us-east-1",
+                   logger: Log = None
+                   ) -> Union[float, None]:
+    """current linux spot price of an instance type in an availability zone
 
-    from datetime import datetime
+    Args:
+        instance_type: instance type
+        availability_zone: availability zone
+        aws_region: aws region
+        logger: logger
 
-    if isinstance(instance_id, str): instance_id = [instance_id]
+    Returns:
+        hourly price in usd, None if there is no price history
 
+    """
     # initialize the boto3 ec2 client
     ec2_client = boto3.client('ec2', region_name=aws_region)
-    _common_.info_logger(f"Waiting for instance {instance_id} to be in the running state...")
-    done_flag = False
+
     _parameters = {
-        "InstanceIds": instance_id
+        "InstanceTypes": [instance_type],
+        "AvailabilityZone": availability_zone,
+        "ProductDescriptions": ["Linux/UNIX"],
+        "MaxResults": 1
     }
-    while True:
-        response = ec2_client.describe_instance_status(**_parameters)
-        print(response)
-        if done_flag: break
-        elif "InstanceStatuses" in response and len(response["InstanceStatuses"]) > 0:
-            for status in response["InstanceStatuses"]:
-                instance_status = status.get('InstanceStatus', {}).get('Details', [None])[0].get('Status')
-                if instance_status == "passed":
-                    done_flag = True
-                    break
-                _common_.info_logger(f"{datetime.now()}: Instance Id {instance_id}, instance status: {instance_status}")
-        else:
-            _common_.info_logger(f"No status information available for instance {instance_id[0]}")
-            break
-        sleep(__WAIT_TIME__)
-    _common_.info_logger(f"{instance_id} is running")
+    response = ec2_client.describe_spot_price_history(**_parameters)
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return next((float(each_price.get("SpotPrice")) for each_price in response.get("SpotPriceHistory", [])), None)
+
 
+def wait_for_ec2_running(instance_id: Union[str, List[str]],
+                         aws_region: str = "us-east-1",
+                         logger: Log = None
+                         ) -> Dict[str, Union[float, None]]:
+    """wait until the instance(s) are running and their status checks passed, see wait_for_instances"""
+    return wait_for_instances(instance_id, target_state="status_ok", aws_region=aws_region, logger=logger)
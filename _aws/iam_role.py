@@ -1,15 +1,34 @@
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Callable, Any
 import os
 import boto3
+from time import sleep, monotonic
+from botocore.exceptions import ClientError
 from logging import Logger as Log
 from inspect import currentframe
 import subprocess
+import re
 import json
+import hashlib
+from functools import partial
 from _common import _common as _common_
 import boto3
 
 _WAIT_TIME_ = 4
 
+# iam is eventually consistent, a new role or instance profile is usable by other services a few seconds later
+_PROPAGATION_TIMEOUT_ = 90
+_PROPAGATION_POLL_INTERVAL_ = 1
+_PROPAGATION_MAX_POLL_INTERVAL_ = 8
+# e.g. lambda "The role defined for the function cannot be assumed by Lambda.",
+# ec2 "Value (...) for parameter iamInstanceProfile.name is invalid. Invalid IAM Instance Profile name"
+_PROPAGATION_ERROR_MESSAGES_ = ("cannot be assumed", "Invalid IAM Instance Profile")
+
+# iam throttles mutating calls per account, a few concurrent calls are enough to detach large policy sets
+_MAX_WORKERS_ = 8
+
+_ROLE_NAME_MAX_LENGTH_ = 64
+_ROLE_NAME_HASH_LENGTH_ = 10
+
 
 @_common_.aws_client_handle_exceptions()
 def aws_client(service_name: str, aws_region: str):
@@ -17,7 +36,7 @@ def aws_client(service_name: str, aws_region: str):
 
 
 # @_common_.aws_client_handle_exceptions(aws_client=aws_client(service_name="iam", aws_region="us-east-1"))
-@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client(service_name="iam", aws_region="us-east-1").exceptions.NoSuchEntityException)
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client(service_name="iam", aws_region="us-east-1").exceptions.NoSuchEntityException, idempotent=True)
 def check_role_exists(iam_role_name: str,
                       aws_region: str = "us-east-1",
                       logger: Log = None) -> bool:
@@ -85,10 +104,27 @@ def delete_role(iam_role_name: str,
     return True
 
 
+def assume_role_policy_document(service_name: str) -> Dict:
+    """trust policy letting the aws service, e.g. lambda or apigateway, assume the role"""
+    return {
+        "Version": "2012-10-17",
+        "Statement": [
+            {
+                "Effect": "Allow",
+                "Principal": {
+                    "Service": f"{service_name}.amazonaws.com"
+                },
+                "Action": "sts:AssumeRole"
+            }
+        ]
+    }
+
+
 @_common_.aws_client_handle_exceptions()
 def create_iam_role(service_name: str,
                     role_name: str,
                     aws_region: str = "us-east-1",
+                    tags: Dict = None,
                     logger: Log = None
                     ) -> str:
     """create an iam role for access to ecr
@@ -98,6 +134,7 @@ def create_iam_role(service_name: str,
         aws_region: aws region
         service_name: service name
         role_name: role name
+        tags: tags of the role, tag key -> tag value
         logger: log object
 
     Returns:
@@ -108,23 +145,14 @@ def create_iam_role(service_name: str,
     # initialize the boto3 iam client
     iam_client = boto3.client("iam", region_name=aws_region)
 
-    assume_role_policy_document = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Effect": "Allow",
-                "Principal": {
-                    "Service": f"{service_name}.amazonaws.com"
-                },
-                "Action": "sts:AssumeRole"
-            }
-        ]
-    }
     _parameters = {
         "RoleName": role_name,
-        "AssumeRolePolicyDocument": json.dumps(assume_role_policy_document),
+        "AssumeRolePolicyDocument": json.dumps(assume_role_policy_document(service_name)),
         "Description": "Role that allows EC2 instances to access ECR"
     }
+    if tags:
+        from _aws import _tagging
+        _parameters["Tags"] = _tagging.to_tag_list(tags)
 
     response = iam_client.create_role(**_parameters)
 
@@ -177,11 +205,11 @@ def attach_policy_to_role(iam_role_name: str,
     return True
 
 
-@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client(service_name="iam", aws_region="us-east-1").exceptions.NoSuchEntityException)
+@_common_.aws_client_handle_exceptions(aws_client_exception=aws_client(service_name="iam", aws_region="us-east-1").exceptions.NoSuchEntityException, idempotent=True)
 def list_attached_role_policies(role_name: str,
                                 aws_region: str = "us-east-1",
                                 logger: Log = None) -> Union[List[dict], None]:
-    """list all policies attaching to a role
+    """list all managed policies attached to a role
 
     Args:
         role_name: role name
@@ -189,7 +217,7 @@ def list_attached_role_policies(role_name: str,
         logger: log object
 
     Returns:
-        return True if successful otherwise False
+        return the attached policies (PolicyName, PolicyArn)
 
     """
     # initialize the boto3 iam client
@@ -200,18 +228,34 @@ def list_attached_role_policies(role_name: str,
     }
 
     # List all policies attached to the role
-    response = iam_client.list_attached_role_policies(**_parameters)
+    paginator = iam_client.get_paginator("list_attached_role_policies")
+    return [each_policy
+            for page in paginator.paginate(**_parameters)
+            for each_policy in page.get("AttachedPolicies", [])]
 
-    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"operation failed, reason response code is not 200",
-                              logger=logger,
-                              mode="error",
-                              ignore_flag=False)
 
-    # ['AttachedPolicies']
-    # Detach each policy
-    return response.get("AttachedPolicies", [])
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
+def list_role_policy_names(role_name: str,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None) -> Union[List[str], bool]:
+    """list the names of the inline policies of a role
+
+    Args:
+        role_name: role name
+        aws_region: aws region
+        logger: log object
+
+    Returns:
+        return the inline policy names, False if the role does not exist
+
+    """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    paginator = iam_client.get_paginator("list_role_policies")
+    return [each_name
+            for page in paginator.paginate(RoleName=role_name)
+            for each_name in page.get("PolicyNames", [])]
 
 
 @_common_.aws_client_handle_exceptions(aws_client_exception=aws_client(service_name="iam", aws_region="us-east-1").exceptions.NoSuchEntityException)
@@ -253,11 +297,29 @@ def detach_policy_from_role(role_name: str,
     return True
 
 
+def _run_concurrently(calls: List[Callable[[], Any]], max_workers: int = _MAX_WORKERS_) -> None:
+    # fan out independent iam calls, an entity removed in the meantime counts as done
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _call(each_call: Callable[[], Any]):
+        try:
+            each_call()
+        except ClientError as err:
+            if err.response.get("Error", {}).get("Code") != "NoSuchEntity":
+                raise
+
+    if not calls:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        # list() re-raises the first unexpected error
+        list(executor.map(_call, calls))
+
+
 @_common_.aws_client_handle_exceptions()
 def detach_all_policies_from_role(iam_role_name: str,
                                   aws_region: str = "us-east-1",
                                   logger: Log = None) -> bool:
-    """detach all policies from a role
+    """detach all managed policies from a role and delete its inline policies, so the role can be deleted
 
     Args:
         iam_role_name: role name
@@ -268,18 +330,23 @@ def detach_all_policies_from_role(iam_role_name: str,
         return True if successful otherwise False
 
     """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    policy_arns = [each_policy.get("PolicyArn")
+                   for each_policy in list_attached_role_policies(iam_role_name, aws_region=aws_region) or []]
+    policy_names = list_role_policy_names(iam_role_name, aws_region=aws_region) or []
 
-    # Detach each policy
-    for policy in list_attached_role_policies(iam_role_name):
-        _parameters = {
-            "role_name": iam_role_name,
-            "policy_arn": policy.get("PolicyArn")
-        }
-        detach_policy_from_role(**_parameters)
-        _common_.info_logger(f"Policy {policy.get('PolicyArn')} successfully detached from role {iam_role_name}")
+    _run_concurrently([partial(iam_client.detach_role_policy, RoleName=iam_role_name, PolicyArn=each_arn)
+                       for each_arn in policy_arns] +
+                      [partial(iam_client.delete_role_policy, RoleName=iam_role_name, PolicyName=each_name)
+                       for each_name in policy_names])
+
+    _common_.info_logger(f"detached {len(policy_arns)} managed and deleted {len(policy_names)} inline "
+                         f"policies of role {iam_role_name}", logger=logger)
     return True
 
-@_common_.aws_client_handle_exceptions()
+@_common_.aws_client_handle_exceptions(idempotent=True)
 def check_instance_profile_exists(instance_profile_name: str,
                                   aws_region: str = "us-east-1",
                                   logger: Log = None) -> bool:
@@ -308,12 +375,14 @@ def check_instance_profile_exists(instance_profile_name: str,
 @_common_.aws_client_handle_exceptions()
 def create_instance_profile(instance_profile_name: str,
                             aws_region: str = "us-east-1",
+                            tags: Dict = None,
                             logger: Log = None) -> bool:
     """create an instance profile based on the specified name
 
     Args:
         instance_profile_name: instance profile name
         aws_region: aws region
+        tags: tags of the instance profile, tag key -> tag value
         logger: log object
 
     Returns:
@@ -323,7 +392,14 @@ def create_instance_profile(instance_profile_name: str,
     # initialize the boto3 iam client
     iam_client = aws_client("iam", aws_region)
 
-    response = iam_client.create_instance_profile(InstanceProfileName=instance_profile_name)
+    _parameters = {
+        "InstanceProfileName": instance_profile_name
+    }
+    if tags:
+        from _aws import _tagging
+        _parameters["Tags"] = _tagging.to_tag_list(tags)
+
+    response = iam_client.create_instance_profile(**_parameters)
     if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
         _common_.error_logger(currentframe().f_code.co_name,
                               f"operation failed, reason response code is not 200",
@@ -415,6 +491,31 @@ def detach_role_from_instance_profile(instance_profile_name: str,
     return True
 
 
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
+def list_instance_profiles_for_role(iam_role_name: str,
+                                    aws_region: str = "us-east-1",
+                                    logger: Log = None) -> List[str]:
+    """list the instance profiles the role belongs to, a role can only be deleted once it belongs to none
+
+    Args:
+        iam_role_name: iam role name
+        aws_region: aws region
+        logger: log object
+
+    Returns:
+        returns a list of instance profile names
+
+    """
+
+    # initialize the boto3 iam client
+    iam_client = boto3.client('iam', region_name=aws_region)
+
+    paginator = iam_client.get_paginator("list_instance_profiles_for_role")
+    return [each_profile.get("InstanceProfileName")
+            for page in paginator.paginate(RoleName=iam_role_name)
+            for each_profile in page.get("InstanceProfiles", [])]
+
+
 @_common_.aws_client_handle_exceptions("NoSuchEntity")
 def delete_instance_profile(instance_profile_name: str,
                             aws_region: str = "us-east-1",
@@ -445,7 +546,7 @@ def delete_instance_profile(instance_profile_name: str,
     return True
 
 
-@_common_.aws_client_handle_exceptions("NoSuchEntity")
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
 def get_instance_profile(instance_profile_name: str,
                          aws_region: str = "us-east-1",
                          logger: Log = None) -> List[str]:
@@ -484,7 +585,77 @@ def get_instance_profile(instance_profile_name: str,
 
 
 
-@_common_.aws_client_handle_exceptions("NoSuchEntity")
+@_common_.aws_client_handle_exceptions(idempotent=True)
+def list_role_names_by_prefix(iam_role_name_prefix: str,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None) -> List[str]:
+    """list the names of all roles starting with the prefix, e.g. roles created with a random suffix
+
+    Args:
+        iam_role_name_prefix: role name prefix
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns a list of role names
+
+    """
+
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    paginator = iam_client.get_paginator("list_roles")
+    return [each_role.get("RoleName")
+            for page in paginator.paginate()
+            for each_role in page.get("Roles", [])
+            if each_role.get("RoleName", "").startswith(iam_role_name_prefix)]
+
+
+@_common_.aws_client_handle_exceptions(idempotent=True)
+def list_hashed_role_names(iam_role_name_prefix: str,
+                           project_name: str = None,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None) -> List[str]:
+    """list the roles get_role_name created for the prefix, the prefix followed by nothing but the hash
+
+    a plain prefix match also returns the roles of other projects, e.g. role-lambda-app- matches the roles of
+    app-prod, with project_name the roles also need to carry the project tag of that project
+
+    Args:
+        iam_role_name_prefix: role name prefix given to get_role_name
+        project_name: project name the roles are tagged with, the tags are not checked if empty
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns a list of role names
+
+    """
+    from _aws import _tagging
+
+    _prefix = iam_role_name_prefix[:_ROLE_NAME_MAX_LENGTH_ - _ROLE_NAME_HASH_LENGTH_]
+    _pattern = re.compile(re.escape(_prefix) + f"[0-9a-f]{{{_ROLE_NAME_HASH_LENGTH_}}}")
+    role_names = [each_name for each_name in list_role_names_by_prefix(iam_role_name_prefix=_prefix,
+                                                                       aws_region=aws_region) or []
+                  if _pattern.fullmatch(each_name)]
+    if project_name is None:
+        return role_names
+
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    tagged = []
+    for each_name in role_names:
+        _tags = {each_tag.get("Key"): each_tag.get("Value")
+                 for each_tag in iam_client.list_role_tags(RoleName=each_name).get("Tags", [])}
+        if _tags.get(_tagging._PROJECT_TAG_KEY_) == project_name:
+            tagged.append(each_name)
+        else:
+            _common_.info_logger(f"role {each_name} is not tagged with project {project_name}, skipped", logger=logger)
+    return tagged
+
+
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
 def get_iam_policy_from_arn(policy_arn: str,
                             aws_region: str = "us-east-1",
                             logger: Log = None) -> List[str]:
@@ -519,7 +690,7 @@ def get_iam_policy_from_arn(policy_arn: str,
     return response.get("Policy")
 
 
-@_common_.aws_client_handle_exceptions("NoSuchEntity")
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
 def get_iam_policy_from_name(policy_name: str,
                             aws_region: str = "us-east-1",
                             logger: Log = None) -> List[str]:
@@ -568,25 +739,23 @@ def delete_iam_policy_by_arn(policy_arn: str,
     # initialize the boto3 iam client
     iam_client = aws_client("iam", aws_region)
 
-    # Detach the policy from all entities (users, groups, roles)
-    def detach_policy_entities(policy_arn: str):
-        # List and detach the policy from users
-        attached_users = iam_client.list_entities_for_policy(PolicyArn=policy_arn, EntityFilter='User')
-        for user in attached_users['PolicyUsers']:
-            iam_client.detach_user_policy(UserName=user['UserName'], PolicyArn=policy_arn)
-
-        # List and detach the policy from groups
-        attached_groups = iam_client.list_entities_for_policy(PolicyArn=policy_arn, EntityFilter='Group')
-        for group in attached_groups['PolicyGroups']:
-            iam_client.detach_group_policy(GroupName=group['GroupName'], PolicyArn=policy_arn)
+    # Detach the policy from all entities (users, groups, roles), one listing covers all three
+    calls = []
+    for page in iam_client.get_paginator("list_entities_for_policy").paginate(PolicyArn=policy_arn):
+        calls.extend(partial(iam_client.detach_user_policy, UserName=each_user.get("UserName"), PolicyArn=policy_arn)
+                     for each_user in page.get("PolicyUsers", []))
+        calls.extend(partial(iam_client.detach_group_policy, GroupName=each_group.get("GroupName"), PolicyArn=policy_arn)
+                     for each_group in page.get("PolicyGroups", []))
+        calls.extend(partial(iam_client.detach_role_policy, RoleName=each_role.get("RoleName"), PolicyArn=policy_arn)
+                     for each_role in page.get("PolicyRoles", []))
 
-        # List and detach the policy from roles
-        attached_roles = iam_client.list_entities_for_policy(PolicyArn=policy_arn, EntityFilter='Role')
-        for role in attached_roles['PolicyRoles']:
-            iam_client.detach_role_policy(RoleName=role['RoleName'], PolicyArn=policy_arn)
+    # a policy can only be deleted once its non-default versions are gone
+    calls.extend(partial(iam_client.delete_policy_version, PolicyArn=policy_arn, VersionId=each_version.get("VersionId"))
+                 for page in iam_client.get_paginator("list_policy_versions").paginate(PolicyArn=policy_arn)
+                 for each_version in page.get("Versions", [])
+                 if not each_version.get("IsDefaultVersion"))
 
-    # Detach policy from all entities
-    detach_policy_entities(policy_arn)
+    _run_concurrently(calls)
 
     # Delete the policy
     iam_client.delete_policy(PolicyArn=policy_arn)
@@ -598,6 +767,7 @@ def delete_iam_policy_by_arn(policy_arn: str,
 def create_iam_policy(policy_name: str,
                       policy_document: Dict,
                       aws_region: str = "us-east-1",
+                      tags: Dict = None,
                       logger: Log = None) -> bool:
 
     """first detach policy from its usage and then delete iam policy by its policy arn
@@ -606,6 +776,7 @@ def create_iam_policy(policy_name: str,
         policy_name: policy name
         policy_document: policy document
         aws_region: aws region
+        tags: tags of the policy, tag key -> tag value
         logger: logger object
 
     Returns:
@@ -621,6 +792,9 @@ def create_iam_policy(policy_name: str,
         "PolicyDocument": json.dumps(policy_document),
         "Description": "Custom policy"
     }
+    if tags:
+        from _aws import _tagging
+        _parameters["Tags"] = _tagging.to_tag_list(tags)
 
 
 
@@ -635,5 +809,247 @@ def create_iam_policy(policy_name: str,
     return response.get("Policy", {}).get("Arn")
 
 
+@_common_.aws_client_handle_exceptions()
+def wait_for_role(iam_role_name: str,
+                  timeout: int = _PROPAGATION_TIMEOUT_,
+                  aws_region: str = "us-east-1",
+                  logger: Log = None) -> bool:
+
+    """wait until iam returns the role, use retry_until_role_usable for the service consuming it
+
+    Args:
+        iam_role_name: iam role name
+        timeout: timeout in seconds
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns True once the role exists
+
+    """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    waiter = iam_client.get_waiter("role_exists")
+    waiter.wait(RoleName=iam_role_name,
+                WaiterConfig={"Delay": _PROPAGATION_POLL_INTERVAL_, "MaxAttempts": timeout // _PROPAGATION_POLL_INTERVAL_})
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def wait_for_instance_profile(instance_profile_name: str,
+                              iam_role_name: str = None,
+                              timeout: int = _PROPAGATION_TIMEOUT_,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None) -> bool:
+
+    """wait until iam returns the instance profile, and the role in it if specified
+
+    Args:
+        instance_profile_name: instance profile name
+        iam_role_name: iam role added to the instance profile
+        timeout: timeout in seconds
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns True once the instance profile exists (with the role), False if the role is missing after timeout
+
+    """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    deadline = monotonic() + timeout
+    waiter = iam_client.get_waiter("instance_profile_exists")
+    waiter.wait(InstanceProfileName=instance_profile_name,
+                WaiterConfig={"Delay": _PROPAGATION_POLL_INTERVAL_, "MaxAttempts": timeout // _PROPAGATION_POLL_INTERVAL_})
+
+    interval = _PROPAGATION_POLL_INTERVAL_
+    while iam_role_name and iam_role_name not in (get_instance_profile(instance_profile_name=instance_profile_name) or []):
+        if (remaining := deadline - monotonic()) <= 0:
+            _common_.info_logger(f"role {iam_role_name} is not in instance profile {instance_profile_name} "
+                                 f"after {timeout} seconds", logger=logger)
+            return False
+        sleep(min(interval, remaining))
+        interval = min(interval * 2, _PROPAGATION_MAX_POLL_INTERVAL_)
+    return True
+
+
+def is_propagation_error(err: Exception) -> bool:
+    """whether a service rejected a role or an instance profile only because iam has not propagated it yet"""
+    return isinstance(err, ClientError) and \
+        any(each_message in err.response.get("Error", {}).get("Message", "") for each_message in _PROPAGATION_ERROR_MESSAGES_)
 
 
+def retry_until_role_usable(operation: Callable[[], Any],
+                            timeout: int = _PROPAGATION_TIMEOUT_,
+                            logger: Log = None) -> Any:
+
+    """call the operation depending on a new role, e.g. lambda create_function, and retry it with backoff as long
+    as it fails because the role can not be assumed yet, every other error is raised right away
+
+    Args:
+        operation: the call, retried as is
+        timeout: how long to keep retrying, the last propagation error is raised afterwards
+        logger: logger object
+
+    Returns:
+        the result of the operation
+
+    """
+    deadline = monotonic() + timeout
+    interval = _PROPAGATION_POLL_INTERVAL_
+    while True:
+        try:
+            return operation()
+        except ClientError as err:
+            if not is_propagation_error(err) or (remaining := deadline - monotonic()) <= 0:
+                raise
+            _common_.info_logger(f"role not propagated yet, retrying in {min(interval, remaining):.0f} seconds: "
+                                 f"{err.response.get('Error', {}).get('Message')}", logger=logger)
+        sleep(min(interval, remaining))
+        interval = min(interval * 2, _PROPAGATION_MAX_POLL_INTERVAL_)
+
+
+def _canonical_json(document: Dict) -> str:
+    return json.dumps(document, sort_keys=True, separators=(",", ":"))
+
+
+def get_role_name(iam_role_name_prefix: str,
+                  service_name: str,
+                  policy_arns: List[str]) -> str:
+
+    """content addressed role name, the prefix followed by a hash of the trust policy and the attached policies
+
+    the same service and policy set always map to the same role, so a deployment reuses its role instead of
+    creating one per run, and a changed policy set gets a new role next to the one in use
+
+    Args:
+        iam_role_name_prefix: role name prefix, e.g. role-lambda-{project_name}-, shortened to fit 64 characters
+        service_name: aws service assuming the role, e.g. lambda
+        policy_arns: managed policies attached to the role
+
+    Returns:
+        the role name
+
+    """
+    _hash = hashlib.sha256(_canonical_json({"trust_policy": assume_role_policy_document(service_name),
+                                            "policy_arns": sorted(set(policy_arns))}).encode("utf-8")).hexdigest()
+    return f"{iam_role_name_prefix[:_ROLE_NAME_MAX_LENGTH_ - _ROLE_NAME_HASH_LENGTH_]}{_hash[:_ROLE_NAME_HASH_LENGTH_]}"
+
+
+@_common_.aws_client_handle_exceptions("NoSuchEntity", idempotent=True)
+def get_role(iam_role_name: str,
+             aws_region: str = "us-east-1",
+             logger: Log = None) -> Union[Dict, bool]:
+
+    """get a role with its trust policy
+
+    Args:
+        iam_role_name: iam role name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the role (Arn, AssumeRolePolicyDocument, ...), False if it does not exist
+
+    """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    _parameters = {
+        "RoleName": iam_role_name
+    }
+    response = iam_client.get_role(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    return response.get("Role", {})
+
+
+@_common_.aws_client_handle_exceptions("NoSuchEntity")
+def update_assume_role_policy(iam_role_name: str,
+                              policy_document: Dict,
+                              aws_region: str = "us-east-1",
+                              logger: Log = None) -> bool:
+
+    """replace the trust policy of a role
+
+    Args:
+        iam_role_name: iam role name
+        policy_document: trust policy
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        returns True if successful, False if the role does not exist
+
+    """
+    # initialize the boto3 iam client
+    iam_client = aws_client("iam", aws_region)
+
+    _parameters = {
+        "RoleName": iam_role_name,
+        "PolicyDocument": json.dumps(policy_document)
+    }
+    response = iam_client.update_assume_role_policy(**_parameters)
+
+    if response.get("ResponseMetadata").get("HTTPStatusCode") != 200:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"operation failed, reason response code is not 200",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+    _common_.info_logger(f"updated the trust policy of role {iam_role_name}", logger=logger)
+    return True
+
+
+@_common_.aws_client_handle_exceptions()
+def ensure_role(iam_role_name: str,
+                service_name: str,
+                policy_arns: List[str],
+                tags: Dict = None,
+                aws_region: str = "us-east-1",
+                logger: Log = None) -> str:
+
+    """make sure the role exists with the trust policy of the service and exactly the managed policies, an existing
+    role is reused and only the drift is fixed in place: the trust policy is replaced if it differs, missing
+    policies are attached and extra ones detached
+
+    Args:
+        iam_role_name: iam role name, see get_role_name
+        service_name: aws service assuming the role, e.g. lambda
+        policy_arns: managed policies attached to the role
+        tags: tags of a new role, tag key -> tag value
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the role arn
+
+    """
+    trust_policy = assume_role_policy_document(service_name)
+
+    if not (role := get_role(iam_role_name=iam_role_name, aws_region=aws_region)):
+        role_arn = create_iam_role(service_name, iam_role_name, tags=tags, aws_region=aws_region)
+        for policy_arn in policy_arns:
+            attach_policy_to_role(iam_role_name=iam_role_name, policy_arn=policy_arn, aws_region=aws_region)
+        wait_for_role(iam_role_name=iam_role_name, aws_region=aws_region)
+        return role_arn
+
+    _common_.info_logger(f"reusing role {iam_role_name}", logger=logger)
+    # boto3 returns the trust policy decoded
+    if _canonical_json(role.get("AssumeRolePolicyDocument") or {}) != _canonical_json(trust_policy):
+        update_assume_role_policy(iam_role_name=iam_role_name, policy_document=trust_policy, aws_region=aws_region)
+
+    attached = {each_policy.get("PolicyArn")
+                for each_policy in list_attached_role_policies(iam_role_name, aws_region=aws_region) or []}
+    for policy_arn in set(policy_arns) - attached:
+        attach_policy_to_role(iam_role_name=iam_role_name, policy_arn=policy_arn, aws_region=aws_region)
+    for policy_arn in attached - set(policy_arns):
+        detach_policy_from_role(role_name=iam_role_name, policy_arn=policy_arn, aws_region=aws_region)
+    return role.get("Arn")
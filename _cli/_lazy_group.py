@@ -0,0 +1,63 @@
+import sys
+import copy
+import importlib
+from typing import Dict, Tuple
+import click
+from _common import _common as _common_
+
+
+# functions listed after a profiled run, sorted by cumulative time
+_PROFILE_TOP_ = 30
+
+
+class LazyGroup(click.Group):
+    """click group importing a subcommand only when it is invoked
+
+    the subcommands are given as lazy_commands, command name -> ("module:attribute", short help), the help of
+    the group lists them without importing anything. a group with a profile_run parameter profiles the
+    invocation, subcommand import included, and writes the stats to its profile_output parameter
+
+    """
+
+    def __init__(self, *args, lazy_commands: Dict[str, Tuple[str, str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx: click.Context):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name not in self.lazy_commands:
+            return super().get_command(ctx, cmd_name)
+        module_name, attribute = self.lazy_commands.get(cmd_name)[0].split(":")
+        # the command keeps its own name otherwise, e.g. apply_pattern_lambda instead of lambda in the usage
+        command = copy.copy(getattr(importlib.import_module(module_name), attribute))
+        command.name = cmd_name
+        return command
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        rows = []
+        for cmd_name in self.list_commands(ctx):
+            if cmd_name in self.lazy_commands:
+                rows.append((cmd_name, self.lazy_commands.get(cmd_name)[1]))
+            elif (command := super().get_command(ctx, cmd_name)) is not None and not command.hidden:
+                rows.append((cmd_name, command.get_short_help_str(formatter.width - 6 - len(cmd_name))))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def invoke(self, ctx: click.Context):
+        if not ctx.params.get("profile_run"):
+            return super().invoke(ctx)
+
+        import cProfile
+        import pstats
+
+        profile_output = ctx.params.get("profile_output")
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(super().invoke, ctx)
+        finally:
+            profile.dump_stats(profile_output)
+            pstats.Stats(profile, stream=sys.stderr).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_PROFILE_TOP_)
+            _common_.info_logger(f"profile written to {profile_output}, browse it with python -m pstats {profile_output}")
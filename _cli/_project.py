@@ -0,0 +1,151 @@
+import sys
+from typing import List, Dict
+import click
+from _common import _common as _common_
+from _aws import _session
+
+
+_PATTERNS_ = ("lambda", "webapp", "streamlit")
+# patterns the deployments are recorded under, see sweep_orphans.register_deployment
+_RECORDED_PATTERNS_ = {"apigateway_lambda": "lambda", "ec2_streamlit": "streamlit"}
+# the api create_deployment of the lambda pattern deploys to by default
+_API_GATEWAY_API_NAME_ = "MyApi_new4"
+
+
+def _resolve_pattern(project_name: str, pattern: str = None) -> str:
+    # the pattern of a project deployed from this machine is taken from the local state
+    from _deployment.destroy_deployment import sweep_orphans
+
+    if pattern:
+        return pattern
+    if recorded := (sweep_orphans.load_deployment_state() or {}).get(project_name):
+        return _RECORDED_PATTERNS_.get(recorded.get("pattern"), recorded.get("pattern"))
+    raise click.UsageError(f"{project_name} is not recorded as deployed on this machine, --pattern is required")
+
+
+def _pattern_resources(pattern: str,
+                       project_name: str,
+                       api_gateway_api_name: str,
+                       api_type: str,
+                       api_method: str,
+                       aws_account_number: str,
+                       aws_region: str
+                       ) -> List[Dict]:
+    from _deployment.destroy_deployment import destroy_deployment as _destroy_deployment
+
+    if pattern == "lambda":
+        return _destroy_deployment.lambda_pattern_resources(project_name=project_name,
+                                                            api_gateway_api_name=api_gateway_api_name,
+                                                            api_type=api_type,
+                                                            api_method=api_method,
+                                                            aws_account_number=aws_account_number,
+                                                            aws_region=aws_region)
+    # the ec2 patterns name their resources after the project, see _task._deploy_aws_website_streamlit
+    return _destroy_deployment.ec2_pattern_resources(project_name=project_name,
+                                                     keypair_name=f"{project_name}-keypair",
+                                                     sg_name=f"{project_name}-security-group",
+                                                     ecr_repository_name=f"{project_name}-test",
+                                                     aws_region=aws_region)
+
+
+def _project_options(func):
+    for each_option in reversed([
+        click.option('--project_name', required=True, type=str),
+        click.option('--pattern', type=click.Choice(_PATTERNS_), help="taken from the local state if empty"),
+        click.option('--api_gateway_api_name', default=_API_GATEWAY_API_NAME_, type=str, show_default=True),
+        click.option('--api_type', default="rest", type=click.Choice(["rest", "http"]), show_default=True),
+        click.option('--api_method', default="GET", type=str, show_default=True),
+        click.option('--aws_account_number', type=str, help="needed for an http api"),
+        click.option('--aws_region', default="us-east-1", type=str, show_default=True),
+    ]):
+        func = each_option(func)
+    return func
+
+
+@click.command()
+@_project_options
+def destroy(project_name: str,
+            pattern: str,
+            api_gateway_api_name: str,
+            api_type: str,
+            api_method: str,
+            aws_account_number: str,
+            aws_region: str):
+    """destroy the deployment of a project, exits with 1 if a resource could not be deleted"""
+    _session.install()
+    pattern = _resolve_pattern(project_name, pattern)
+    _common_.info_logger(f"destroying {pattern} deployment of {project_name} in {aws_region}")
+
+    # the defaults of the task functions apply if no account number is given
+    _account = {"aws_account_number": aws_account_number} if aws_account_number else {}
+    if pattern == "lambda":
+        from _task import _aws_apigateway_lambda
+        deleted = _aws_apigateway_lambda.destroy_deployment(lambda_function_name=f"lambda-{project_name}",
+                                                            api_gateway_api_name=api_gateway_api_name,
+                                                            api_type=api_type,
+                                                            api_method=api_method,
+                                                            aws_region=aws_region,
+                                                            **_account)
+    elif pattern == "streamlit":
+        from _task import _deploy_aws_website_streamlit
+        deleted = _deploy_aws_website_streamlit.destroy_deployment(project_name=project_name,
+                                                                   project_path=".",
+                                                                   aws_region=aws_region,
+                                                                   **_account)
+    else:
+        from _deployment.destroy_deployment import destroy_deployment as _destroy_deployment, sweep_orphans
+        if deleted := _destroy_deployment.run(_pattern_resources(pattern, project_name, api_gateway_api_name, api_type,
+                                                                 api_method, aws_account_number, aws_region)):
+            sweep_orphans.deregister_deployment(project_name=project_name)
+
+    if not deleted:
+        sys.exit(1)
+
+
+@click.command()
+@_project_options
+def plan(project_name: str,
+         pattern: str,
+         api_gateway_api_name: str,
+         api_type: str,
+         api_method: str,
+         aws_account_number: str,
+         aws_region: str):
+    """show the tagged resources of a project and the order destroy would delete them in, nothing is changed"""
+    _session.install()
+    from _deployment.destroy_deployment import sweep_orphans, teardown_engine
+
+    pattern = _resolve_pattern(project_name, pattern)
+    project_resources = sweep_orphans.list_project_resources(aws_region=aws_region).get(project_name) or []
+    _common_.info_logger(f"{project_name} ({pattern}) has {len(project_resources)} tagged resources in {aws_region}")
+    for each_resource in project_resources:
+        _common_.info_logger(f"    {each_resource.get('ResourceARN')}")
+
+    waves = teardown_engine.plan(_pattern_resources(pattern, project_name, api_gateway_api_name, api_type,
+                                                    api_method, aws_account_number, aws_region))
+    _common_.info_logger("destroy would delete, a step at a time:")
+    for step, each_wave in enumerate(waves, start=1):
+        _common_.info_logger(f"    {step}) {', '.join(each_wave)}")
+
+
+@click.command()
+@click.option('--project_name', type=str, help="every project if empty")
+@click.option('--aws_region', default="us-east-1", type=str, show_default=True)
+def status(project_name: str, aws_region: str):
+    """show the deployments recorded on this machine and the tagged resources of every project in aws"""
+    _session.install()
+    from _deployment.destroy_deployment import sweep_orphans
+
+    state = sweep_orphans.load_deployment_state() or {}
+    projects = sweep_orphans.list_project_resources(aws_region=aws_region)
+    projects.pop(None, None)
+
+    for each_project in sorted(set(state) | set(projects)):
+        if project_name and each_project != project_name:
+            continue
+        if recorded := state.get(each_project):
+            deployment = f"{recorded.get('pattern')} deployed to {recorded.get('aws_region')} at {recorded.get('deployed_at')}"
+        else:
+            deployment = "not recorded on this machine"
+        _common_.info_logger(f"{each_project}: {deployment}, {len(projects.get(each_project) or [])} tagged resources "
+                             f"in {aws_region}")
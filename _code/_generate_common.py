@@ -2,7 +2,6 @@ import inspect
 import re
 import importlib
 from typing import Dict
-from jinja2 import Template
 from _common import _common as _common_
 
 @_common_.exception_handlers(logger=None)
@@ -24,6 +23,8 @@ def extract_returned_function_name_with_inspect(function: callable) -> str:
 
 @_common_.exception_handlers(logger=None)
 def apply_template(template: str, params: Dict) -> str:
+    from jinja2 import Template
+
     return Template(template).render(params)
 
 @_common_.exception_handlers(logger=None)
@@ -41,6 +41,17 @@ def convert_lambda_function(declare_variables: str,
     return _generate_common.apply_template(lambda_handler_template, _params)
 
 
+@_common_.exception_handlers(logger=None)
+def get_main_parameters(filepath: str) -> list:
+    """
+    Return the parameter names of main() in the project, these are passed to lambda as query string parameters.
+    """
+    module = _generate_common.load_module_from_path('main', os.path.join(filepath, "main.py"))
+    if not hasattr(module, 'main'):
+        return []
+    return _generate_common.extract_main_param_with_inspect(getattr(module, 'main'))
+
+
 @_common_.exception_handlers(logger=None)
 def generate_lambda_handler(filepath: str) -> bool:
     """
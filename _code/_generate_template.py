@@ -13,7 +13,12 @@ def lambda_handler(event, context):
     
 {{ declare_variables }}
     try:
-        query_params = event.get('queryStringParameters', {})
+        # rest api (payload 1.0) sends queryStringParameters as null when there is no query string,
+        # http api (payload 2.0) omits the key and always carries rawQueryString
+        query_params = event.get('queryStringParameters') or {}
+        if not query_params and event.get('rawQueryString'):
+            from urllib.parse import parse_qsl
+            query_params = dict(parse_qsl(event.get('rawQueryString')))
         print(query_params)
         if query_params:
 {{ variables_extraction }}
@@ -1,5 +1,6 @@
 import os
 import time
+import random
 import functools
 import asyncio
 from sys import exit
@@ -8,10 +9,10 @@ from logging import Logger as Log
 from time import sleep
 from itertools import zip_longest
 from functools import wraps
+from threading import local
 import uuid
 from typing import List, Union, Tuple, Callable, Dict, Any, TypeVar
 from inspect import currentframe, getmembers, isfunction
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 
 
 RT = TypeVar('RT')  # return type
@@ -265,8 +266,45 @@ class UnexpectedError(AWSsdkError):
         super().__init__(message, error_code)
 
 
+class ThrottledError(AWSsdkError):
+    """Exception raised when aws keeps throttling a request after every retry."""
+    def __init__(self, message, error_code=4001):
+        super().__init__(message, error_code)
+
+
+# error codes of throttled requests, the request was not executed so it is always safe to send again
+_THROTTLING_ERROR_CODES_ = frozenset({
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "SlowDown",
+    "EC2ThrottledException",
+    "ProvisionedThroughputExceededException",
+    "PriorRequestNotComplete",
+})
+# retries of an idempotent function on top of the retries of botocore, see aws_client_handle_exceptions
+_THROTTLING_RETRY_ATTEMPTS_ = 4
+_THROTTLING_RETRY_BASE_DELAY_ = 2
+_THROTTLING_RETRY_MAX_DELAY_ = 30
+# set while an idempotent function retries, the idempotent functions it calls leave the retries to it
+_THROTTLING_RETRY_STATE_ = local()
+
+
+def is_throttling_error(err: Exception) -> bool:
+    """whether aws rejected the request because of its rate limits"""
+    from botocore.exceptions import ClientError
+
+    return isinstance(err, ClientError) and err.response.get("Error", {}).get("Code") in _THROTTLING_ERROR_CODES_
+
+
 def aws_handle_exceptions(func):
     def wrapper(*args, **kwargs):
+        # botocore is imported by the first call, not by every module importing _common
+        from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
         try:
             return func(*args, **kwargs)
         except NoCredentialsError:
@@ -315,10 +353,21 @@ class ClientException(Exception):
         return self.message
 
 
-def aws_client_handle_exceptions(not_found_code: str = "", aws_client_exception=ClientException, logger: Log = None):
+def aws_client_handle_exceptions(not_found_code: str = "",
+                                 aws_client_exception=ClientException,
+                                 logger: Log = None,
+                                 idempotent: bool = False):
+    """handle the errors of a function calling aws
+
+    a ClientError with not_found_code returns False, throttling still failing after the botocore retries raises
+    ThrottledError (an idempotent function is called again with backoff first, only the outermost idempotent
+    function of a call chain retries so the attempts do not multiply), any other ClientError raises
+    UnexpectedError and any other exception ends the program
+
+    """
     def decorate(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
+        def _call(*args, **kwargs):
+            from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
             try:
                 return func(*args, **kwargs)
             except aws_client_exception:
@@ -333,13 +382,41 @@ def aws_client_handle_exceptions(not_found_code: str = "", aws_client_exception=
                 if err.response.get("Error", {}).get("Code") == not_found_code:
                     info_logger(f"warning: in function {func.__name__}, encounter {not_found_code}")
                     return False
+                if is_throttling_error(err):
+                    raise ThrottledError(f"Throttled: {err}") from err
                 raise UnexpectedError(f"Unexpected error: {err}")
+            except ThrottledError:
+                # raised by a nested call, throttling is left to the caller instead of ending the program
+                raise
             except Exception as err:
                 error_logger(func.__name__,
                              err,
                              logger=None,
                              mode="error",
                              ignore_flag=False)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not idempotent or getattr(_THROTTLING_RETRY_STATE_, "retrying", False):
+                return _call(*args, **kwargs)
+
+            _THROTTLING_RETRY_STATE_.retrying = True
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        return _call(*args, **kwargs)
+                    except ThrottledError as err:
+                        if attempt >= _THROTTLING_RETRY_ATTEMPTS_:
+                            raise
+                        delay = min(_THROTTLING_RETRY_BASE_DELAY_ * 2 ** attempt, _THROTTLING_RETRY_MAX_DELAY_)
+                        delay = random.uniform(delay / 2, delay)
+                        info_logger(f"warning: in function {func.__name__}, still throttled, "
+                                    f"retrying in {delay:.1f} seconds: {err}")
+                    sleep(delay)
+                    attempt += 1
+            finally:
+                _THROTTLING_RETRY_STATE_.retrying = False
         return wrapper
     return decorate
 
@@ -7,13 +7,17 @@ from logging import Logger as Log
 from _config import _config as _config_
 from _common import _common as _common_
 from _meta import _meta as _meta_
-from _api import _github
 
 
 RT = TypeVar("RT")
 
 __version__ = "0.5"
 
+# modules defining the reference objects, imported when their object type is requested
+_OBJECT_MODULES_ = {
+    "github": "_api._github",
+}
+
 
 @contextlib.contextmanager
 def create_session(object_type: str, logger: Log = None) -> Callable:
@@ -28,6 +32,11 @@ def create_session(object_type: str, logger: Log = None) -> Callable:
     """
     _config = _config_.PGConfigSingleton()
 
+    if object_module := _OBJECT_MODULES_.get(object_type.lower()):
+        # importing the module registers its PGObject classes
+        import importlib
+        importlib.import_module(object_module)
+
     _object_dict = {_object_name.lower(): _object_val for _object_name, _object_val in
                     _meta_.PGObjectSingleton().object_registration.items()}
 
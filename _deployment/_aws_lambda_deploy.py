@@ -995,10 +995,6 @@ def create_api_gateway_integration(aws_region: str,
     return False
 
 
-import boto3
-from botocore.exceptions import ClientError
-
-
 def get_api_gateway_method_response(aws_region: str,
                                     api_gateway_api_id: str,
                                     resource_id: str,
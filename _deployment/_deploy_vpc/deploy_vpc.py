@@ -0,0 +1,213 @@
+from typing import List, Union, Dict
+import ipaddress
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_CIDR_BLOCK_ = "10.0.0.0/16"
+# every subnet is a sixteenth of the vpc, e.g. /20 subnets in a /16 vpc
+_SUBNET_PREFIX_LENGTH_DELTA_ = 4
+_ZONE_COUNT_ = 2
+
+# image pulls need ecr.api (token, manifests) and ecr.dkr (docker registry), the layers themselves are served
+# from s3 through the gateway endpoint, logs keeps the awslogs driver and the cloudwatch agent off the internet
+_INTERFACE_ENDPOINTS_ = ("ecr.api", "ecr.dkr", "logs")
+_GATEWAY_ENDPOINTS_ = ("s3",)
+
+
+def get_vpc_name(project_name: str) -> str:
+    """Name tag of the vpc of a project"""
+    return f"vpc-{project_name}"
+
+
+def _next_cidr_blocks(vpc_cidr_block: str, used_cidr_blocks: List[str], count: int) -> List[str]:
+    # the first free blocks of the vpc, blocks overlapping an existing subnet are skipped
+    vpc_network = ipaddress.ip_network(vpc_cidr_block)
+    used = [ipaddress.ip_network(each_block) for each_block in used_cidr_blocks]
+    return [str(each_block)
+            for each_block in vpc_network.subnets(prefixlen_diff=_SUBNET_PREFIX_LENGTH_DELTA_)
+            if not any(each_block.overlaps(each_used) for each_used in used)][:count]
+
+
+def _ensure_subnets(project_name: str,
+                    vpc_id: str,
+                    vpc_cidr_block: str,
+                    zones: List[str],
+                    tags: Dict[str, str],
+                    aws_region: str
+                    ) -> Dict[str, List[str]]:
+    from _aws import _vpc
+
+    subnets = _vpc.get_subnets(vpc_id, aws_region=aws_region) or []
+    existing = {(each_subnet.get("Tier"), each_subnet.get("AvailabilityZone")): each_subnet.get("SubnetId")
+                for each_subnet in subnets}
+    missing = [(tier, zone) for tier in ("public", "private") for zone in zones if (tier, zone) not in existing]
+    cidr_blocks = _next_cidr_blocks(vpc_cidr_block, [each_subnet.get("CidrBlock") for each_subnet in subnets], len(missing))
+    if len(cidr_blocks) < len(missing):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"vpc {vpc_id} ({vpc_cidr_block}) has no room for {len(missing)} more subnets",
+                              logger=None,
+                              mode="error",
+                              ignore_flag=False)
+
+    for (tier, zone), cidr_block in zip(missing, cidr_blocks):
+        existing[(tier, zone)] = _vpc.create_subnet(vpc_id=vpc_id,
+                                                    cidr_block=cidr_block,
+                                                    availability_zone=zone,
+                                                    subnet_name=f"{project_name}-{tier}-{zone}",
+                                                    tier=tier,
+                                                    tags=tags,
+                                                    aws_region=aws_region)
+    return {tier: [existing.get((tier, zone)) for zone in zones] for tier in ("public", "private")}
+
+
+def _ensure_route_tables(project_name: str,
+                         vpc_id: str,
+                         subnet_ids: Dict[str, List[str]],
+                         tags: Dict[str, str],
+                         aws_region: str
+                         ) -> Dict[str, str]:
+    from _aws import _vpc
+
+    if not (gateway_id := _vpc.get_internet_gateway(vpc_id, aws_region=aws_region)):
+        gateway_id = _vpc.create_internet_gateway(vpc_id, f"igw-{project_name}", tags=tags, aws_region=aws_region)
+
+    route_tables = {each_table.get("Tier"): each_table
+                    for each_table in _vpc.get_route_tables(vpc_id, aws_region=aws_region) or [] if each_table.get("Tier")}
+    route_table_ids = {}
+    for tier in ("public", "private"):
+        if tier in route_tables:
+            route_table_ids[tier] = route_tables.get(tier).get("RouteTableId")
+            associated = route_tables.get(tier).get("SubnetIds")
+        else:
+            # private subnets have no route to the internet, aws services are reached through the endpoints
+            route_table_ids[tier] = _vpc.create_route_table(vpc_id=vpc_id,
+                                                            route_table_name=f"rtb-{project_name}-{tier}",
+                                                            tier=tier,
+                                                            internet_gateway_id=gateway_id if tier == "public" else None,
+                                                            tags=tags,
+                                                            aws_region=aws_region)
+            associated = []
+        if unassociated := [each_id for each_id in subnet_ids.get(tier) if each_id not in associated]:
+            _vpc.associate_route_table(route_table_ids.get(tier), unassociated, aws_region=aws_region)
+    return route_table_ids
+
+
+def _ensure_endpoint_security_group(project_name: str,
+                                    vpc_id: str,
+                                    vpc_cidr_block: str,
+                                    tags: Dict[str, str],
+                                    aws_region: str
+                                    ) -> str:
+    from _aws import ec2
+
+    sg_name = f"sg-{project_name}-vpc-endpoints"
+    if sg_id := ec2.get_security_group_id(sg_name=sg_name, vpc_id=vpc_id, aws_region=aws_region):
+        return sg_id
+    sg_id = ec2.create_security_group(sg_name=sg_name, vpc_id=vpc_id, tags=tags, aws_region=aws_region)
+    ec2.create_sg_ingress_rules(sg_id=sg_id,
+                                sg_ingress_rules=[{"IpProtocol": "tcp",
+                                                   "FromPort": 443,
+                                                   "ToPort": 443,
+                                                   "IpRanges": [{"CidrIp": vpc_cidr_block,
+                                                                 "Description": "https from the vpc"}]}],
+                                aws_region=aws_region)
+    return sg_id
+
+
+@_common_.aws_client_handle_exceptions()
+def run(project_name: str,
+        cidr_block: str = _CIDR_BLOCK_,
+        zone_count: int = _ZONE_COUNT_,
+        interface_endpoints: List[str] = _INTERFACE_ENDPOINTS_,
+        aws_region: str = "us-east-1",
+        logger: Log = None
+        ) -> Union[Dict, None]:
+
+    """create (or complete) the vpc of a project with public and private subnets and vpc endpoints
+
+    every availability zone gets a public and a private subnet, the public subnets route to an internet gateway,
+    the private subnets have no nat and reach ecr and cloudwatch logs through interface endpoints and s3 (image
+    layers) through a gateway endpoint. the endpoints use private dns so docker, the aws cli and lambda pull
+    images over the aws network without any configuration, from the public subnets as well. existing pieces of
+    the vpc are reused, so running it again only adds what is missing
+
+    Args:
+        project_name: project name
+        cidr_block: cidr block of a new vpc
+        zone_count: number of availability zones
+        interface_endpoints: services reached through interface endpoints, e.g. ecr.api, ecr.dkr, logs
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        {"vpc_id", "public_subnet", "public_subnets", "private_subnets", "endpoint_security_group_id",
+         "vpc_endpoints": {service name: endpoint id}}, the keys of ec2.define_network are included
+
+    """
+    from _aws import _vpc, _tagging
+
+    tags = _tagging.project_tags(project_name)
+
+    if vpc := _vpc.find_vpc_by_tag("Name", get_vpc_name(project_name), aws_region=aws_region):
+        vpc_id, cidr_block = vpc.get("VpcId"), vpc.get("CidrBlock")
+        _common_.info_logger(f"reusing vpc {vpc_id} ({cidr_block})", logger=logger)
+    else:
+        vpc_id = _vpc.create_vpc(cidr_block, get_vpc_name(project_name), tags=tags, aws_region=aws_region)
+
+    if len(zones := (_vpc.get_availability_zones(aws_region=aws_region) or [])[:zone_count]) < zone_count:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"{aws_region} has only {len(zones)} availability zones, {zone_count} requested",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    subnet_ids = _ensure_subnets(project_name, vpc_id, cidr_block, zones, tags, aws_region)
+    route_table_ids = _ensure_route_tables(project_name, vpc_id, subnet_ids, tags, aws_region)
+    sg_id = _ensure_endpoint_security_group(project_name, vpc_id, cidr_block, tags, aws_region)
+
+    endpoints = {each_service: each_endpoint.get("VpcEndpointId")
+                 for each_service, each_endpoint in (_vpc.get_vpc_endpoints(vpc_id, aws_region=aws_region) or {}).items()}
+    created = []
+    for endpoint_type, services in (("Interface", interface_endpoints), ("Gateway", _GATEWAY_ENDPOINTS_)):
+        for each_service in services:
+            if (service_name := f"com.amazonaws.{aws_region}.{each_service}") in endpoints:
+                continue
+            endpoints[service_name] = _vpc.create_vpc_endpoint(vpc_id=vpc_id,
+                                                               service_name=service_name,
+                                                               endpoint_type=endpoint_type,
+                                                               subnet_ids=subnet_ids.get("private"),
+                                                               security_group_ids=[sg_id],
+                                                               route_table_ids=list(route_table_ids.values()),
+                                                               tags=tags,
+                                                               aws_region=aws_region)
+            created.append(endpoints[service_name])
+
+    # the private dns names only resolve to the endpoints once they are available
+    if created and not _vpc.wait_for_vpc_endpoints(vpc_id, created, aws_region=aws_region):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"vpc endpoints {created} did not become available",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    return {"vpc_id": vpc_id,
+            "public_subnet": subnet_ids.get("public")[0],
+            "public_subnets": subnet_ids.get("public"),
+            "private_subnets": subnet_ids.get("private"),
+            "endpoint_security_group_id": sg_id,
+            "vpc_endpoints": endpoints}
+
+
+def destroy(project_name: str,
+            aws_region: str = "us-east-1",
+            logger: Log = None
+            ) -> bool:
+    """delete the vpc of the project with everything in it, the instances and load balancers need to be gone"""
+    from _aws import _vpc
+
+    if not (vpc := _vpc.find_vpc_by_tag("Name", get_vpc_name(project_name), aws_region=aws_region)):
+        _common_.info_logger(f"vpc {get_vpc_name(project_name)} does not exist", logger=logger)
+        return True
+    return _vpc.delete_vpc(vpc.get("VpcId"), aws_region=aws_region)
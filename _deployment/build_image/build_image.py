@@ -12,7 +12,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Union, Dict
 import os
 import boto3
 from logging import Logger as Log
@@ -12,7 +12,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 
 _WAIT_TIME_ = 4
@@ -85,6 +84,7 @@ def delete_ecr_repository(repository_name,
 
 def create_ecr_repository(repository_name: str,
                           aws_region: str = "us-east-1",
+                          tags: Dict = None,
                           logger: Log = None
                           ) -> Union[List, None]:
     """Creates an Amazon ECR repository.
@@ -92,7 +92,7 @@ def create_ecr_repository(repository_name: str,
     Args:
         repository_name: The name of the repository to delete.
         aws_region: aws region
-        tags: If True, deletes the repository even if it contains images.
+        tags: tags of the repository, tag key -> tag value
         logger: The logger object to use for logging.
 
     return:
@@ -104,6 +104,9 @@ def create_ecr_repository(repository_name: str,
         _parameters = {
             "repositoryName": repository_name
         }
+        if tags:
+            from _aws import _tagging
+            _parameters["tags"] = _tagging.to_tag_list(tags)
         response = ecr_client.create_repository(**_parameters)
         _common_.info_logger(f"Repository '{repository_name}' created successfully.")
         return [response.get("repository", {}).get("repositoryArn"), response.get("repository", {}).get("repositoryUri")]
@@ -122,13 +125,54 @@ def create_ecr_repository(repository_name: str,
                                   ignore_flag=False)
 
 
+def get_image_digest(repository_name: str,
+                     image_tag: str = "latest",
+                     aws_region: str = "us-east-1",
+                     logger: Log = None
+                     ) -> Union[str, None]:
+    """Returns the digest of a tagged image in an Amazon ECR repository.
+
+    Args:
+        repository_name: The name of the repository.
+        image_tag: The image tag.
+        aws_region: aws region
+        logger: The logger object to use for logging.
+
+    return:
+        the image digest, None if the image does not exist
+    """
+    ecr_client = aws_client("ecr", aws_region)
+
+    try:
+        _parameters = {
+            "repositoryName": repository_name,
+            "imageIds": [{"imageTag": image_tag}]
+        }
+        response = ecr_client.describe_images(**_parameters)
+        return next((each_image.get("imageDigest") for each_image in response.get("imageDetails", [])), None)
+    except NoCredentialsError:
+        _common_.info_logger("Error: No AWS credentials found.")
+    except PartialCredentialsError:
+        _common_.info_logger("Error: Incomplete AWS credentials found.")
+    except ClientError as err:
+        if err.response.get("Error", {}).get("Code", "") in ('RepositoryNotFoundException', 'ImageNotFoundException'):
+            _common_.info_logger(f"Error: Image '{repository_name}:{image_tag}' not found.")
+        else:
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  err,
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+
+
 def run(ecr_repository_name: str,
         aws_region: str,
         aws_account_number: str = None,
         project_path: str = None,
         lambda_function_name: str = None,
         lambda_function_role: str = None,
-        api_gateway_api_name: str = None) -> None:
+        api_gateway_api_name: str = None,
+        project_name: str = None) -> None:
     """this function is to create the resources needed for the deployment
 
     Args:
@@ -139,6 +183,7 @@ def run(ecr_repository_name: str,
         lambda_function_name: lambda function name
         lambda_function_role: lambda function role
         api_gateway_api_name: api gateway api name
+        project_name: project name, used for tagging
 
     Returns:
         bool: True if the resources are destroyed successfully, False otherwise
@@ -150,8 +195,12 @@ def run(ecr_repository_name: str,
         delete_ecr_repository(ecr_repository_name, aws_region=aws_region, force=True)
         sleep(_WAIT_TIME_)
 
+    from _aws import _tagging
+
     # Create ECR repository
-    ecr_arn, ecr_image_uri = create_ecr_repository(ecr_repository_name, aws_region=aws_region)
+    ecr_arn, ecr_image_uri = create_ecr_repository(ecr_repository_name,
+                                                   aws_region=aws_region,
+                                                   tags=_tagging.project_tags(project_name) if project_name else None)
     sleep(_WAIT_TIME_)
 
 
@@ -12,7 +12,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -25,18 +24,12 @@ def aws_client(service_name: str, aws_region: str):
 def get_api_gateway_id(aws_region: str,
                        api_gateway_api_name: str):
 
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-
-    # Get the API Gateway API ID
-    api_gateway_api_id = []
+    if not api_gateway_api_name:
+        return None
 
-    if api_gateway_api_name:
-        apis_response = apigateway_client.get_rest_apis()
-        sleep(_WAIT_TIME_)
-        api_gateway_api_id = [item.get("id") for item in apis_response.get("items") if
-                              api_gateway_api_name == item.get("name")]
-
-    return api_gateway_api_id[0] if len(api_gateway_api_id) > 0 else None
+    # served from the paginated rest api index in _aws._api_gateway
+    from _aws import _api_gateway
+    return _api_gateway.api_gateway_get_name(api_gateway_name=api_gateway_api_name, aws_region=aws_region)
 
 
 @_common_.aws_client_handle_exceptions()
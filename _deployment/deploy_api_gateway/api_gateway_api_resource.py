@@ -1,17 +1,7 @@
-import boto3
 from logging import Logger as Log
 from typing import Union, List
-from inspect import currentframe
-import subprocess
-import json
 from time import sleep
-from boto3 import client
-import base64
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 from _common import _common as _common_
-from _engine import _engine as _engine_
-from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -20,7 +10,7 @@ def get_api_gateway_resource_id(aws_region: str,
                                 api_gateway_api_id: str,
                                 lambda_function_name: str) -> Union[str, None]:
 
-    """Checks if an API Gateway resource exists.
+    """Checks if an API Gateway resource exists, looked up in the resource index of _aws._api_gateway
 
     Args:
         aws_region: aws region
@@ -31,39 +21,22 @@ def get_api_gateway_resource_id(aws_region: str,
         the id of the resource if it exists, None otherwise.
 
     """
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-    try:
-        # Get the list of resources
-        resources = apigateway_client.get_resources(restApiId=api_gateway_api_id)
-
-        # Find the resource ID if it exists
-        resource_id = next((item.get("id") for item in resources.get("items", []) if item.get("pathPart") == lambda_function_name), None)
-        if resource_id:
-            _common_.info_logger(f"Resource '{lambda_function_name}' exists with ID: {resource_id}.")
-            return resource_id
-        else:
-            _common_.info_logger(f"Resource '{lambda_function_name}' not found.")
-            return None
-
-    except NoCredentialsError:
-        _common_.info_logger("Error: No AWS credentials found.")
-    except PartialCredentialsError:
-        _common_.info_logger("Error: Incomplete AWS credentials found.")
-    except ClientError as err:
-        _common_.info_logger(f"ClientError: {err.response.get('Error', {}).get('Message')}")
-    except Exception as err:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              err,
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-    return None
+    from _aws import _api_gateway
+
+    resource_id = _api_gateway.get_api_gateway_resource_id(api_gateway_api_id=api_gateway_api_id,
+                                                           lambda_function_name=lambda_function_name,
+                                                           aws_region=aws_region)
+    if resource_id:
+        _common_.info_logger(f"Resource '{lambda_function_name}' exists with ID: {resource_id}.")
+    else:
+        _common_.info_logger(f"Resource '{lambda_function_name}' not found.")
+    return resource_id
 
 
 def delete_api_gateway_resource(aws_region: str,
                                 api_gateway_api_id: str,
                                 resource_id: str):
-    """Deletes an API Gateway resource.
+    """Deletes an API Gateway resource and removes it from the resource index of _aws._api_gateway
 
     Args:
         aws_region: aws region
@@ -74,37 +47,18 @@ def delete_api_gateway_resource(aws_region: str,
         True if the resource was deleted successfully, False otherwise.
 
     """
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-    try:
-
-        _parameter = {
-            "restApiId": api_gateway_api_id,
-            "resourceId": resource_id
-        }
-        apigateway_client.delete_resource(**_parameter)
-        _common_.info_logger(f"Resource with ID '{resource_id}' deleted successfully.")
-        return True
-
-    except NoCredentialsError:
-        _common_.info_logger("Error: No AWS credentials found.")
-    except PartialCredentialsError:
-        _common_.info_logger("Error: Incomplete AWS credentials found.")
-    except ClientError as err:
-        _common_.info_logger(f"ClientError: {err.response.get('Error', {}).get('Message')}")
-    except Exception as err:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              err,
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-    return False
+    from _aws import _api_gateway
+
+    return _api_gateway.delete_api_gateway_resource(api_gateway_api_id=api_gateway_api_id,
+                                                    resource_id=resource_id,
+                                                    aws_region=aws_region)
 
 
 def create_api_gateway_resource(aws_region: str,
                                 api_gateway_api_id: str,
                                 api_gateway_root_res_id: str,
                                 lambda_function_name: str) -> Union[str, None]:
-    """Creates a new API Gateway resource.
+    """Creates a new API Gateway resource and records it in the resource index of _aws._api_gateway
 
     Args:
         aws_region: aws region
@@ -116,31 +70,12 @@ def create_api_gateway_resource(aws_region: str,
         the id of the newly created resource.
 
     """
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-    try:
-        # Create the new resource
-        _parameters = {
-            "restApiId": api_gateway_api_id,
-            "parentId": api_gateway_root_res_id,
-            "pathPart": lambda_function_name
-        }
-        resource_response = apigateway_client.create_resource(**_parameters)
-        _common_.info_logger(f"Resource '{lambda_function_name}' created successfully.")
-        return resource_response.get("id")
-
-    except NoCredentialsError:
-        _common_.info_logger("Error: No AWS credentials found.")
-    except PartialCredentialsError:
-        _common_.info_logger("Error: Incomplete AWS credentials found.")
-    except ClientError as e:
-        _common_.info_logger(f"ClientError: {e.response['Error']['Message']}")
-    except Exception as err:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              err,
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-    return None
+    from _aws import _api_gateway
+
+    return _api_gateway.create_api_gateway_resource(api_gateway_api_id=api_gateway_api_id,
+                                                    api_gateway_root_res_id=api_gateway_root_res_id,
+                                                    lambda_function_name=lambda_function_name,
+                                                    aws_region=aws_region)
 
 
 def run(ecr_repository_name: str,
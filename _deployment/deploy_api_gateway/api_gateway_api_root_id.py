@@ -10,7 +10,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -22,13 +21,6 @@ def aws_client(service_name: str, aws_region: str):
 def get_api_gateway_root_id(aws_region: str,
                             api_gateway_api_id: str):
 
-    apigateway_client = boto3.client('apigateway', region_name=aws_region)
-
-    # Get the API Gateway API root ID
-    response = apigateway_client.get_resources(restApiId=api_gateway_api_id)
-
-    sleep(_WAIT_TIME_)
-    api_gateway_root_res_id = [item.get("id") for item in response.get("items") if item.get("path") == '/']
-
-    return api_gateway_root_res_id[0] if len(api_gateway_root_res_id) > 0 else None
-
+    # served from the paginated resource index in _aws._api_gateway
+    from _aws import _api_gateway
+    return _api_gateway.api_gateway_get_root_resource(api_gateway_api_id=api_gateway_api_id, aws_region=aws_region)
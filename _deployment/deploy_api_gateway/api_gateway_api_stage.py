@@ -0,0 +1,273 @@
+from typing import List, Dict, Union
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+_WAIT_TIME_ = 4
+
+# performance profile method setting -> (patch path suffix, field name in get_stage methodSettings)
+_METHOD_SETTINGS_ = {
+    "caching_enabled": ("caching/enabled", "cachingEnabled"),
+    "cache_ttl_in_seconds": ("caching/ttlInSeconds", "cacheTtlInSeconds"),
+    "cache_data_encrypted": ("caching/dataEncrypted", "cacheDataEncrypted"),
+    "throttling_rate_limit": ("throttling/rateLimit", "throttlingRateLimit"),
+    "throttling_burst_limit": ("throttling/burstLimit", "throttlingBurstLimit"),
+}
+
+
+def default_performance_profile(resource_path: str,
+                                http_method: str = "GET",
+                                cache_key_parameters: List[str] = None
+                                ) -> Dict:
+    """performance profile for a read heavy lambda proxy endpoint
+
+    a 0.5 GB stage cache answers repeated GET requests without invoking lambda, the stage is throttled
+    to protect the function and responses larger than 1 KB are compressed
+
+    Args:
+        resource_path: resource path of the method, e.g. /lambda-my_project
+        http_method: the http method
+        cache_key_parameters: query string parameters the cache is keyed on
+
+    Returns:
+        the performance profile
+
+    """
+    return {
+        "minimum_compression_size": 1024,
+        "stage": {
+            "cache_cluster_enabled": True,
+            "cache_cluster_size": "0.5",
+            "throttling_rate_limit": 100,
+            "throttling_burst_limit": 200,
+        },
+        "methods": [
+            {
+                "resource_path": resource_path,
+                "http_method": http_method,
+                "caching_enabled": http_method == "GET",
+                "cache_ttl_in_seconds": 300,
+                "cache_key_parameters": cache_key_parameters or [],
+            }
+        ]
+    }
+
+
+def get_method_profile(performance_profile: Dict,
+                       resource_path: str,
+                       http_method: str
+                       ) -> Dict:
+    """find the method level settings of the profile for a resource path and http method"""
+    for each_method in (performance_profile or {}).get("methods", []):
+        if each_method.get("resource_path") == resource_path and each_method.get("http_method", "GET") == http_method:
+            return each_method
+    return {}
+
+
+def get_cache_key_parameters(performance_profile: Dict,
+                             resource_path: str,
+                             http_method: str
+                             ) -> List[str]:
+    """cache key parameters of a method as method request parameter names
+
+    plain names are treated as query string parameters, e.g. name -> method.request.querystring.name
+
+    """
+    return [each_key if each_key.startswith("method.request.") else f"method.request.querystring.{each_key}"
+            for each_key in get_method_profile(performance_profile, resource_path, http_method).get("cache_key_parameters", [])]
+
+
+def _format_value(value) -> str:
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _is_same(current, desired) -> bool:
+    if current is None:
+        return False
+    if isinstance(desired, bool) or isinstance(current, bool):
+        return bool(current) == bool(desired)
+    try:
+        return float(current) == float(desired)
+    except (TypeError, ValueError):
+        return str(current) == str(desired)
+
+
+def _method_setting_operations(settings: Dict,
+                               current_settings: Dict,
+                               patch_prefix: str
+                               ) -> List[Dict]:
+    _operations = []
+    for _name, (_path, _field) in _METHOD_SETTINGS_.items():
+        if _name in settings and not _is_same(current_settings.get(_field), settings.get(_name)):
+            _operations.append({"op": "replace",
+                                "path": f"{patch_prefix}/{_path}",
+                                "value": _format_value(settings.get(_name))})
+    return _operations
+
+
+def stage_patch_operations(performance_profile: Dict,
+                           current_stage: Dict
+                           ) -> List[Dict]:
+    """compute the update_stage patch operations needed to bring the stage to the profile
+
+    Args:
+        performance_profile: the desired performance profile
+        current_stage: current stage as returned by get_stage
+
+    Returns:
+        list of patch operations, empty if the stage already matches
+
+    """
+    current_stage = current_stage or {}
+    stage_settings = performance_profile.get("stage", {})
+    current_method_settings = current_stage.get("methodSettings", {})
+    _operations = []
+
+    if "cache_cluster_enabled" in stage_settings and \
+            not _is_same(current_stage.get("cacheClusterEnabled", False), stage_settings.get("cache_cluster_enabled")):
+        _operations.append({"op": "replace",
+                            "path": "/cacheClusterEnabled",
+                            "value": _format_value(stage_settings.get("cache_cluster_enabled"))})
+
+    if stage_settings.get("cache_cluster_enabled") and "cache_cluster_size" in stage_settings and \
+            not _is_same(current_stage.get("cacheClusterSize"), stage_settings.get("cache_cluster_size")):
+        _operations.append({"op": "replace",
+                            "path": "/cacheClusterSize",
+                            "value": _format_value(stage_settings.get("cache_cluster_size"))})
+
+    # stage wide defaults apply to every method
+    _operations.extend(_method_setting_operations(stage_settings,
+                                                  current_method_settings.get("*/*", {}),
+                                                  "/*/*"))
+
+    # method level overrides, api gateway escapes "/" in the resource path as "~1"
+    for each_method in performance_profile.get("methods", []):
+        _method_key = f"{each_method.get('resource_path', '/').replace('/', '~1')}/{each_method.get('http_method', 'GET')}"
+        _operations.extend(_method_setting_operations(each_method,
+                                                      current_method_settings.get(_method_key, {}),
+                                                      f"/{_method_key}"))
+    return _operations
+
+
+def rest_api_patch_operations(performance_profile: Dict,
+                              current_rest_api: Dict
+                              ) -> List[Dict]:
+    """compute the update_rest_api patch operations needed to bring the rest api to the profile
+
+    Args:
+        performance_profile: the desired performance profile
+        current_rest_api: current rest api as returned by get_rest_api
+
+    Returns:
+        list of patch operations, empty if the rest api already matches
+
+    """
+    if "minimum_compression_size" not in performance_profile:
+        return []
+
+    minimum_compression_size = performance_profile.get("minimum_compression_size")
+    current_compression_size = (current_rest_api or {}).get("minimumCompressionSize")
+
+    if minimum_compression_size is None:
+        # an empty value disables compression
+        return [{"op": "replace", "path": "/minimumCompressionSize", "value": ""}] \
+            if current_compression_size is not None else []
+
+    if _is_same(current_compression_size, minimum_compression_size):
+        return []
+    return [{"op": "replace", "path": "/minimumCompressionSize", "value": _format_value(minimum_compression_size)}]
+
+
+def apply_rest_api_profile(api_gateway_api_id: str,
+                           performance_profile: Dict,
+                           aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> bool:
+    """apply the api level settings (compression) of the profile, needs to run before the deployment is created
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        performance_profile: the desired performance profile
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the rest api matches the profile
+
+    """
+    from _aws import _api_gateway
+
+    current_rest_api = _api_gateway.get_api_gateway_rest_api(api_gateway_api_id=api_gateway_api_id,
+                                                             aws_region=aws_region)
+    if not (_operations := rest_api_patch_operations(performance_profile, current_rest_api)):
+        _common_.info_logger(f"rest api {api_gateway_api_id} already matches the performance profile", logger=logger)
+        return True
+
+    return _api_gateway.update_api_gateway_rest_api(api_gateway_api_id=api_gateway_api_id,
+                                                    patch_operations=_operations,
+                                                    aws_region=aws_region)
+
+
+def apply_stage_profile(api_gateway_api_id: str,
+                        api_stage_name: str,
+                        performance_profile: Dict,
+                        aws_region: str = "us-east-1",
+                        logger: Log = None
+                        ) -> bool:
+    """apply the stage and method level settings (cache cluster, cache ttl, throttling) of the profile
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        api_stage_name: the name of the stage, needs to exist already
+        performance_profile: the desired performance profile
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the stage matches the profile
+
+    """
+    from _aws import _api_gateway
+
+    current_stage = _api_gateway.get_api_gateway_stage(api_gateway_api_id=api_gateway_api_id,
+                                                       api_stage_name=api_stage_name,
+                                                       aws_region=aws_region)
+    if not current_stage:
+        _common_.info_logger(f"stage {api_stage_name} does not exist for {api_gateway_api_id}, "
+                             f"skip applying the performance profile", logger=logger)
+        return False
+
+    if not (_operations := stage_patch_operations(performance_profile, current_stage)):
+        _common_.info_logger(f"stage {api_stage_name} already matches the performance profile", logger=logger)
+        return True
+
+    return _api_gateway.update_api_gateway_stage(api_gateway_api_id=api_gateway_api_id,
+                                                 api_stage_name=api_stage_name,
+                                                 patch_operations=_operations,
+                                                 aws_region=aws_region)
+
+
+def run(api_gateway_api_id: str,
+        api_stage_name: str,
+        performance_profile: Union[Dict, None],
+        aws_region: str = "us-east-1",
+        logger: Log = None
+        ) -> bool:
+    """apply a performance profile to an api gateway api and one of its stages
+
+    Args:
+        api_gateway_api_id: the id of the api gateway api
+        api_stage_name: the name of the stage
+        performance_profile: the desired performance profile, nothing is applied if empty
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if both the rest api and the stage match the profile
+
+    """
+    if not performance_profile:
+        return True
+
+    return apply_rest_api_profile(api_gateway_api_id, performance_profile, aws_region, logger) and \
+        apply_stage_profile(api_gateway_api_id, api_stage_name, performance_profile, aws_region, logger)
@@ -1,3 +1,4 @@
+from typing import Dict
 from time import sleep
 from inspect import currentframe
 from _common import _common as _common_
@@ -7,12 +8,23 @@ import boto3
 
 _WAIT_TIME_ = 10
 
+_EXECUTION_ROLE_POLICY_ARNS_ = ["arn:aws:iam::aws:policy/AdministratorAccess",
+                                "arn:aws:iam::aws:policy/service-role/AmazonAPIGatewayPushToCloudWatchLogs"]
+
 
 @_common_.aws_client_handle_exceptions()
 def aws_client(service_name: str, aws_region: str):
     return boto3.client(service_name, region_name=aws_region)
 
 
+def get_execution_role_name(project_name: str = None) -> str:
+    """name of the api gateway execution role of a project, stable as long as its trust policy and policies are"""
+    from _aws import iam_role
+    return iam_role.get_role_name(f"role-api-gateway-ex-{project_name}-" if project_name else "role-api-gateway-ex-",
+                                  "apigateway",
+                                  _EXECUTION_ROLE_POLICY_ARNS_)
+
+
 @_common_.aws_client_handle_exceptions()
 def run(ecr_repository_name: str,
         aws_account_number: str = None,
@@ -21,6 +33,8 @@ def run(ecr_repository_name: str,
         lambda_function_role_name: str = None,
         api_gateway_api_name: str = None,
         api_method: str = "GET",
+        performance_profile: Dict = None,
+        project_name: str = None,
         aws_region: str = "us-east-1"
         ) -> None:
 
@@ -32,9 +46,17 @@ def run(ecr_repository_name: str,
     # project_path = "/Users/jianhuang/anaconda3/envs/pg_finance_trade_1/pg_finance_trade_1"
     # api_gateway_api_name = "test_test_api"
 
-    from _aws import _api_gateway
+    from _aws import _api_gateway, _tagging
+    from _deployment.deploy_api_gateway import api_gateway_api_stage
+
+    tags = _tagging.project_tags(project_name) if project_name else None
+
+    # cache keys have to be declared on the method request and referenced by the integration
+    resource_path = f"/{lambda_function_name}"
+    cache_key_parameters = api_gateway_api_stage.get_cache_key_parameters(performance_profile, resource_path, api_method)
 
     api_gateway_api_id = _api_gateway.api_gateway_create_by_name(api_gateway_name=api_gateway_api_name,
+                                                                 tags=tags,
                                                                  aws_region=aws_region)
 
     # obtain the API Gateway root resource ID
@@ -83,6 +105,7 @@ def run(ecr_repository_name: str,
     _api_gateway.create_api_gateway_method(api_gateway_api_id=api_gateway_api_id,
                                            resource_id=resource_id,
                                            http_method=api_method,
+                                           request_parameters={each_key: False for each_key in cache_key_parameters},
                                            aws_region=aws_region)
 
     sleep(_WAIT_TIME_)
@@ -104,66 +127,17 @@ def run(ecr_repository_name: str,
             sleep(_WAIT_TIME_)
 
 
-    # check whether the execution role exists
+    # the execution role is named after its trust policy and policies, reruns reuse it and only fix its drift
     from _aws import iam_role
 
-    from _util import _util_file
-    if _util_file.is_file_exist("prev_iam_role_api_gateway_ex.txt.json"):
-        prev_iam_role_name = _util_file.json_load("prev_iam_role_api_gateway_ex.txt.json").get("role_name", "")
-
-        if iam_role.check_role_exists(iam_role_name=prev_iam_role_name):
-            if iam_role.detach_all_policies_from_role(iam_role_name=prev_iam_role_name):
-                iam_role.delete_role(iam_role_name=prev_iam_role_name)
-            else:
-                _common_.error_logger(currentframe().f_code.co_name,
-                                      f"unable to detach all policies from iam role {prev_iam_role_name}",
-                                      logger=None,
-                                      mode="error",
-                                      ignore_flag=False)
-
-
-    iam_role_name = f"role-api-gateway-ex-{_util_common_.get_random_string(6)}"
-
-    if iam_role.check_role_exists(iam_role_name=iam_role_name):
-        if iam_role.detach_all_policies_from_role(iam_role_name=iam_role_name):
-            iam_role.delete_role(iam_role_name=iam_role_name)
-        else:
-            _common_.error_logger(currentframe().f_code.co_name,
-                                  f"unable to detach all policies from iam role {iam_role_name}",
-                                  logger=None,
-                                  mode="error",
-                                  ignore_flag=False)
-
-    # create iam api-blunder execution role
-    response = iam_role.create_iam_role("apigateway", iam_role_name)
-    if not response:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              "unable to create iam role",
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-
-    _util_file.json_dump("prev_iam_role_api_gateway_ex.txt.json",
-                         {"role_name": iam_role_name})
-
-    # attach policy to iam role
-    policy_arn = "arn:aws:iam::aws:policy/AdministratorAccess"
-    response = iam_role.attach_policy_to_role(iam_role_name=iam_role_name,
-                                              policy_arn=policy_arn)
-    if not response:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"unable to attach policy {policy_arn} to iam role {iam_role_name}",
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-
-    policy_arn = "arn:aws:iam::aws:policy/service-role/AmazonAPIGatewayPushToCloudWatchLogs"
-    response = iam_role.attach_policy_to_role(iam_role_name=iam_role_name,
-                                              policy_arn=policy_arn)
-
-    if not response:
+    iam_role_name = get_execution_role_name(project_name)
+    iam_role_arn = iam_role.ensure_role(iam_role_name=iam_role_name,
+                                        service_name="apigateway",
+                                        policy_arns=_EXECUTION_ROLE_POLICY_ARNS_,
+                                        tags=tags)
+    if not iam_role_arn:
         _common_.error_logger(currentframe().f_code.co_name,
-                              f"unable to attach policy {policy_arn} to iam role {iam_role_name}",
+                              f"unable to create iam role {iam_role_name}",
                               logger=None,
                               mode="error",
                               ignore_flag=False)
@@ -177,7 +151,8 @@ def run(ecr_repository_name: str,
                                                            http_method=api_method,
                                                            aws_account_number=aws_account_number,
                                                            lambda_function_name=lambda_function_name,
-                                                           aws_execution_role_arn=f"arn:aws:iam::{aws_account_number}:role/role-api-gateway-ex",
+                                                           aws_execution_role_arn=iam_role_arn,
+                                                           cache_key_parameters=cache_key_parameters,
                                                            aws_region=aws_region
                                                            )
 
@@ -210,12 +185,25 @@ def run(ecr_repository_name: str,
                                                                )
     sleep(_WAIT_TIME_)
 
+    # compression is an api level setting and only takes effect with the next deployment
+    if performance_profile:
+        api_gateway_api_stage.apply_rest_api_profile(api_gateway_api_id=api_gateway_api_id,
+                                                     performance_profile=performance_profile,
+                                                     aws_region=aws_region)
+
     # create api gateway deployment and deploy to stage
     stage_name = "prod"
     response = _api_gateway.create_api_gateway_deployment(api_gateway_api_id=api_gateway_api_id,
                                                           api_stage_name=stage_name,
                                                           aws_region=aws_region)
 
+    # cache cluster, cache ttl and throttling are stage settings, only changed settings are patched
+    if performance_profile:
+        api_gateway_api_stage.apply_stage_profile(api_gateway_api_id=api_gateway_api_id,
+                                                  api_stage_name=stage_name,
+                                                  performance_profile=performance_profile,
+                                                  aws_region=aws_region)
+
     print(f"https://{api_gateway_api_id}.execute-api.{aws_region}.amazonaws.com/{stage_name}/{lambda_function_name}")
 
     sleep(_WAIT_TIME_)
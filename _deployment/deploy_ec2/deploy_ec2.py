@@ -1,9 +1,12 @@
+from typing import List, Dict, Union
 from inspect import currentframe
 from logging import Logger as Log
 from _common import _common as _common_
+from _aws import _describe_cache
 _WAIT_TIME_ = 4
 
 
+@_describe_cache.per_deployment
 def run(project_name: str,
         aws_account_number: str,
         project_path: str,
@@ -13,7 +16,16 @@ def run(project_name: str,
         sg_ingress_rules: list,
         website_port: int,
         instance_type: str ="t2.micro",
+        instance_types: List[str] = None,
+        instance_requirements: Dict = None,
+        kernel_arch: str = "x86_64",
+        os_version: str = "al2",
         user_data: str = "",
+        ecr_repository_name: str = None,
+        bake_ami: bool = False,
+        auto_scaling: Dict = None,
+        rolling_update: Union[Dict, bool] = True,
+        dedicated_vpc: bool = False,
         aws_region: str = "us-east-1",
         logger: Log = None) -> bool:
 
@@ -29,8 +41,27 @@ def run(project_name: str,
         sg_name: security group name
         website_port: website port
         instance_type: instance type
+        instance_types: fallback instance types, spot capacity is picked price-capacity-optimized over
+                        instance_type and these, on-demand is used when spot capacity is short
+        instance_requirements: attribute based instance type selection instead of instance types, e.g.
+                               {"VCpuCount": {"Min": 1, "Max": 2}, "MemoryMiB": {"Min": 1024}}
+        kernel_arch: x86_64 or arm64, needs to match the instance types
+        os_version: amazon linux version of the base image, al2 or al2023
         sg_ingress_rules: security group ingress rules
         user_data: user data, will auto detect whether it is base64 encoded
+        ecr_repository_name: ecr repository holding the project image, needed to bake the image
+        bake_ami: launch from a golden image with docker and the project image preloaded, the user data is then
+                  only expected to start the container
+        auto_scaling: run an auto scaling group behind an application load balancer instead of a single instance,
+                      keyword arguments of ec2_auto_scaling.run (min_size, max_size, desired_capacity,
+                      scaling_metric, target_value, health_check_path), an empty dict uses the defaults
+        rolling_update: replace running instances only once their replacements are healthy on website_port,
+                        True uses the defaults, a dict holds keyword arguments of ec2_rolling_update.run
+                        (batch_size, health_check_path, health_check_timeout, drain_seconds), False terminates
+                        the running instances before launching
+        dedicated_vpc: place the project in its own vpc (see _deploy_vpc.deploy_vpc.run) whose ecr, s3 and logs
+                       endpoints keep image pulls on the aws network, the first vpc with a public subnet is used
+                       otherwise
         aws_region: aws region
         logger: log object
 
@@ -51,14 +82,17 @@ def run(project_name: str,
 
     from _aws import ec2
 
-    # terminate existing instance belong to the project
-    for instance_id in ec2.find_instances_by_tag("pg_auto_project_name", project_name):
-        response = ec2.describe_ec2_get_spot_request(instance_id)
-        if response and (spot_request_id := response[0].get("spot_request_id")):
-            ec2.terminate_spot_request_and_instances(spot_request_id)
+    # existing instances belong to the project, the instances of an auto scaling group are managed by it
+    old_instance_ids = (ec2.find_instances_by_tag("pg_auto_project_name",
+                                                  project_name,
+                                                  aws_region=aws_region,
+                                                  logger=logger) or []) if auto_scaling is None else []
+    # without rolling update they are terminated before the replacement is launched
+    if rolling_update is False and old_instance_ids:
+        ec2.terminate_instances_and_spot_requests(old_instance_ids, aws_region=aws_region, logger=logger)
 
     # find default ami id
-    ami_id = ec2.find_image(aws_region)
+    ami_id = ec2.find_image(aws_region, kernel_arch=kernel_arch, os_version=os_version, logger=logger)
     if not ami_id:
         _common_.error_logger(currentframe().f_code.co_name,
                               "ami id not found in the specified region",
@@ -70,6 +104,7 @@ def run(project_name: str,
     _parameter = {
         "key_name": keypair_name,
         "file_path": private_key_path,
+        "project_name": project_name,
         "aws_region": aws_region
     }
 
@@ -80,6 +115,10 @@ def run(project_name: str,
     _parameters = {
         "aws_region": aws_region
     }
+    if dedicated_vpc:
+        from _deployment._deploy_vpc import deploy_vpc
+
+        _parameters["vpc_id"] = deploy_vpc.run(project_name=project_name, aws_region=aws_region, logger=logger).get("vpc_id")
     network_info = ec2_network.run(**_parameters)
     vpc_id = network_info.get("vpc_id")
 
@@ -105,13 +144,30 @@ def run(project_name: str,
 
     role_info = ec2_role.run(project_name=project_name)
 
+    # bake (or reuse) the golden image, instances then boot straight into starting the container
+    if bake_ami:
+        from _deployment.deploy_ec2 import ec2_bake_ami
+
+        ami_id = ec2_bake_ami.run(project_name=project_name,
+                                  aws_account_number=aws_account_number,
+                                  ecr_repository_name=ecr_repository_name,
+                                  base_ami_id=ami_id,
+                                  sg_id=[sg_id],
+                                  subnet_id=network_info.get("public_subnet"),
+                                  iam_instance_role=role_info.get("instance_profile_name"),
+                                  aws_region=aws_region,
+                                  logger=logger)
+
     # create a launch template
     from _deployment.deploy_ec2 import ec2_launch_template
 
     launch_template_name = f"lt-{project_name}-launch-template"
     instance_name = f"{project_name}-instance"
 
-    print(launch_template_name, project_name, ami_id, keypair_name, sg_id, network_info.get("public_subnet"), instance_type, instance_name, role_info.get("instance_profile_name"), aws_region)
+    _common_.info_logger(f"launch template {launch_template_name}: ami {ami_id}, key pair {keypair_name}, "
+                         f"security group {sg_id}, subnet {network_info.get('public_subnet')}, "
+                         f"instance type {instance_type}, instance profile {role_info.get('instance_profile_name')}",
+                         logger=logger)
 
     lt_response = ec2_launch_template.run(lt_name=launch_template_name,
                                           project_id=project_name,
@@ -123,10 +179,39 @@ def run(project_name: str,
                                           instance_name=instance_name,
                                           iam_instance_role=role_info.get("instance_profile_name"),
                                           user_data=user_data,
+                                          launch=auto_scaling is None and not (rolling_update and old_instance_ids),
+                                          instance_types=instance_types,
+                                          instance_requirements=instance_requirements,
                                           aws_region=aws_region
                                           )
 
-    if len(lt_response) > 0:
+    if auto_scaling is not None:
+        from _deployment.deploy_ec2 import ec2_auto_scaling
+
+        ec2_auto_scaling.run(project_name=project_name,
+                             launch_template_id=lt_response,
+                             vpc_id=vpc_id,
+                             subnet_ids=network_info.get("public_subnets"),
+                             sg_id=[sg_id],
+                             website_port=website_port,
+                             instance_types=[instance_type] + (instance_types or []),
+                             instance_requirements=instance_requirements,
+                             aws_region=aws_region,
+                             logger=logger,
+                             **auto_scaling)
+    elif rolling_update and old_instance_ids:
+        from _deployment.deploy_ec2 import ec2_rolling_update
+
+        lt_response = ec2_rolling_update.run(launch_template_id=lt_response,
+                                             old_instance_ids=old_instance_ids,
+                                             website_port=website_port,
+                                             instance_types=[instance_type] + (instance_types or []),
+                                             instance_requirements=instance_requirements,
+                                             aws_region=aws_region,
+                                             logger=logger,
+                                             **(rolling_update if isinstance(rolling_update, dict) else {}))
+
+    if auto_scaling is None and lt_response:
         public_dns_name = ec2.find_instance_by_id(lt_response[0])[0].get("PublicDnsName")
         _common_.info_logger(f"ssh -i {private_key_path} ec2-user@{public_dns_name}")
         _common_.info_logger(f"http://{public_dns_name}:{website_port}")
@@ -141,11 +226,15 @@ def destroy(project_name: str,
             private_key_path: str,
             sg_name: str,
             user_data: str = "",
+            ecr_repository_name: str = None,
             aws_region: str = "us-east-1",
             logger: Log = None) -> bool:
 
     """this function is to destroy the resources created by run
 
+    instances, security group, instance profile, iam role, launch template, key pair and optionally the ecr
+    repository are torn down by the teardown engine, independent resources are deleted concurrently
+
     Args:
         project_name: project name
         aws_account_number: aws account number
@@ -154,6 +243,7 @@ def destroy(project_name: str,
         private_key_path: private key path
         sg_name: security group name
         user_data: user data, will auto detect whether it is base64 encoded
+        ecr_repository_name: ecr repository name, the repository is kept if empty
         aws_region: aws region
         logger: log object
 
@@ -162,63 +252,11 @@ def destroy(project_name: str,
 
     """
 
-    from _aws import ec2
-
-    # terminate existing instance belong to the project
-    for instance_id in ec2.find_instances_by_tag("pg_auto_project_name", project_name):
-        response = ec2.describe_ec2_get_spot_request(instance_id)
-        if response and (spot_request_id := response[0].get("spot_request_id")):
-            ec2.terminate_spot_request_and_instances(spot_request_id)
-
-
-
-    # delete a key pair
-    from _deployment.deploy_ec2 import ec2_key_pair
-    _parameter = {
-        "key_name": keypair_name,
-        "aws_region": aws_region
-    }
-    ec2_key_pair.destroy(**_parameter)
-
-    # find an appropriate subnet
-    from _deployment.deploy_ec2 import ec2_network
-    _parameters = {
-        "aws_region": aws_region
-    }
-    network_info = ec2_network.run(**_parameters)
-    vpc_id = network_info.get("vpc_id")
-
-    # delete a security group
-    from _deployment.deploy_ec2 import ec2_security_group
-    _parameter = {
-        "vpc_id": vpc_id,
-        "sg_name": sg_name,
-        "project_name": project_name,
-        "aws_region": aws_region
-    }
-    ec2_security_group.destroy(**_parameter)
-
-    from _deployment.deploy_ec2 import ec2_role
-
-    ec2_role.destroy(project_name=project_name)
-
-    # create a launch template
-    from _deployment.deploy_ec2 import ec2_launch_template
+    from _deployment.destroy_deployment import destroy_deployment as _destroy_deployment
 
-    launch_template_name = f"lt-{project_name}-launch-template"
-    instance_name = f"{project_name}-instance"
-
-    # find default ami id
-    ami_id = ec2.find_image(aws_region)
-    if not ami_id:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              "ami id not found in the specified region",
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
-
-    ec2_launch_template.destroy(lt_name=launch_template_name,
-                                aws_region=aws_region
-                                )
-
-    return True
+    resources = _destroy_deployment.ec2_pattern_resources(project_name=project_name,
+                                                          keypair_name=keypair_name,
+                                                          sg_name=sg_name,
+                                                          ecr_repository_name=ecr_repository_name,
+                                                          aws_region=aws_region)
+    return _destroy_deployment.run(resources, logger=logger)
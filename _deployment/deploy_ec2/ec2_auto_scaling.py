@@ -0,0 +1,212 @@
+from typing import List, Union, Dict
+import hashlib
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+# load balancer and target group names are limited to 32 alphanumeric characters or hyphens
+_ELB_NAME_MAX_LENGTH_ = 32
+
+_SCALING_METRICS_ = {
+    "cpu": "ASGAverageCPUUtilization",
+    "request_count": "ALBRequestCountPerTarget",
+}
+_DEFAULT_TARGET_VALUES_ = {
+    "cpu": 50.0,
+    "request_count": 1000.0,
+}
+
+
+def _elb_name(project_name: str, suffix: str) -> str:
+    name = f"{project_name.replace('_', '-')}-{suffix}"
+    if len(name) <= _ELB_NAME_MAX_LENGTH_:
+        return name
+    # keep the names of long projects unique once truncated
+    _hash = hashlib.md5(project_name.encode("utf-8")).hexdigest()[:6]
+    return f"{name[:_ELB_NAME_MAX_LENGTH_ - len(suffix) - len(_hash) - 2].rstrip('-')}-{_hash}-{suffix}"
+
+
+def get_resource_names(project_name: str) -> Dict[str, str]:
+    """names of the auto scaling group, load balancer and target group of a project"""
+    return {"auto_scaling_group_name": f"asg-{project_name}",
+            "load_balancer_name": _elb_name(project_name, "alb"),
+            "target_group_name": _elb_name(project_name, "tg")}
+
+
+def _one_subnet_per_zone(subnet_ids: List[str], aws_region: str) -> List[str]:
+    from _aws import ec2
+
+    subnets = {}
+    for subnet_id, availability_zone in sorted((ec2.get_subnet_availability_zones(subnet_ids,
+                                                                                  aws_region=aws_region) or {}).items()):
+        subnets.setdefault(availability_zone, subnet_id)
+    return list(subnets.values())
+
+
+@_common_.aws_client_handle_exceptions()
+def run(project_name: str,
+        launch_template_id: str,
+        vpc_id: str,
+        subnet_ids: List[str],
+        sg_id: Union[str, List],
+        website_port: int,
+        min_size: int = 1,
+        max_size: int = 4,
+        desired_capacity: int = None,
+        scaling_metric: str = "cpu",
+        target_value: float = None,
+        health_check_path: str = "/",
+        instance_types: List[str] = None,
+        instance_requirements: Dict = None,
+        on_demand_base_capacity: int = 0,
+        min_healthy_percentage: int = 100,
+        aws_region: str = "us-east-1",
+        logger: Log = None
+        ) -> Union[str, None]:
+
+    """put an auto scaling group behind an application load balancer
+
+    the load balancer listens on port 80 and forwards to a target group health checking website_port, the auto
+    scaling group launches from the launch template across all public subnets, replaces instances failing the
+    target group health check and tracks the scaling metric. an existing group is pointed to the launch template
+    and its instances are refreshed batch by batch, instances already on the launch template version are kept
+
+    Args:
+        project_name: project name
+        launch_template_id: launch template id
+        vpc_id: vpc id
+        subnet_ids: public subnet ids, one per availability zone is used, at least two zones are needed
+        sg_id: security group id(s) of the load balancer, needs to allow port 80 and website_port
+        website_port: port the instances serve on
+        min_size: minimum number of instances
+        max_size: maximum number of instances
+        desired_capacity: initial number of instances, min_size if empty
+        scaling_metric: cpu (average cpu utilization) or request_count (requests per instance)
+        target_value: value of the scaling metric to keep, 50 percent cpu or 1000 requests if empty
+        health_check_path: http path of the target group health check
+        instance_types: spot instances are spread over these instance types (price-capacity-optimized)
+        instance_requirements: attribute based instance type selection instead of instance types
+        on_demand_base_capacity: instances always launched on-demand, the rest is spot
+        min_healthy_percentage: share of the group kept in service while an existing group rolls onto a new
+                                launch template version, 100 launches every replacement before terminating
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the dns name of the load balancer
+
+    """
+    from _aws import _elb, _autoscaling, _tagging
+
+    if scaling_metric not in _SCALING_METRICS_:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"scaling metric {scaling_metric} is not supported, use {list(_SCALING_METRICS_)}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    if len(subnet_ids := _one_subnet_per_zone(subnet_ids, aws_region)) < 2:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"a load balancer needs public subnets in at least two availability zones, found {subnet_ids}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    names = get_resource_names(project_name)
+    tags = _tagging.project_tags(project_name)
+
+    if not (target_group := _elb.get_target_group_by_name(names.get("target_group_name"), aws_region=aws_region)):
+        target_group_arn = _elb.create_target_group(target_group_name=names.get("target_group_name"),
+                                                    port=website_port,
+                                                    vpc_id=vpc_id,
+                                                    health_check_path=health_check_path,
+                                                    tags=tags,
+                                                    aws_region=aws_region)
+    else:
+        target_group_arn = target_group.get("TargetGroupArn")
+
+    if not (load_balancer := _elb.get_load_balancer_by_name(names.get("load_balancer_name"), aws_region=aws_region)):
+        load_balancer = _elb.create_load_balancer(load_balancer_name=names.get("load_balancer_name"),
+                                                  subnet_ids=subnet_ids,
+                                                  security_group_ids=sg_id,
+                                                  tags=tags,
+                                                  aws_region=aws_region)
+    load_balancer_arn = load_balancer.get("LoadBalancerArn")
+
+    if not any(each_listener.get("Port") == 80
+               for each_listener in _elb.get_listeners(load_balancer_arn, aws_region=aws_region) or []):
+        _elb.create_listener(load_balancer_arn, target_group_arn, port=80, aws_region=aws_region)
+
+    if _autoscaling.get_auto_scaling_group(names.get("auto_scaling_group_name"), aws_region=aws_region):
+        _autoscaling.update_auto_scaling_group(auto_scaling_group_name=names.get("auto_scaling_group_name"),
+                                               launch_template_id=launch_template_id,
+                                               subnet_ids=subnet_ids,
+                                               min_size=min_size,
+                                               max_size=max_size,
+                                               instance_types=instance_types,
+                                               instance_requirements=instance_requirements,
+                                               on_demand_base_capacity=on_demand_base_capacity,
+                                               aws_region=aws_region)
+        _autoscaling.start_instance_refresh(names.get("auto_scaling_group_name"),
+                                            min_healthy_percentage=min_healthy_percentage,
+                                            aws_region=aws_region)
+    else:
+        _autoscaling.create_auto_scaling_group(auto_scaling_group_name=names.get("auto_scaling_group_name"),
+                                               launch_template_id=launch_template_id,
+                                               subnet_ids=subnet_ids,
+                                               min_size=min_size,
+                                               max_size=max_size,
+                                               desired_capacity=desired_capacity or min_size,
+                                               target_group_arns=[target_group_arn],
+                                               instance_types=instance_types,
+                                               instance_requirements=instance_requirements,
+                                               on_demand_base_capacity=on_demand_base_capacity,
+                                               tags=tags,
+                                               aws_region=aws_region)
+
+    _autoscaling.put_target_tracking_policy(
+        auto_scaling_group_name=names.get("auto_scaling_group_name"),
+        policy_name=f"target-tracking-{scaling_metric}",
+        metric=_SCALING_METRICS_.get(scaling_metric),
+        target_value=target_value or _DEFAULT_TARGET_VALUES_.get(scaling_metric),
+        resource_label=_elb.get_resource_label(load_balancer_arn, target_group_arn) if scaling_metric == "request_count" else None,
+        aws_region=aws_region)
+
+    _elb.wait_for_load_balancer_available(load_balancer_arn, aws_region=aws_region)
+    _common_.info_logger(f"http://{load_balancer.get('DNSName')}", logger=logger)
+    return load_balancer.get("DNSName")
+
+
+def destroy_auto_scaling_group(project_name: str,
+                               aws_region: str = "us-east-1"
+                               ) -> bool:
+    """delete the auto scaling group of the project together with its instances"""
+    from _aws import _autoscaling
+
+    return _autoscaling.delete_auto_scaling_group(get_resource_names(project_name).get("auto_scaling_group_name"),
+                                                  aws_region=aws_region)
+
+
+def destroy_load_balancer(project_name: str,
+                          aws_region: str = "us-east-1"
+                          ) -> bool:
+    """delete the load balancer of the project together with its listeners"""
+    from _aws import _elb
+
+    if not (load_balancer := _elb.get_load_balancer_by_name(get_resource_names(project_name).get("load_balancer_name"),
+                                                            aws_region=aws_region)):
+        return True
+    return _elb.delete_load_balancer(load_balancer.get("LoadBalancerArn"), aws_region=aws_region)
+
+
+def destroy_target_group(project_name: str,
+                         aws_region: str = "us-east-1"
+                         ) -> bool:
+    """delete the target group of the project, the load balancer and the auto scaling group need to be gone"""
+    from _aws import _elb
+
+    if not (target_group := _elb.get_target_group_by_name(get_resource_names(project_name).get("target_group_name"),
+                                                          aws_region=aws_region)):
+        return True
+    return _elb.delete_target_group(target_group.get("TargetGroupArn"), aws_region=aws_region)
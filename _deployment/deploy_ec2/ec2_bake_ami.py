@@ -0,0 +1,159 @@
+from typing import List, Dict, Union
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_AMI_VERSION_TAG_KEY_ = "pg_auto_ami_version"
+_IMAGE_DIGEST_TAG_KEY_ = "pg_auto_image_digest"
+_BASE_AMI_TAG_KEY_ = "pg_auto_base_ami"
+
+# the current image and the previous one (for rollbacks) are kept, older versions are deregistered
+_KEEP_VERSIONS_ = 2
+_BAKE_TIMEOUT_ = 1200
+_BUILDER_INSTANCE_TYPE_ = "t3.small"
+
+
+def get_baked_images(project_name: str,
+                     aws_region: str = "us-east-1"
+                     ) -> List[Dict]:
+    """images baked for the project, newest version first"""
+    from _aws import ec2, _tagging
+
+    images = [each_image for each_image in ec2.find_images_by_tag(tag_key=_tagging._PROJECT_TAG_KEY_,
+                                                                  tag_value=project_name,
+                                                                  aws_region=aws_region) or []
+              if each_image.get("Tags", {}).get(_AMI_VERSION_TAG_KEY_, "").isdigit()]
+    return sorted(images, key=lambda x: int(x.get("Tags").get(_AMI_VERSION_TAG_KEY_)), reverse=True)
+
+
+@_common_.aws_client_handle_exceptions()
+def run(project_name: str,
+        aws_account_number: str,
+        ecr_repository_name: str,
+        base_ami_id: str,
+        sg_id: Union[str, List],
+        subnet_id: str,
+        iam_instance_role: str,
+        instance_type: str = _BUILDER_INSTANCE_TYPE_,
+        aws_region: str = "us-east-1",
+        logger: Log = None
+        ) -> Union[str, None]:
+
+    """bake a golden image with docker and the project image preloaded
+
+    a builder instance is launched from the base image, its user data installs docker, pulls the project image
+    and powers the instance off, the stopped builder is registered as the next version of the project image and
+    terminated. the image is reused as long as neither the project image nor the base image changed
+
+    Args:
+        project_name: project name
+        aws_account_number: aws account number
+        ecr_repository_name: ecr repository holding the project image (tag latest)
+        base_ami_id: image the builder starts from
+        sg_id: security group id of the builder, it needs outbound access
+        subnet_id: subnet id of the builder, needs a route to the internet
+        iam_instance_role: instance profile name of the builder, needs ecr read access
+        instance_type: instance type of the builder
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the image id of the baked image
+
+    """
+    from jinja2 import Template
+    from _aws import ec2, _tagging
+    from _deployment.build_image import setup_ecr
+    from _deployment.deploy_ec2 import ec2_userdata_template
+
+    if not (image_digest := setup_ecr.get_image_digest(repository_name=ecr_repository_name,
+                                                       aws_region=aws_region,
+                                                       logger=logger)):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"no image tagged latest in ecr repository {ecr_repository_name}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    baked_images = get_baked_images(project_name, aws_region=aws_region)
+    if baked_images and baked_images[0].get("State") == "available" and \
+            baked_images[0].get("Tags").get(_IMAGE_DIGEST_TAG_KEY_) == image_digest and \
+            baked_images[0].get("Tags").get(_BASE_AMI_TAG_KEY_) == base_ami_id:
+        _common_.info_logger(f"reusing baked image {baked_images[0].get('Name')} ({baked_images[0].get('ImageId')})",
+                             logger=logger)
+        return baked_images[0].get("ImageId")
+
+    version = int(baked_images[0].get("Tags").get(_AMI_VERSION_TAG_KEY_)) + 1 if baked_images else 1
+    image_name = f"ami-{project_name}-v{version}"
+
+    user_data = Template(ec2_userdata_template.user_data_bake_template).render({
+        "aws_account_number": aws_account_number,
+        "ecr_repo": ecr_repository_name,
+        "aws_region": aws_region
+    })
+
+    # the builder is on demand, a one-time spot instance can not be stopped
+    instance_id = ec2.launch_instance(image_id=base_ami_id,
+                                      instance_type=instance_type,
+                                      subnet_id=subnet_id,
+                                      security_group_ids=sg_id,
+                                      instance_name=f"{project_name}-ami-builder",
+                                      iam_instance_role=iam_instance_role,
+                                      user_data=user_data,
+                                      tags=_tagging.project_tags(project_name),
+                                      aws_region=aws_region)
+    try:
+        if not ec2.wait_for_instances(instance_id,
+                                      target_state="stopped",
+                                      timeout=_BAKE_TIMEOUT_,
+                                      aws_region=aws_region,
+                                      logger=logger).get(instance_id):
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"builder instance {instance_id} did not finish baking {image_name}",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+
+        tags = _tagging.project_tags(project_name)
+        tags.update({_AMI_VERSION_TAG_KEY_: str(version),
+                     _IMAGE_DIGEST_TAG_KEY_: image_digest,
+                     _BASE_AMI_TAG_KEY_: base_ami_id})
+        image_id = ec2.create_image(instance_id=instance_id,
+                                    image_name=image_name,
+                                    image_description=f"{ecr_repository_name}@{image_digest} on {base_ami_id}",
+                                    tags=tags,
+                                    aws_region=aws_region)
+        ec2.wait_for_image_available(image_id, timeout=_BAKE_TIMEOUT_, aws_region=aws_region)
+    finally:
+        ec2.terminate_instance_and_wait(instance_id, aws_region=aws_region)
+
+    for each_image in baked_images[_KEEP_VERSIONS_ - 1:]:
+        ec2.deregister_image(each_image.get("ImageId"), aws_region=aws_region)
+
+    _common_.info_logger(f"baked image {image_name} ({image_id})", logger=logger)
+    return image_id
+
+
+@_common_.aws_client_handle_exceptions()
+def destroy(project_name: str,
+            aws_region: str = "us-east-1",
+            logger: Log = None
+            ) -> bool:
+
+    """deregister every image baked for the project
+
+    Args:
+        project_name: project name
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        True if the operation is successful
+
+    """
+    from _aws import ec2
+
+    for each_image in get_baked_images(project_name, aws_region=aws_region):
+        ec2.deregister_image(each_image.get("ImageId"), aws_region=aws_region)
+    return True
@@ -8,12 +8,14 @@ _WAIT_TIME_ = 4
 @_common_.aws_client_handle_exceptions()
 def run(key_name: str,
         file_path: str,
+        project_name: str = None,
         aws_region: str = "us-east-1") -> bool:
     """create a ssh key pair
 
     Args:
         key_name: the name of the key pair
         file_path: the path to save the private key
+        project_name: project name, used for tagging
         aws_region: aws region
 
     Returns:
@@ -34,6 +36,9 @@ def run(key_name: str,
         "file_path": file_path,
         "aws_region": aws_region
     }
+    if project_name:
+        from _aws import _tagging
+        _parameter["tags"] = _tagging.project_tags(project_name)
 
     print(file_path, key_name, aws_region)
 
@@ -1,13 +1,10 @@
-from typing import List, Union
+from typing import List, Union, Dict
 from logging import Logger as Log
 from inspect import currentframe
-from time import sleep
 from _common import _common as _common_
 from _config import _config as _config_
 
 
-_WAIT_TIME_ = 10
-
 
 @_common_.aws_client_handle_exceptions()
 def run(lt_name: str,
@@ -21,9 +18,12 @@ def run(lt_name: str,
         kms_id: str = "",
         iam_instance_role: str = "",
         user_data: str = "",
+        launch: bool = True,
+        instance_types: List[str] = None,
+        instance_requirements: Dict = None,
         aws_region: str = "us-east-1",
         logger: Log = None
-        ) -> Union[List, None]:
+        ) -> Union[List, str, None]:
 
     """wrapper function for creating a launch template
 
@@ -41,11 +41,14 @@ def run(lt_name: str,
         kms_id: kms id
         iam_instance_role: instance profile name
         user data, will auto detect whether it is base64 encoded
+        launch: launch an instance from the template, e.g. not needed when an auto scaling group uses it
+        instance_types: additional instance types the instance can be launched as, see launch_fleet
+        instance_requirements: attribute based instance type selection instead of instance types
         aws_region: aws region
         logger: logger object
 
     Returns:
-        return the launch template id if it is created successfully, None otherwise
+        return the launched instance ids, or the launch template id if launch is False, None otherwise
 
     """
     if not kms_id:
@@ -72,39 +75,66 @@ def run(lt_name: str,
         kms_id = _config.config.get("kms_arn")
 
     from _aws import ec2
-    _parameter = {
-        "launch_template_name": lt_name,
-        "aws_region": aws_region
-    }
-    if ec2.check_launch_template_exists(**_parameter):
-        _parameter = {
-            "launch_template_name": lt_name,
-            "aws_region": aws_region
-        }
-        ec2.delete_launch_template(**_parameter)
-
-    sleep(_WAIT_TIME_)
 
     launch_template_description = f"auto created for {project_id}"
-
-    launch_template_id = ec2.create_launch_template(project_id=project_id,
-                                                    launch_template_name=lt_name,
-                                                    image_id=ami_id,
-                                                    keypair_name=keypair_name,
-                                                    security_group_ids=sg_id,
-                                                    subnet_id=subnet_id,
-                                                    instance_name=instance_name,
-                                                    instance_type=instance_type,
-                                                    kms_id=kms_id,
-                                                    launch_template_description=launch_template_description,
-                                                    iam_instance_role=iam_instance_role,
-                                                    user_data=user_data,
-                                                    aws_region=aws_region
-                                                    )
-    sleep(_WAIT_TIME_)
-
-    if launch_template_id:
-        return ec2.run_ec2_from_template(launch_template_id)
+    launch_template_data = ec2.build_launch_template_data(project_id=project_id,
+                                                          image_id=ami_id,
+                                                          keypair_name=keypair_name,
+                                                          security_group_ids=sg_id,
+                                                          subnet_id=subnet_id,
+                                                          instance_name=instance_name,
+                                                          instance_type=instance_type,
+                                                          kms_id=kms_id,
+                                                          user_data=user_data,
+                                                          iam_instance_role=iam_instance_role)
+
+    # an existing template gets a new default version only when the data changed, the version history is kept
+    # and instances launched from $Default or $Latest (e.g. by an auto scaling group) can be replaced gradually
+    if launch_template := ec2.get_launch_template(lt_name, aws_region=aws_region):
+        launch_template_id = launch_template.get("LaunchTemplateId")
+        current_data = ec2.get_launch_template_data(launch_template_id, version="$Default", aws_region=aws_region)
+        if changes := ec2.diff_launch_template_data(current_data or {}, launch_template_data):
+            _common_.info_logger(f"launch template {lt_name} changed: {changes}", logger=logger)
+            ec2.create_launch_template_version(launch_template_id,
+                                               launch_template_data,
+                                               launch_template_description=launch_template_description,
+                                               aws_region=aws_region)
+        else:
+            _common_.info_logger(f"launch template {lt_name} version "
+                                 f"{launch_template.get('DefaultVersionNumber')} is up to date", logger=logger)
+    else:
+        launch_template_id = ec2.create_launch_template(project_id=project_id,
+                                                        launch_template_name=lt_name,
+                                                        image_id=ami_id,
+                                                        keypair_name=keypair_name,
+                                                        security_group_ids=sg_id,
+                                                        subnet_id=subnet_id,
+                                                        instance_name=instance_name,
+                                                        instance_type=instance_type,
+                                                        kms_id=kms_id,
+                                                        launch_template_description=launch_template_description,
+                                                        iam_instance_role=iam_instance_role,
+                                                        user_data=user_data,
+                                                        aws_region=aws_region
+                                                        )
+
+    if launch_template_id and not launch:
+        return launch_template_id
+    elif launch_template_id:
+        report = launch_fleet(launch_template_id,
+                              instance_types=[instance_type] + (instance_types or []),
+                              instance_requirements=instance_requirements,
+                              aws_region=aws_region,
+                              logger=logger)
+        instance_ids = [each_instance.get("instance_id") for each_instance in report]
+        time_to_ready = ec2.wait_for_instances(instance_ids, aws_region=aws_region, logger=logger)
+        if not time_to_ready or None in time_to_ready.values():
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"instance(s) did not pass the status checks: {time_to_ready}",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+        return instance_ids
     else:
         _common_.error_logger(currentframe().f_code.co_name,
                               f"can't find appropriate launch template id",
@@ -113,6 +143,77 @@ def run(lt_name: str,
                               ignore_flag=False)
 
 
+@_common_.aws_client_handle_exceptions()
+def launch_fleet(launch_template_id: str,
+                 count: int = 1,
+                 instance_types: List[str] = None,
+                 instance_requirements: Dict = None,
+                 aws_region: str = "us-east-1",
+                 logger: Log = None
+                 ) -> List[Dict]:
+
+    """launch spot instances over several instance types and fall back to on-demand for the missing capacity
+
+    spot capacity is requested through an instant ec2 fleet with the price-capacity-optimized strategy, so a
+    shortage of one instance type is absorbed by the others, whatever spot can not provide is launched on-demand
+
+    Args:
+        launch_template_id: launch template id
+        count: number of instances
+        instance_types: instance types to choose from
+        instance_requirements: attribute based selection instead of instance types, e.g.
+                               {"VCpuCount": {"Min": 1, "Max": 2}, "MemoryMiB": {"Min": 1024}}
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        one report per instance {"instance_id", "instance_type", "lifecycle", "availability_zone", "hourly_price"}
+
+    """
+    from _aws import ec2, _pricing
+
+    _parameters = {
+        "launch_template_id": launch_template_id,
+        "instance_types": instance_types,
+        "instance_requirements": instance_requirements,
+        "aws_region": aws_region,
+        "logger": logger
+    }
+    instances = (ec2.create_instant_fleet(count=count, capacity_type="spot", **_parameters) or {}).get("instances", [])
+    if len(instances) < count:
+        _common_.info_logger(f"spot capacity is short by {count - len(instances)} instance(s), falling back to on-demand",
+                             logger=logger)
+        instances += (ec2.create_instant_fleet(count=count - len(instances),
+                                               capacity_type="on-demand",
+                                               **_parameters) or {}).get("instances", [])
+    if not instances:
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"no capacity for {instance_requirements or instance_types}",
+                              logger=logger,
+                              mode="error",
+                              ignore_flag=False)
+
+    placement = ec2.get_instances_placement([each_instance.get("InstanceId") for each_instance in instances],
+                                            aws_region=aws_region) or {}
+    report = []
+    for each_instance in instances:
+        instance_id = each_instance.get("InstanceId")
+        _placement = placement.get(instance_id, {})
+        instance_type = _placement.get("InstanceType", each_instance.get("InstanceType"))
+        if (lifecycle := _placement.get("Lifecycle", each_instance.get("Lifecycle"))) == "spot":
+            hourly_price = ec2.get_spot_price(instance_type, _placement.get("AvailabilityZone"), aws_region=aws_region)
+        else:
+            hourly_price = _pricing.get_on_demand_price(instance_type, aws_region=aws_region)
+        report.append({"instance_id": instance_id,
+                       "instance_type": instance_type,
+                       "lifecycle": lifecycle,
+                       "availability_zone": _placement.get("AvailabilityZone"),
+                       "hourly_price": hourly_price})
+        _common_.info_logger(f"instance {instance_id}: {lifecycle} {instance_type} in {_placement.get('AvailabilityZone')} "
+                             f"at {hourly_price} usd per hour", logger=logger)
+    return report
+
+
 @_common_.aws_client_handle_exceptions()
 def destroy(lt_name: str,
             aws_region: str = "us-east-1",
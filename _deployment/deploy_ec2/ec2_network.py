@@ -26,6 +26,7 @@ def run(vpc_id: str = None,
 
 
     _parameters = {
+        "vpc_id": vpc_id,
         "aws_region": aws_region
     }
     network_info = ec2.define_network(**_parameters)
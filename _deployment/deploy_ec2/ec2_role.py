@@ -12,7 +12,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -73,90 +72,82 @@ def aws_client(service_name: str, aws_region: str):
 #     _common_.info_logger(f"created iam role: {role_name}")
 #     return response.get("Role", {}).get("Arn")
 
+_EC2_POLICY_ARNS_ = ["arn:aws:iam::aws:policy/AmazonEC2ContainerRegistryReadOnly"]
+
+
 @_common_.aws_client_handle_exceptions()
 def run(project_name: str,
         aws_region: str = "us-east-1",
         logger: Log = None
         ) -> Dict:
 
-    from _aws import iam_role
-    iam_role_name = f"iam-role-{project_name}"
-    instance_profile_name = f"inst_{project_name}"
+    """make sure the instance role and the instance profile of the project are in place
 
-    if iam_role.check_role_exists(iam_role_name=iam_role_name):
-        if role_names := iam_role.get_instance_profile(instance_profile_name=instance_profile_name):
-            for role_name in role_names:
-                iam_role.detach_role_from_instance_profile(iam_role_name=role_name,
-                                                           instance_profile_name=instance_profile_name)
-        if iam_role.detach_role_from_instance_profile(iam_role_name=iam_role_name,
-                                                      instance_profile_name=instance_profile_name):
-            iam_role.delete_instance_profile(instance_profile_name=instance_profile_name)
-        if iam_role.detach_all_policies_from_role(iam_role_name=iam_role_name):
-            iam_role.delete_role(iam_role_name=iam_role_name)
+    the role keeps its name, its trust policy and managed policies (ecr read only and project_iam_policy_arn
+    from the config) are compared with the desired state and only the drift is fixed, the instance profile is
+    created if missing and holds exactly the role. propagation is only waited for when the profile changed
 
-        else:
-            _common_.error_logger(currentframe().f_code.co_name,
-                                  f"unable to detach all policies from iam role {iam_role_name}",
-                                  logger=None,
-                                  mode="error",
-                                  ignore_flag=False)
+    Args:
+        project_name: project name
+        aws_region: aws region
+        logger: logger object
 
-    # create iam role
-    response = iam_role.create_iam_role("ec2", iam_role_name)
-    if not response:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              "unable to create iam role",
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
+    Returns:
+        {"iam_role_name", "instance_profile_name"}
 
-    # attach policy to iam role
-    policy_arn = "arn:aws:iam::aws:policy/AmazonEC2ContainerRegistryReadOnly"
-    response = iam_role.attach_policy_to_role(iam_role_name=iam_role_name,
-                                              policy_arn=policy_arn)
-    if not response:
-        _common_.error_logger(currentframe().f_code.co_name,
-                              f"unable to attach policy {policy_arn} to iam role {iam_role_name}",
-                              logger=None,
-                              mode="error",
-                              ignore_flag=False)
+    """
+    from _aws import iam_role, _tagging
+    from _config import _config as _config_
 
+    iam_role_name = f"iam-role-{project_name}"
+    instance_profile_name = f"inst_{project_name}"
 
     # policy_arn = "arn:aws:iam::717435123117:policy/iam_policy_full_access_pg-web-app-0001"
-    from _config import _config as _config_
-
     _config = _config_.PGConfigSingleton()
-    if _config.config["project_iam_policy_arn"]:
-        response = iam_role.attach_policy_to_role(iam_role_name=iam_role_name,
-                                                  policy_arn=_config.config["project_iam_policy_arn"])
-        if not response:
-            _common_.error_logger(currentframe().f_code.co_name,
-                                  f"unable to attach policy {policy_arn} to iam role {iam_role_name}",
-                                  logger=None,
-                                  mode="error",
-                                  ignore_flag=False)
+    policy_arns = _EC2_POLICY_ARNS_ + ([_config.config["project_iam_policy_arn"]]
+                                       if _config.config.get("project_iam_policy_arn") else [])
 
-    # create instance profile
+    if not iam_role.ensure_role(iam_role_name=iam_role_name,
+                                service_name="ec2",
+                                policy_arns=policy_arns,
+                                tags=_tagging.project_tags(project_name)):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              f"unable to create iam role {iam_role_name}",
+                              logger=None,
+                              mode="error",
+                              ignore_flag=False)
 
-    if not iam_role.check_instance_profile_exists(instance_profile_name=instance_profile_name):
-        response = iam_role.create_instance_profile(instance_profile_name=instance_profile_name)
-        if not response:
+    # get_instance_profile returns False if the profile does not exist, otherwise the names of its roles
+    if (role_names := iam_role.get_instance_profile(instance_profile_name=instance_profile_name)) is False:
+        if not iam_role.create_instance_profile(instance_profile_name=instance_profile_name,
+                                                tags=_tagging.project_tags(project_name)):
             _common_.error_logger(currentframe().f_code.co_name,
                                   f"unable to create instance role {instance_profile_name}",
                                   logger=None,
                                   mode="error",
                                   ignore_flag=False)
-
-    # attach iam role to instance profile
-    response = iam_role.add_role_to_instance_profile(instance_profile_name=instance_profile_name,
-                                                     iam_role_name=iam_role_name)
-    if not response:
+        role_names = []
+
+    if role_names == [iam_role_name]:
+        _common_.info_logger(f"instance profile {instance_profile_name} is up to date", logger=logger)
+        return {"iam_role_name": iam_role_name, "instance_profile_name": instance_profile_name}
+
+    # an instance profile holds a single role
+    for role_name in role_names:
+        if role_name != iam_role_name:
+            iam_role.detach_role_from_instance_profile(iam_role_name=role_name,
+                                                       instance_profile_name=instance_profile_name)
+    if iam_role_name not in role_names and \
+            not iam_role.add_role_to_instance_profile(instance_profile_name=instance_profile_name,
+                                                      iam_role_name=iam_role_name):
         _common_.error_logger(currentframe().f_code.co_name,
                               f"unable to attach iam role {iam_role_name} to iam instance profile {instance_profile_name}",
                               logger=None,
                               mode="error",
                               ignore_flag=False)
 
+    # launches retry while ec2 does not know the instance profile yet, only its existence is waited for here
+    iam_role.wait_for_instance_profile(instance_profile_name=instance_profile_name, iam_role_name=iam_role_name)
     return {"iam_role_name": iam_role_name, "instance_profile_name": instance_profile_name}
 
 
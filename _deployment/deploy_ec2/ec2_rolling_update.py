@@ -0,0 +1,164 @@
+from typing import List, Union, Dict
+from time import sleep, monotonic
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_HEALTH_CHECK_INTERVAL_ = 10
+_HEALTH_CHECK_TIMEOUT_ = 600
+# a single http probe, a booting instance usually refuses the connection long before that
+_HEALTH_CHECK_REQUEST_TIMEOUT_ = 5
+_DRAIN_SECONDS_ = 30
+
+
+def _is_healthy(url: str) -> bool:
+    from urllib import request, error
+
+    try:
+        with request.urlopen(url, timeout=_HEALTH_CHECK_REQUEST_TIMEOUT_) as response:
+            return 200 <= response.status < 400
+    except (error.URLError, OSError, ValueError):
+        return False
+
+
+def wait_for_healthy(instance_ids: List[str],
+                     website_port: int,
+                     health_check_path: str = "/",
+                     timeout: int = _HEALTH_CHECK_TIMEOUT_,
+                     aws_region: str = "us-east-1",
+                     logger: Log = None
+                     ) -> Dict[str, bool]:
+    """probe http://<ip>:website_port<health_check_path> of every instance until it answers with 2xx or 3xx
+
+    the public ip is probed, the private ip for instances without one (reachable when running inside the vpc),
+    instances without any address fail right away
+
+    Args:
+        instance_ids: instance ids
+        website_port: port the instances serve on
+        health_check_path: http path probed
+        timeout: overall deadline in seconds for all instances
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        instance id -> True if the instance became healthy before the deadline
+
+    """
+    from _aws import ec2
+
+    placement = ec2.get_instances_placement(instance_ids, aws_region=aws_region) or {}
+    addresses = {instance_id: placement.get(instance_id, {}).get("PublicIpAddress") or
+                 placement.get(instance_id, {}).get("PrivateIpAddress")
+                 for instance_id in instance_ids}
+    if unreachable := [instance_id for instance_id, address in addresses.items() if not address]:
+        _common_.info_logger(f"instance(s) {unreachable} have neither a public nor a private ip address, "
+                             f"they can not be health checked", logger=logger)
+        return {instance_id: False for instance_id in instance_ids}
+    urls = {instance_id: f"http://{address}:{website_port}{health_check_path}" for instance_id, address in addresses.items()}
+    healthy = {instance_id: False for instance_id in instance_ids}
+    deadline = monotonic() + timeout
+
+    while not all(healthy.values()):
+        for instance_id, url in urls.items():
+            if not healthy.get(instance_id) and _is_healthy(url):
+                healthy[instance_id] = True
+                _common_.info_logger(f"instance {instance_id} is healthy at {url}", logger=logger)
+        if all(healthy.values()) or monotonic() > deadline:
+            break
+        sleep(_HEALTH_CHECK_INTERVAL_)
+
+    if not all(healthy.values()):
+        _common_.info_logger(f"instance(s) not healthy after {timeout} seconds: "
+                             f"{[instance_id for instance_id, status in healthy.items() if not status]}", logger=logger)
+    return healthy
+
+
+@_common_.aws_client_handle_exceptions()
+def run(launch_template_id: str,
+        old_instance_ids: List[str],
+        website_port: int,
+        count: int = None,
+        batch_size: int = 1,
+        health_check_path: str = "/",
+        health_check_timeout: int = _HEALTH_CHECK_TIMEOUT_,
+        drain_seconds: int = _DRAIN_SECONDS_,
+        instance_types: List[str] = None,
+        instance_requirements: Dict = None,
+        aws_region: str = "us-east-1",
+        logger: Log = None
+        ) -> Union[List[str], None]:
+
+    """replace the running instances of a project batch by batch without taking it offline
+
+    every batch of new instances is launched from the launch template and has to pass the ec2 status checks and
+    the http health check on website_port, only then the same number of old instances is given drain_seconds to
+    finish in-flight requests and terminated. a batch failing its health check is terminated again and the
+    remaining old instances are kept running
+
+    Args:
+        launch_template_id: launch template id
+        old_instance_ids: instances being replaced
+        website_port: port the instances serve on
+        count: number of new instances, as many as old instances (at least one) if empty
+        batch_size: instances replaced at a time
+        health_check_path: http path probed on website_port
+        health_check_timeout: seconds a batch gets to become healthy once the status checks passed
+        drain_seconds: seconds an old instance keeps running after its replacement is healthy
+        instance_types: instance types to choose from, see ec2_launch_template.launch_fleet
+        instance_requirements: attribute based instance type selection instead of instance types
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the new instance ids, None if a batch did not become healthy
+
+    """
+    from _aws import ec2
+    from _deployment.deploy_ec2 import ec2_launch_template
+
+    count = count or max(len(old_instance_ids), 1)
+    old_instance_ids = list(old_instance_ids)
+    new_instance_ids = []
+
+    while len(new_instance_ids) < count:
+        batch_count = min(batch_size, count - len(new_instance_ids))
+        report = ec2_launch_template.launch_fleet(launch_template_id,
+                                                  count=batch_count,
+                                                  instance_types=instance_types,
+                                                  instance_requirements=instance_requirements,
+                                                  aws_region=aws_region,
+                                                  logger=logger)
+        batch = [each_instance.get("instance_id") for each_instance in report]
+
+        time_to_ready = ec2.wait_for_instances(batch, aws_region=aws_region, logger=logger) or {}
+        healthy = wait_for_healthy(batch,
+                                   website_port=website_port,
+                                   health_check_path=health_check_path,
+                                   timeout=health_check_timeout,
+                                   aws_region=aws_region,
+                                   logger=logger) if None not in time_to_ready.values() else {}
+        if not healthy or not all(healthy.values()):
+            ec2.terminate_instances(batch, wait=False, aws_region=aws_region)
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"new instance(s) {batch} are not healthy, kept {old_instance_ids} running",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+            return None
+        new_instance_ids.extend(batch)
+
+        retiring, old_instance_ids = old_instance_ids[:batch_count], old_instance_ids[batch_count:]
+        if retiring:
+            _common_.info_logger(f"draining {retiring} for {drain_seconds} seconds", logger=logger)
+            sleep(drain_seconds)
+            ec2.terminate_instances_and_spot_requests(retiring, aws_region=aws_region)
+
+    # fewer instances than before, the surplus goes once all replacements are healthy
+    if old_instance_ids:
+        sleep(drain_seconds)
+        ec2.terminate_instances_and_spot_requests(old_instance_ids, aws_region=aws_region)
+
+    _common_.info_logger(f"replaced instances with {new_instance_ids}", logger=logger)
+    return new_instance_ids
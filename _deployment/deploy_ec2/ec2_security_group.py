@@ -7,6 +7,29 @@ from _common import _common as _common_
 _WAIT_TIME_ = 4
 
 
+# Define ingress rules
+_DEFAULT_INGRESS_RULES_ = [
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 22,
+        'ToPort': 22,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow SSH from anywhere
+    },
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 80,
+        'ToPort': 80,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow HTTP from anywhere
+    },
+    {
+        'IpProtocol': 'tcp',
+        'FromPort': 443,
+        'ToPort': 443,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow HTTPS from anywhere
+    }
+]
+
+
 @_common_.aws_client_handle_exceptions()
 def run(vpc_id: str,
         sg_name: str,
@@ -15,7 +38,10 @@ def run(vpc_id: str,
         sg_ingress_rules: List = [],
         logger: Log = None
         ) -> Union[str, None]:
-    """this function checks whether the security group exists, recreate it if it exists
+    """this function makes sure the security group exists with exactly the ingress rules
+
+    an existing security group is kept (instances may still reference it), its rules are read once and only the
+    difference is applied with at most one authorize and one revoke call, unchanged rules make no mutating call
 
     Args:
 
@@ -32,65 +58,45 @@ def run(vpc_id: str,
     """
     from _aws import ec2
 
+    sg_ingress_rules = sg_ingress_rules if sg_ingress_rules else _DEFAULT_INGRESS_RULES_
+
     _parameters = {
         "aws_region": aws_region,
         "sg_name": sg_name,
         "vpc_id": vpc_id
     }
-    if sg_id := ec2.get_security_group_id(**_parameters):
+    if security_group := ec2.get_security_group(**_parameters):
+        sg_id, current_rules = security_group.get("GroupId"), security_group.get("IpPermissions", [])
+    else:
+        from _aws import _tagging
         _parameters = {
             "aws_region": aws_region,
-            "sg_id": sg_id,
+            "sg_name": sg_name,
+            "vpc_id": vpc_id,
+            "tags": _tagging.project_tags(project_name)
         }
-        ec2.delete_security_group(**_parameters)
-    _parameters = {
-        "aws_region": aws_region,
-        "sg_name": sg_name,
-        "vpc_id": vpc_id
-    }
-    sg_id = ec2.create_security_group(**_parameters)
+        sg_id, current_rules = ec2.create_security_group(**_parameters), []
     if not sg_id:
         _common_.error_logger(currentframe().f_code.co_name,
                               f"Not able to create security group {sg_name}",
                               logger=None,
                               mode="error",
                               ignore_flag=False)
-    # Define ingress rules
-    default_ingress_rules = [
-        {
-            'IpProtocol': 'tcp',
-            'FromPort': 22,
-            'ToPort': 22,
-            'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow SSH from anywhere
-        },
-        {
-            'IpProtocol': 'tcp',
-            'FromPort': 80,
-            'ToPort': 80,
-            'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow HTTP from anywhere
-        },
-        {
-            'IpProtocol': 'tcp',
-            'FromPort': 443,
-            'ToPort': 443,
-            'IpRanges': [{'CidrIp': '0.0.0.0/0'}]  # Allow HTTPS from anywhere
-        }
-    ]
 
-    sg_ingress_rules = sg_ingress_rules if sg_ingress_rules else default_ingress_rules
-
-    _parameters = {
-        "aws_region": aws_region,
-        "sg_id": sg_id,
-        "sg_ingress_rules": sg_ingress_rules
-    }
+    to_authorize, to_revoke = ec2.diff_sg_ingress_rules(current_rules, sg_ingress_rules)
+    if not to_authorize and not to_revoke:
+        _common_.info_logger(f"security group {sg_name} ({sg_id}) is up to date", logger=logger)
+        return sg_id
 
-    if not ec2.create_sg_ingress_rules(**_parameters):
+    # authorize first, a rule changing its source never leaves the port closed
+    if to_authorize and not ec2.create_sg_ingress_rules(sg_id=sg_id, sg_ingress_rules=to_authorize, aws_region=aws_region):
         _common_.error_logger(currentframe().f_code.co_name,
-                              f"Not able to create security group ingress rules for {project_name}-security-group",
+                              f"Not able to create security group ingress rules for {sg_name}",
                               logger=None,
                               mode="error",
                               ignore_flag=False)
+    if to_revoke:
+        ec2.revoke_sg_ingress_rules(sg_id=sg_id, sg_ingress_rules=to_revoke, aws_region=aws_region)
     return sg_id
 
 
@@ -0,0 +1,71 @@
+from typing import List, Union
+import gzip
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+# ec2 accepts at most 16 KB of user data, cloud-init transparently decompresses gzipped user data
+_GZIP_THRESHOLD_ = 8192
+_ECR_LOGIN_ATTEMPTS_ = 30
+_DOCKER_READY_TIMEOUT_ = 120
+_HEALTH_CHECK_INTERVAL_ = 30
+_HEALTH_CHECK_GRACE_PERIOD_ = 60
+_HEALTH_CHECK_FAILURES_ = 3
+
+
+def generate_user_data(project_name: str,
+                       aws_account_number: str,
+                       ecr_repository_name: str,
+                       ports: List[int],
+                       health_check_port: int = None,
+                       health_check_path: str = "/",
+                       image_preloaded: bool = False,
+                       aws_region: str = "us-east-1",
+                       logger: Log = None
+                       ) -> Union[str, bytes]:
+    """render the cloud-config starting the project container as a systemd service
+
+    docker is installed while the ecr login token is fetched, the script then waits for the docker socket and
+    a successful login instead of sleeping. the service restarts the container whenever it exits and starts it
+    again after a reboot, a timer probes the health check port and restarts the service after consecutive failures
+
+    Args:
+        project_name: project name
+        aws_account_number: aws account number
+        ecr_repository_name: ecr repository holding the project image (tag latest)
+        ports: ports published by the container on the same host port
+        health_check_port: port probed by the health check, the first port if empty
+        health_check_path: http path probed by the health check
+        image_preloaded: docker and the image are baked into the ami, nothing is installed or pulled
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        the cloud-config, gzipped if it is larger than _GZIP_THRESHOLD_ bytes
+
+    """
+    from jinja2 import Template
+    from _deployment.deploy_ec2 import ec2_userdata_template
+
+    registry = f"{aws_account_number}.dkr.ecr.{aws_region}.amazonaws.com"
+    user_data = Template(ec2_userdata_template.user_data_cloud_config_template).render({
+        "service_name": f"pg-auto-{project_name}",
+        "registry": registry,
+        "image": f"{registry}/{ecr_repository_name}:latest",
+        "forwarding_port_string": " ".join(f"-p {each_port}:{each_port}" for each_port in ports),
+        "image_preloaded": image_preloaded,
+        "aws_region": aws_region,
+        "ecr_login_attempts": _ECR_LOGIN_ATTEMPTS_,
+        "docker_ready_timeout": _DOCKER_READY_TIMEOUT_,
+        "health_check_port": health_check_port or ports[0],
+        "health_check_path": health_check_path,
+        "health_check_interval": _HEALTH_CHECK_INTERVAL_,
+        "health_check_grace_period": _HEALTH_CHECK_GRACE_PERIOD_,
+        "health_check_failures": _HEALTH_CHECK_FAILURES_,
+    })
+
+    if len(user_data.encode("utf-8")) > _GZIP_THRESHOLD_:
+        compressed = gzip.compress(user_data.encode("utf-8"))
+        _common_.info_logger(f"user data gzipped from {len(user_data)} to {len(compressed)} bytes", logger=logger)
+        return compressed
+    return user_data
@@ -29,7 +29,7 @@ systemctl start docker
 
 sleep 5
 
-aws ecr get-login-password --region us-east-1 | sudo docker login --username AWS --password-stdin {{ aws_account_number }}.dkr.ecr.{{ aws_region }}.amazonaws.com
+aws ecr get-login-password --region {{ aws_region }} | sudo docker login --username AWS --password-stdin {{ aws_account_number }}.dkr.ecr.{{ aws_region }}.amazonaws.com
 
 sleep 5
 
@@ -38,4 +38,121 @@ sudo docker run -d {{ forwarding_port_string }} {{ aws_account_number }}.dkr.ecr
 sleep 10
 
 --//
-"""
\ No newline at end of file
+"""
+
+# runs once on the image builder, docker and the project image are preloaded and the instance powers itself
+# off so the image is taken from a stopped instance, a failing step leaves the builder running
+user_data_bake_template = """#!/bin/bash
+set -euo pipefail
+
+yum install -y docker
+systemctl enable docker
+systemctl start docker
+
+aws ecr get-login-password --region {{ aws_region }} | docker login --username AWS --password-stdin {{ aws_account_number }}.dkr.ecr.{{ aws_region }}.amazonaws.com
+docker pull {{ aws_account_number }}.dkr.ecr.{{ aws_region }}.amazonaws.com/{{ ecr_repo }}:latest
+docker logout {{ aws_account_number }}.dkr.ecr.{{ aws_region }}.amazonaws.com
+
+shutdown -h now
+"""
+
+# cloud-config rendered by ec2_userdata.generate_user_data, the container runs as a systemd service so it is
+# restarted when it exits and started again after a reboot, a timer restarts it when the health check keeps failing
+user_data_cloud_config_template = """#cloud-config
+write_files:
+  - path: /usr/local/bin/{{ service_name }}-ecr-login
+    permissions: "0755"
+    content: |
+      #!/bin/bash
+      # retry until the login succeeds, the instance profile credentials may not be available right away
+      for attempt in $(seq 1 {{ ecr_login_attempts }}); do
+        aws ecr get-login-password --region {{ aws_region }} | docker login --username AWS --password-stdin {{ registry }} && exit 0
+        sleep $(( attempt < 5 ? attempt : 5 ))
+      done
+      exit 1
+  - path: /usr/local/bin/{{ service_name }}-bootstrap
+    permissions: "0755"
+    content: |
+      #!/bin/bash
+      set -euo pipefail
+{%- if not image_preloaded %}
+      # the ecr token is fetched while docker is being installed
+      aws ecr get-login-password --region {{ aws_region }} > /run/{{ service_name }}-ecr-token &
+      token_pid=$!
+{%- endif %}
+      command -v docker > /dev/null || yum install -y docker
+      systemctl enable --now docker
+      # wait for the docker socket instead of sleeping
+      timeout {{ docker_ready_timeout }} bash -c 'until docker info > /dev/null 2>&1; do sleep 1; done'
+{%- if not image_preloaded %}
+      # wait has to run in this shell, the token job is not a child of a subshell
+      if wait "$token_pid" && docker login --username AWS --password-stdin {{ registry }} < /run/{{ service_name }}-ecr-token; then
+        :
+      else
+        /usr/local/bin/{{ service_name }}-ecr-login
+      fi
+      rm -f /run/{{ service_name }}-ecr-token
+{%- endif %}
+      systemctl daemon-reload
+      systemctl enable --now {{ service_name }}.service {{ service_name }}-health.timer
+  - path: /usr/local/bin/{{ service_name }}-health-check
+    permissions: "0755"
+    content: |
+      #!/bin/bash
+      # restart the container after {{ health_check_failures }} consecutive failed probes
+      state=/run/{{ service_name }}.health
+      if curl -fs --max-time 5 -o /dev/null http://127.0.0.1:{{ health_check_port }}{{ health_check_path }}; then
+        echo 0 > $state
+        exit 0
+      fi
+      failures=$(( $(cat $state 2> /dev/null || echo 0) + 1 ))
+      echo $failures > $state
+      if [ $failures -ge {{ health_check_failures }} ]; then
+        echo 0 > $state
+        systemctl restart {{ service_name }}.service
+      fi
+  - path: /etc/systemd/system/{{ service_name }}.service
+    content: |
+      [Unit]
+      Description={{ service_name }} container
+      Wants=network-online.target
+      After=docker.service network-online.target
+      Requires=docker.service
+      StartLimitIntervalSec=0
+
+      [Service]
+      Restart=always
+      RestartSec=3
+      TimeoutStartSec=0
+      ExecStartPre=-/usr/bin/docker rm -f {{ service_name }}
+{%- if not image_preloaded %}
+      # a failed pull (e.g. expired login after a reboot) falls back to the local image
+      ExecStartPre=-/usr/bin/docker pull {{ image }}
+{%- endif %}
+      ExecStart=/usr/bin/docker run --rm --name {{ service_name }} {{ forwarding_port_string }} {{ image }}
+      ExecStop=/usr/bin/docker stop {{ service_name }}
+
+      [Install]
+      WantedBy=multi-user.target
+  - path: /etc/systemd/system/{{ service_name }}-health.service
+    content: |
+      [Unit]
+      Description={{ service_name }} health check
+
+      [Service]
+      Type=oneshot
+      ExecStart=/usr/local/bin/{{ service_name }}-health-check
+  - path: /etc/systemd/system/{{ service_name }}-health.timer
+    content: |
+      [Unit]
+      Description={{ service_name }} health check timer
+
+      [Timer]
+      OnActiveSec={{ health_check_grace_period }}
+      OnUnitActiveSec={{ health_check_interval }}
+
+      [Install]
+      WantedBy=timers.target
+runcmd:
+  - /usr/local/bin/{{ service_name }}-bootstrap
+"""
@@ -0,0 +1,158 @@
+from typing import Union
+from _common import _common as _common_
+import boto3
+
+
+_WAIT_TIME_ = 4
+
+
+@_common_.aws_client_handle_exceptions()
+def aws_client(service_name: str, aws_region: str):
+    return boto3.client(service_name, region_name=aws_region)
+
+
+def _lambda_function_arn(lambda_function_name: str, aws_account_number: str, aws_region: str) -> str:
+    return f"arn:aws:lambda:{aws_region}:{aws_account_number}:function:{lambda_function_name}"
+
+
+def _permission_statement_id(api_gateway_api_id: str, lambda_function_name: str) -> str:
+    return f"http-api-{api_gateway_api_id}-{lambda_function_name}"
+
+
+@_common_.aws_client_handle_exceptions()
+def run(lambda_function_name: str,
+        aws_account_number: str,
+        api_gateway_api_name: str,
+        api_method: str = "GET",
+        project_name: str = None,
+        aws_region: str = "us-east-1"
+        ) -> Union[str, None]:
+    """expose a lambda function through an http api (api gateway v2)
+
+    a new api is quick created (route, lambda proxy integration with payload format 2.0 and an
+    auto-deployed $default stage in one call), an existing api is reconciled so only the missing pieces are
+    created, nothing needs to be deleted and recreated and no explicit deployment is needed
+
+    Args:
+        lambda_function_name: the name of the lambda function, used as the route path
+        aws_account_number: aws account number
+        api_gateway_api_name: the name of the http api
+        api_method: the http method of the route
+        project_name: project name, used for tagging
+        aws_region: aws region
+
+    Returns:
+        the invoke url of the route
+
+    """
+    from _aws import _api_gateway_v2, _tagging
+
+    route_key = f"{api_method} /{lambda_function_name}"
+    lambda_function_arn = _lambda_function_arn(lambda_function_name, aws_account_number, aws_region)
+
+    if not (api := _api_gateway_v2.http_api_get_by_name(api_gateway_name=api_gateway_api_name,
+                                                        aws_region=aws_region)):
+        api = _api_gateway_v2.http_api_quick_create(api_gateway_name=api_gateway_api_name,
+                                                    route_key=route_key,
+                                                    lambda_function_arn=lambda_function_arn,
+                                                    tags=_tagging.project_tags(project_name) if project_name else None,
+                                                    aws_region=aws_region)
+        api_gateway_api_id = api.get("ApiId")
+    else:
+        api_gateway_api_id = api.get("ApiId")
+
+        integration_id = next((each_integration.get("IntegrationId")
+                               for each_integration in _api_gateway_v2.get_http_api_integrations(api_gateway_api_id=api_gateway_api_id,
+                                                                                                 aws_region=aws_region) or []
+                               if each_integration.get("IntegrationUri") == lambda_function_arn and
+                               each_integration.get("PayloadFormatVersion") == _api_gateway_v2._PAYLOAD_FORMAT_VERSION_), None)
+        if not integration_id:
+            integration_id = _api_gateway_v2.create_http_api_lambda_integration(api_gateway_api_id=api_gateway_api_id,
+                                                                                lambda_function_arn=lambda_function_arn,
+                                                                                aws_region=aws_region)
+
+        route = next((each_route for each_route in _api_gateway_v2.get_http_api_routes(api_gateway_api_id=api_gateway_api_id,
+                                                                                         aws_region=aws_region) or []
+                      if each_route.get("RouteKey") == route_key), None)
+        if not route:
+            _api_gateway_v2.create_http_api_route(api_gateway_api_id=api_gateway_api_id,
+                                                  route_key=route_key,
+                                                  integration_id=integration_id,
+                                                  aws_region=aws_region)
+        elif route.get("Target") != f"integrations/{integration_id}":
+            _api_gateway_v2.update_http_api_route(api_gateway_api_id=api_gateway_api_id,
+                                                  route_id=route.get("RouteId"),
+                                                  integration_id=integration_id,
+                                                  aws_region=aws_region)
+
+        if not _api_gateway_v2.get_http_api_stage(api_gateway_api_id=api_gateway_api_id,
+                                                  aws_region=aws_region):
+            _api_gateway_v2.create_http_api_stage(api_gateway_api_id=api_gateway_api_id,
+                                                  aws_region=aws_region)
+
+    # the http api invokes lambda with its own service principal, no execution role is involved
+    _api_gateway_v2.add_lambda_invoke_permission(
+        lambda_function_name=lambda_function_name,
+        source_arn=f"arn:aws:execute-api:{aws_region}:{aws_account_number}:{api_gateway_api_id}/*/{api_method}/{lambda_function_name}",
+        statement_id=_permission_statement_id(api_gateway_api_id, lambda_function_name),
+        aws_region=aws_region)
+
+    invoke_url = f"{api.get('ApiEndpoint')}/{lambda_function_name}"
+    _common_.info_logger(f"http api route {route_key} is available at {invoke_url}")
+    print(invoke_url)
+    return invoke_url
+
+
+@_common_.aws_client_handle_exceptions()
+def destroy(lambda_function_name: str,
+            aws_account_number: str,
+            api_gateway_api_name: str,
+            api_method: str = "GET",
+            aws_region: str = "us-east-1"
+            ) -> bool:
+    """remove the route, integration and invoke permission of a lambda function from an http api,
+    the api itself is deleted once it has no routes left
+
+    Args:
+        lambda_function_name: the name of the lambda function, used as the route path
+        aws_account_number: aws account number
+        api_gateway_api_name: the name of the http api
+        api_method: the http method of the route
+        aws_region: aws region
+
+    Returns:
+        True if the operation is successful
+
+    """
+    from _aws import _api_gateway_v2
+
+    if not (api := _api_gateway_v2.http_api_get_by_name(api_gateway_name=api_gateway_api_name,
+                                                        aws_region=aws_region)):
+        _common_.info_logger(f"http api {api_gateway_api_name} does not exist")
+        return False
+
+    api_gateway_api_id = api.get("ApiId")
+    route_key = f"{api_method} /{lambda_function_name}"
+    lambda_function_arn = _lambda_function_arn(lambda_function_name, aws_account_number, aws_region)
+
+    routes = _api_gateway_v2.get_http_api_routes(api_gateway_api_id=api_gateway_api_id, aws_region=aws_region) or []
+    for each_route in routes:
+        if each_route.get("RouteKey") == route_key:
+            _api_gateway_v2.delete_http_api_route(api_gateway_api_id=api_gateway_api_id,
+                                                  route_id=each_route.get("RouteId"),
+                                                  aws_region=aws_region)
+
+    _api_gateway_v2.remove_lambda_invoke_permission(lambda_function_name=lambda_function_name,
+                                                    statement_id=_permission_statement_id(api_gateway_api_id, lambda_function_name),
+                                                    aws_region=aws_region)
+
+    if not [each_route for each_route in routes if each_route.get("RouteKey") != route_key]:
+        return _api_gateway_v2.delete_http_api(api_gateway_api_id=api_gateway_api_id, aws_region=aws_region)
+
+    for each_integration in _api_gateway_v2.get_http_api_integrations(api_gateway_api_id=api_gateway_api_id,
+                                                                      aws_region=aws_region) or []:
+        if each_integration.get("IntegrationUri") == lambda_function_arn:
+            _api_gateway_v2.delete_http_api_integration(api_gateway_api_id=api_gateway_api_id,
+                                                        integration_id=each_integration.get("IntegrationId"),
+                                                        aws_region=aws_region)
+    return True
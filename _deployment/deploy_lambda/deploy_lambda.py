@@ -13,7 +13,6 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
@@ -206,6 +205,7 @@ def create_lambda_function(function_name: str,
                            lambda_function_role_arn: str,
                            timeout: int = 30,
                            vpc_config: Dict = None,
+                           tags: Dict = None,
                            logger: Log = None) -> Union[str, None]:
 
     """Creates an aws lambda function using an image stored in an ECR repository.
@@ -216,6 +216,8 @@ def create_lambda_function(function_name: str,
         aws_region: The aws region where the Lambda function will be created.
         lambda_function_role_arn: The name of the iam role that the Lambda function will assume.
         timeout: The amount of time that Lambda allows a function to run before stopping it.
+        vpc_config: subnets and security groups of the function
+        tags: tags of the function, tag key -> tag value
         logger: The logger object to use for logging.
 
     Returns:
@@ -239,7 +241,11 @@ def create_lambda_function(function_name: str,
         }
         if vpc_config:
             _parameters["VpcConfig"] = vpc_config
-        response = lambda_client.create_function(**_parameters)
+        if tags:
+            _parameters["Tags"] = tags
+        # a new role is rejected as "cannot be assumed" until iam has propagated it, that is the only error retried
+        from _aws import iam_role
+        response = iam_role.retry_until_role_usable(lambda: lambda_client.create_function(**_parameters), logger=logger)
         _common_.info_logger(f"Lambda function {function_name} created ")
         return response.get("FunctionArn")
 
@@ -317,10 +323,12 @@ def run(project_name: str,
         'SubnetIds': [network_info.get("public_subnet")],
         'SecurityGroupIds': [sg_id]
     }
+    from _aws import _tagging
     create_lambda_function(function_name=lambda_function_name,
                            image_uri=ecr_image_uri,
                            aws_region=aws_region,
                            lambda_function_role_arn=role_arn,
                            timeout=31,
-                           vpc_config=VpcConfig)
+                           vpc_config=VpcConfig,
+                           tags=_tagging.project_tags(project_name))
     sleep(_WAIT_TIME_)
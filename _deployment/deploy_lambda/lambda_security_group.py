@@ -43,10 +43,12 @@ def run(vpc_id: str,
             "sg_id": sg_id,
         }
         ec2.delete_security_group(**_parameters)
+    from _aws import _tagging
     _parameters = {
         "aws_region": aws_region,
         "sg_name": sg_name,
-        "vpc_id": vpc_id
+        "vpc_id": vpc_id,
+        "tags": _tagging.project_tags(project_name)
     }
     sg_id = ec2.create_security_group(**_parameters)
     if not sg_id:
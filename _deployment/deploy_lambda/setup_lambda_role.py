@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import List, Union, Dict
 import os
 import boto3
 from logging import Logger as Log
@@ -12,10 +12,11 @@ from botocore.exceptions import NoCredentialsError, PartialCredentialsError, Cli
 from _common import _common as _common_
 from _engine import _engine as _engine_
 from _util import _util_common as _util_common
-import boto3
 
 _WAIT_TIME_ = 4
 
+_LAMBDA_POLICY_ARNS_ = ["arn:aws:iam::aws:policy/AdministratorAccess"]
+
 
 def aws_client(service_name: str, aws_region: str):
     return boto3.client(service_name, region_name=aws_region)
@@ -97,13 +98,15 @@ def delete_role(aws_role_name: str,
 
 def create_role(aws_role_name: str,
                 assume_role_policy_document: dict,
-                aws_region: str = "us-east-1") -> Union[str, None]:
+                aws_region: str = "us-east-1",
+                tags: Dict = None) -> Union[str, None]:
     """
 
     Args:
         aws_role_name: The name of the IAM role to create.
         assume_role_policy_document: The policy document that grants an entity permission to assume the role.
         aws_region: aws region
+        tags: tags of the role, tag key -> tag value
 
     Returns:
         role arn if the role is deleted successfully else None
@@ -116,6 +119,9 @@ def create_role(aws_role_name: str,
             "RoleName": aws_role_name,
             "AssumeRolePolicyDocument": json.dumps(assume_role_policy_document)
         }
+        if tags:
+            from _aws import _tagging
+            _parameters["Tags"] = _tagging.to_tag_list(tags)
         response = iam_client.create_role(**_parameters)
         # print(response)
         _common_.info_logger(f"Role '{aws_role_name}' created successfully.")
@@ -169,6 +175,7 @@ def attach_policy_to_role(role_name: str,
 @_common_.exception_handler
 def create_lambda_function_role(aws_role_name: str,
                                 aws_region: str = "us-east-1",
+                                tags: Dict = None,
                                 logger: Log = None
                                 ) -> Union[str, None]:
 
@@ -178,6 +185,7 @@ def create_lambda_function_role(aws_role_name: str,
     Args:
         aws_role_name: The name of the IAM role to create.
         aws_region: aws region
+        tags: tags of the role, tag key -> tag value
         logger: The logger object to use for logging.
 
     Returns:
@@ -198,28 +206,30 @@ def create_lambda_function_role(aws_role_name: str,
             }
         ]
     }
-    role_arn = create_role(aws_role_name, assume_lambda_trust_role_policy, aws_region)
+    role_arn = create_role(aws_role_name, assume_lambda_trust_role_policy, aws_region, tags=tags)
     attach_policy_to_role(aws_role_name, ADMIN_POLICY_ARN)
     return role_arn
 
 
+def get_role_name(project_name: str) -> str:
+    """name of the lambda function role of a project, stable as long as its trust policy and policies are"""
+    from _aws import iam_role
+    return iam_role.get_role_name(f"role-lambda-{project_name}-", "lambda", _LAMBDA_POLICY_ARNS_)
+
+
 def run(ecr_repository_name: str,
         aws_region: str,
         aws_account_number: str = None,
         project_path: str = None,
         lambda_function_name: str = None,
         lambda_function_role_name: str = None,
-        api_gateway_api_name: str = None) -> None:
-
-    # Create IAM role for Lambda
-
-    if check_role_exists(lambda_function_role_name):
-        delete_role(lambda_function_role_name)
-        sleep(_WAIT_TIME_)
-
-    lambda_function_role_arn = create_lambda_function_role(lambda_function_role_name)
-    sleep(_WAIT_TIME_)
-
-
-
-
+        api_gateway_api_name: str = None,
+        project_name: str = None) -> None:
+
+    # Create IAM role for Lambda, an existing role is reused and only its drift is fixed
+    # lambda create_function retries until the role can be assumed, only its existence is waited for
+    from _aws import iam_role, _tagging
+    iam_role.ensure_role(iam_role_name=lambda_function_role_name,
+                         service_name="lambda",
+                         policy_arns=_LAMBDA_POLICY_ARNS_,
+                         tags=_tagging.project_tags(project_name) if project_name else None)
@@ -1,4 +1,3 @@
-from time import sleep
 from _common import _common as _common_
 
 _WAIT_TIME_ = 4
@@ -6,6 +5,7 @@ _WAIT_TIME_ = 4
 
 def destroy_api_gateway_resource(api_gateway_api_name: str,
                                  lambda_function_name: str,
+                                 http_method: str = "GET",
                                  aws_region: str = "us-east-1"
                                  ) -> bool:
 
@@ -27,7 +27,6 @@ def destroy_api_gateway_resource(api_gateway_api_name: str,
                                                                lambda_function_name=lambda_function_name,
                                                                aws_region=aws_region)
 
-    http_method = "GET"
     status_code = "200"
 
     _common_.info_logger(f"resource_id: {resource_id}, api_gateway_api_id: {api_gateway_api_id} api_gateway_root_res_id: {api_gateway_root_res_id}")
@@ -38,30 +37,23 @@ def destroy_api_gateway_resource(api_gateway_api_name: str,
 
     response = _api_gateway.delete_api_gateway_method_response(api_gateway_api_id=api_gateway_api_id,
                                                                resource_id=resource_id,
-                                                               http_method="http_method",
+                                                               http_method=http_method,
                                                                status_code=status_code,
                                                                aws_region=aws_region)
 
-    sleep(_WAIT_TIME_)
-
     response = _api_gateway.delete_api_gateway_integration(api_gateway_api_id=api_gateway_api_id,
                                                            resource_id=resource_id,
-                                                           http_method="http_method",
+                                                           http_method=http_method,
                                                            aws_region=aws_region)
 
-    sleep(_WAIT_TIME_)
-
     response = _api_gateway.delete_api_gateway_method(api_gateway_api_id=api_gateway_api_id,
                                                       resource_id=resource_id,
-                                                      http_method="http_method",
+                                                      http_method=http_method,
                                                       aws_region=aws_region)
 
-    sleep(_WAIT_TIME_)
-
     response = _api_gateway.delete_api_gateway_resource(api_gateway_api_id=api_gateway_api_id,
-                                                        resource_id=resource_id)
-
-    sleep(_WAIT_TIME_)
+                                                        resource_id=resource_id,
+                                                        aws_region=aws_region)
 
     response = _api_gateway.api_gateway_delete_by_name(api_gateway_name=api_gateway_api_name,
                                                        aws_region=aws_region)
@@ -0,0 +1,243 @@
+from typing import List, Dict, Union
+from functools import partial
+from logging import Logger as Log
+from _common import _common as _common_
+import boto3
+
+
+_SG_RELEASE_TIMEOUT_ = 1200
+
+
+@_common_.aws_client_handle_exceptions("ResourceNotFoundException")
+def _lambda_function_exists(lambda_function_name: str,
+                            aws_region: str = "us-east-1"
+                            ) -> bool:
+    lambda_client = boto3.client('lambda', region_name=aws_region)
+    lambda_client.get_function(FunctionName=lambda_function_name)
+    return True
+
+
+def terminate_instance(instance_id: Union[str, List[str]],
+                       aws_region: str = "us-east-1"
+                       ) -> bool:
+    """terminate instance(s) with a single shared wait, cancelling the spot requests of spot instances first"""
+    from _aws import ec2
+
+    if isinstance(instance_id, str): instance_id = [instance_id]
+    return ec2.terminate_instances_and_spot_requests(instance_id, aws_region=aws_region)
+
+
+def delete_security_group_when_released(sg_id: str,
+                                        aws_region: str = "us-east-1"
+                                        ) -> bool:
+    """security groups can only be deleted once no network interface uses them anymore, lambda hyperplane
+    interfaces are released a while after the function is deleted so the interfaces are polled instead of
+    retrying the delete on a fixed sleep"""
+    from _aws import ec2
+    from _deployment.destroy_deployment import teardown_engine
+
+    if not teardown_engine.poll_until(lambda: not ec2.get_security_group_network_interfaces(sg_id=sg_id,
+                                                                                             aws_region=aws_region),
+                                      timeout=_SG_RELEASE_TIMEOUT_):
+        raise TimeoutError(f"security group {sg_id} is still in use after {_SG_RELEASE_TIMEOUT_} seconds")
+    return ec2.delete_security_group(sg_id=sg_id, max_retries=1, aws_region=aws_region)
+
+
+def _security_group_resource(name: str,
+                             sg_name: str,
+                             depends_on: List[str] = None,
+                             aws_region: str = "us-east-1"
+                             ) -> Dict:
+    from _aws import ec2
+    from _deployment.deploy_ec2 import ec2_network
+    from _deployment.destroy_deployment import teardown_engine
+
+    def _delete():
+        vpc_id = ec2_network.run(aws_region=aws_region).get("vpc_id")
+        if not (sg_id := ec2.get_security_group_id(sg_name=sg_name, vpc_id=vpc_id, aws_region=aws_region)):
+            _common_.info_logger(f"security group {sg_name} does not exist")
+            return True
+        return delete_security_group_when_released(sg_id, aws_region)
+
+    return teardown_engine.resource(name, _delete, depends_on=depends_on)
+
+
+def lambda_pattern_resources(project_name: str,
+                             api_gateway_api_name: str,
+                             api_type: str = "rest",
+                             api_method: str = "GET",
+                             aws_account_number: str = None,
+                             aws_region: str = "us-east-1"
+                             ) -> List[Dict]:
+    """resources created by _task._aws_apigateway_lambda.create_deployment
+
+    api route -> lambda function -> (lambda and api gateway roles, ecr repository, lambda security group)
+
+    Args:
+        project_name: project name
+        api_gateway_api_name: api gateway api name
+        api_type: rest or http
+        api_method: http method of the api route
+        aws_account_number: aws account number, needed for the http api
+        aws_region: aws region
+
+    Returns:
+        resource definitions for the teardown engine
+
+    """
+    from _aws import iam_role
+    from _deployment.build_image import setup_ecr
+    from _deployment.deploy_lambda import deploy_lambda
+    from _deployment.destroy_deployment import teardown_engine
+
+    lambda_function_name = f"lambda-{project_name}"
+    ecr_repository_name = f"ecr_{project_name}"
+    # the lambda function role and the api gateway execution role, see iam_role.get_role_name
+    role_prefixes = [f"role-lambda-{project_name}-", f"role-api-gateway-ex-{project_name}-"]
+
+    if api_type == "http":
+        from _deployment.deploy_http_api import deploy_http_api
+
+        def _delete_api():
+            return deploy_http_api.destroy(lambda_function_name=lambda_function_name,
+                                           aws_account_number=aws_account_number,
+                                           api_gateway_api_name=api_gateway_api_name,
+                                           api_method=api_method,
+                                           aws_region=aws_region)
+    else:
+        from _deployment.destroy_api_gateway import destroy_api_gateway
+
+        def _delete_api():
+            return destroy_api_gateway.destroy_api_gateway_resource(api_gateway_api_name=api_gateway_api_name,
+                                                                    lambda_function_name=lambda_function_name,
+                                                                    http_method=api_method,
+                                                                    aws_region=aws_region)
+
+    def _delete_lambda_function():
+        if _lambda_function_exists(lambda_function_name, aws_region):
+            deploy_lambda.delete_lambda_function(lambda_function_name, aws_region)
+
+    def _delete_lambda_roles():
+        # the role names carry a hash of their policies, every role of the project is removed, roles of other
+        # projects sharing the prefix (e.g. app-prod for app) are not
+        for each_role_name in [each_name
+                               for each_prefix in role_prefixes
+                               for each_name in iam_role.list_hashed_role_names(iam_role_name_prefix=each_prefix,
+                                                                                project_name=project_name) or []]:
+            iam_role.detach_all_policies_from_role(iam_role_name=each_role_name)
+            iam_role.delete_role(iam_role_name=each_role_name)
+
+    return [
+        teardown_engine.resource("api", _delete_api, depends_on=["lambda_function"]),
+        teardown_engine.resource("lambda_function",
+                                 _delete_lambda_function,
+                                 depends_on=["lambda_roles", "ecr_repository", "lambda_security_group"],
+                                 is_deleted=lambda: not _lambda_function_exists(lambda_function_name, aws_region)),
+        teardown_engine.resource("lambda_roles", _delete_lambda_roles),
+        teardown_engine.resource("ecr_repository",
+                                 lambda: setup_ecr.delete_ecr_repository(ecr_repository_name,
+                                                                         aws_region=aws_region,
+                                                                         force=True)),
+        _security_group_resource("lambda_security_group", f"sg_{lambda_function_name}", aws_region=aws_region),
+    ]
+
+
+def ec2_pattern_resources(project_name: str,
+                          keypair_name: str,
+                          sg_name: str,
+                          ecr_repository_name: str = None,
+                          aws_region: str = "us-east-1"
+                          ) -> List[Dict]:
+    """resources created by _deployment.deploy_ec2.deploy_ec2.run
+
+    the auto scaling group goes first (taking its instances with it) together with the load balancer, the
+    other instances are terminated in one batch, the security group and the instance profile wait for all of them, the
+    target group waits for the auto scaling group and the load balancer, the key pair, the baked images and the
+    ecr repository are not in use by anything and go first
+
+    Args:
+        project_name: project name
+        keypair_name: key pair name
+        sg_name: security group name
+        ecr_repository_name: ecr repository name, skipped if empty
+        aws_region: aws region
+
+    Returns:
+        resource definitions for the teardown engine
+
+    """
+    from _aws import ec2, iam_role
+    from _deployment.build_image import setup_ecr
+    from _deployment.deploy_ec2 import ec2_key_pair, ec2_launch_template, ec2_bake_ami, ec2_auto_scaling
+    from _deployment._deploy_vpc import deploy_vpc
+    from _deployment.destroy_deployment import teardown_engine
+
+    iam_role_name = f"iam-role-{project_name}"
+    instance_profile_name = f"inst_{project_name}"
+
+    def _delete_instance_profile():
+        for each_role_name in iam_role.get_instance_profile(instance_profile_name=instance_profile_name) or []:
+            iam_role.detach_role_from_instance_profile(iam_role_name=each_role_name,
+                                                       instance_profile_name=instance_profile_name)
+        iam_role.delete_instance_profile(instance_profile_name=instance_profile_name)
+
+    def _delete_instance_role():
+        if iam_role.check_role_exists(iam_role_name=iam_role_name):
+            iam_role.detach_all_policies_from_role(iam_role_name=iam_role_name)
+            iam_role.delete_role(iam_role_name=iam_role_name)
+
+    instance_ids = ec2.find_instances_by_tag("pg_auto_project_name", project_name, aws_region=aws_region) or []
+    # all instances are terminated together and share one wait
+    instance_resources = [teardown_engine.resource("instances",
+                                                   partial(terminate_instance, instance_ids, aws_region),
+                                                   depends_on=["security_group", "instance_profile", "vpc"])] if instance_ids else []
+
+    resources = instance_resources + [
+        teardown_engine.resource("auto_scaling_group",
+                                 partial(ec2_auto_scaling.destroy_auto_scaling_group, project_name, aws_region),
+                                 depends_on=[each_resource.get("name") for each_resource in instance_resources] +
+                                            ["target_group", "launch_template", "security_group", "vpc"]),
+        teardown_engine.resource("load_balancer",
+                                 partial(ec2_auto_scaling.destroy_load_balancer, project_name, aws_region),
+                                 depends_on=["target_group", "security_group", "vpc"]),
+        teardown_engine.resource("target_group",
+                                 partial(ec2_auto_scaling.destroy_target_group, project_name, aws_region),
+                                 depends_on=["vpc"]),
+        _security_group_resource("security_group", sg_name, depends_on=["vpc"], aws_region=aws_region),
+        # only deployed with dedicated_vpc, everything running in it goes first
+        teardown_engine.resource("vpc", partial(deploy_vpc.destroy, project_name, aws_region)),
+        teardown_engine.resource("instance_profile", _delete_instance_profile, depends_on=["instance_role"]),
+        teardown_engine.resource("instance_role", _delete_instance_role),
+        teardown_engine.resource("launch_template",
+                                 lambda: ec2_launch_template.destroy(lt_name=f"lt-{project_name}-launch-template",
+                                                                     aws_region=aws_region)),
+        teardown_engine.resource("key_pair", lambda: ec2_key_pair.destroy(key_name=keypair_name,
+                                                                          aws_region=aws_region)),
+        teardown_engine.resource("baked_images", lambda: ec2_bake_ami.destroy(project_name=project_name,
+                                                                              aws_region=aws_region)),
+    ]
+    if ecr_repository_name:
+        resources.append(teardown_engine.resource("ecr_repository",
+                                                  lambda: setup_ecr.delete_ecr_repository(ecr_repository_name,
+                                                                                          aws_region=aws_region,
+                                                                                          force=True)))
+    return resources
+
+
+def run(resources: List[Dict],
+        logger: Log = None
+        ) -> bool:
+    """tear down the resources and report whether everything is gone
+
+    Args:
+        resources: resource definitions for the teardown engine
+        logger: logger object
+
+    Returns:
+        True if every resource is deleted
+
+    """
+    from _deployment.destroy_deployment import teardown_engine
+
+    status = teardown_engine.run(resources, logger=logger)
+    return all(each_status == teardown_engine.DELETED for each_status in status.values())
@@ -0,0 +1,257 @@
+from typing import List, Dict, Callable, Union
+from datetime import datetime, timezone, timedelta
+from functools import partial
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+_STATE_FILEPATH_ = "pg_auto_deployments.json"
+
+# role name prefixes used by the pipelines, only these roles have their tags read
+_IAM_ROLE_NAME_PREFIXES_ = ["role-lambda-", "iam-role-", "role-api-gateway-ex-"]
+
+# teardown layer of each resource type, a layer is deleted once the layers before it are gone
+_LAYERS_ = {
+    "apigateway:restapis": 0,
+    "apigateway:apis": 0,
+    "autoscaling:autoScalingGroup": 0,
+    "elasticloadbalancing:loadbalancer": 0,
+    "lambda:function": 1,
+    "ec2:instance": 1,
+    "ec2:vpc-endpoint": 1,
+    # the vpc goes with its subnets, route tables and internet gateway once nothing runs in it anymore
+    "ec2:vpc": 3,
+}
+_LAST_LAYER_ = 2
+
+
+def load_deployment_state(state_filepath: str = _STATE_FILEPATH_) -> Union[Dict[str, Dict], None]:
+    """deployments recorded on this machine, None if nothing has been recorded yet"""
+    from _util import _util_file as _util_file_
+
+    if not _util_file_.is_file_exist(state_filepath):
+        return None
+    return _util_file_.json_load(state_filepath)
+
+
+def register_deployment(project_name: str,
+                        pattern: str,
+                        aws_region: str = "us-east-1",
+                        state_filepath: str = _STATE_FILEPATH_
+                        ) -> None:
+    """record a deployment in the local state so the sweeper keeps its resources"""
+    from _util import _util_file as _util_file_
+
+    state = load_deployment_state(state_filepath) or {}
+    state[project_name] = {"pattern": pattern,
+                           "aws_region": aws_region,
+                           "deployed_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+    _util_file_.json_dump(state_filepath, state)
+
+
+def deregister_deployment(project_name: str,
+                          state_filepath: str = _STATE_FILEPATH_
+                          ) -> None:
+    """remove a destroyed deployment from the local state"""
+    from _util import _util_file as _util_file_
+
+    if (state := load_deployment_state(state_filepath)) and state.pop(project_name, None) is not None:
+        _util_file_.json_dump(state_filepath, state)
+
+
+def parse_resource_arn(resource_arn: str) -> Dict[str, str]:
+    """split an arn into the resource type used by the sweeper and the resource id
+
+    e.g. arn:aws:ec2:us-east-1:123456789012:instance/i-0abc -> {"type": "ec2:instance", "id": "i-0abc"}
+         arn:aws:apigateway:us-east-1::/restapis/a1b2c3 -> {"type": "apigateway:restapis", "id": "a1b2c3"}
+
+    """
+    _, _, service, _, _, resource = resource_arn.split(":", 5)
+    # load balancer and target group apis take the full arn
+    if service == "elasticloadbalancing":
+        return {"type": f"{service}:{resource.split('/')[0]}", "id": resource_arn}
+    # autoScalingGroup:<uuid>:autoScalingGroupName/<name>
+    if service == "autoscaling":
+        return {"type": f"{service}:{resource.split(':')[0]}", "id": resource.split("/", 1)[-1]}
+    _parts = [each_part for each_part in resource.replace(":", "/", 1).split("/") if each_part]
+    # sub resources (e.g. api gateway stages) are removed together with their parent
+    if len(_parts) != 2:
+        return {"type": f"{service}:{'/'.join(_parts[:-1])}", "id": _parts[-1] if _parts else ""}
+    return {"type": f"{service}:{_parts[0]}", "id": _parts[1]}
+
+
+def delete_iam_role(iam_role_name: str) -> bool:
+    """remove the role from its instance profiles (deleting them), detach its policies and delete it"""
+    from _aws import iam_role
+
+    for each_profile_name in iam_role.list_instance_profiles_for_role(iam_role_name=iam_role_name) or []:
+        iam_role.detach_role_from_instance_profile(instance_profile_name=each_profile_name,
+                                                   iam_role_name=iam_role_name)
+        iam_role.delete_instance_profile(instance_profile_name=each_profile_name)
+    iam_role.detach_all_policies_from_role(iam_role_name=iam_role_name)
+    return iam_role.delete_role(iam_role_name=iam_role_name)
+
+
+def _delete_function(resource_type: str,
+                     resource_id: str,
+                     aws_region: str
+                     ) -> Union[Callable, None]:
+    from _aws import ec2, _api_gateway, _api_gateway_v2, _elb, _autoscaling, _vpc
+    from _deployment.build_image import setup_ecr
+    from _deployment.deploy_lambda import deploy_lambda
+    from _deployment.destroy_deployment import destroy_deployment
+
+    return {
+        "apigateway:restapis": partial(_api_gateway.api_gateway_delete_by_id, resource_id, aws_region),
+        "apigateway:apis": partial(_api_gateway_v2.delete_http_api, resource_id, aws_region),
+        "lambda:function": partial(deploy_lambda.delete_lambda_function, resource_id, aws_region),
+        "ec2:instance": partial(destroy_deployment.terminate_instance, resource_id, aws_region),
+        "ecr:repository": partial(setup_ecr.delete_ecr_repository, resource_id, aws_region, True),
+        "ec2:security-group": partial(destroy_deployment.delete_security_group_when_released, resource_id, aws_region),
+        "ec2:launch-template": partial(ec2.delete_launch_template_by_id, resource_id, aws_region),
+        "ec2:key-pair": partial(ec2.delete_key_pair_by_id, resource_id, aws_region),
+        "ec2:image": partial(ec2.deregister_image, resource_id, aws_region),
+        "elasticloadbalancing:loadbalancer": partial(_elb.delete_load_balancer, resource_id, aws_region),
+        "elasticloadbalancing:targetgroup": partial(_elb.delete_target_group, resource_id, aws_region),
+        "autoscaling:autoScalingGroup": partial(_autoscaling.delete_auto_scaling_group, resource_id, aws_region),
+        "ec2:vpc-endpoint": partial(_vpc.delete_vpc_endpoints, [resource_id], aws_region),
+        "ec2:vpc": partial(_vpc.delete_vpc, resource_id, aws_region),
+        "iam:role": partial(delete_iam_role, resource_id),
+    }.get(resource_type)
+
+
+def list_project_resources(aws_region: str = "us-east-1",
+                           logger: Log = None
+                           ) -> Dict[str, List[Dict]]:
+    """list every resource tagged by the pipelines in one pass and group them by project
+
+    regional resources come from the resource groups tagging api, iam roles and auto scaling groups are
+    listed separately
+
+    Args:
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        project name -> list of {"ResourceARN", "Tags", "type", "id"}
+
+    """
+    from _aws import _tagging
+
+    resources = (_tagging.get_resources_by_tag(aws_region=aws_region) or []) + \
+        (_tagging.get_iam_roles_by_tag(iam_role_name_prefixes=_IAM_ROLE_NAME_PREFIXES_) or []) + \
+        (_tagging.get_auto_scaling_groups_by_tag(aws_region=aws_region) or [])
+    for each_resource in resources:
+        each_resource.update(parse_resource_arn(each_resource.get("ResourceARN")))
+
+    projects = _tagging.group_by_project(resources)
+    for project_name, project_resources in projects.items():
+        _common_.info_logger(f"{project_name}: {len(project_resources)} tagged resources", logger=logger)
+    return projects
+
+
+def find_orphan_projects(projects: Dict[str, List[Dict]],
+                         ttl_hours: float = None,
+                         missing_from_state: bool = False,
+                         state_filepath: str = _STATE_FILEPATH_
+                         ) -> Dict[str, str]:
+    """decide which projects are garbage
+
+    a project is an orphan if its most recent resource is older than the ttl, projects whose resources predate
+    tagging never expire. with missing_from_state a project missing from the local state (once a local state
+    exists) is an orphan as well, only deploys from this machine through the _task flows are recorded, so this
+    is for a machine (e.g. a ci runner) making every deploy of the account
+
+    Args:
+        projects: output of list_project_resources
+        ttl_hours: maximum age in hours, no age limit if empty
+        missing_from_state: a project missing from the local state is an orphan
+        state_filepath: local deployment state
+
+    Returns:
+        project name -> reason
+
+    """
+    from _aws import _tagging
+
+    state = load_deployment_state(state_filepath)
+    now = datetime.now(timezone.utc)
+    orphans = {}
+    for project_name, project_resources in projects.items():
+        if missing_from_state and state is not None and project_name not in state:
+            orphans[project_name] = "missing from local state"
+            continue
+        created_at = [_created_at for each_resource in project_resources
+                      if (_created_at := _tagging.get_created_at(each_resource.get("Tags")))]
+        if ttl_hours and created_at and max(created_at) < now - timedelta(hours=ttl_hours):
+            orphans[project_name] = f"older than {ttl_hours} hours"
+    return orphans
+
+
+def sweep(ttl_hours: float = None,
+          dry_run: bool = True,
+          missing_from_state: bool = False,
+          state_filepath: str = _STATE_FILEPATH_,
+          aws_region: str = "us-east-1",
+          logger: Log = None
+          ) -> Dict[str, Dict]:
+    """garbage collect the resources of orphaned projects
+
+    the resources of all orphaned projects are deleted by the teardown engine, apis go first, then lambda
+    functions and instances, then everything they were using
+
+    Args:
+        ttl_hours: maximum age in hours, no age limit if empty
+        dry_run: only report what would be deleted
+        missing_from_state: a project missing from the local state is an orphan, see find_orphan_projects
+        state_filepath: local deployment state
+        aws_region: aws region
+        logger: logger object
+
+    Returns:
+        project name -> {"reason": ..., "resources": [arn, ...], "status": {arn: deleted | failed | skipped}}
+
+    """
+    from _deployment.destroy_deployment import teardown_engine
+
+    projects = list_project_resources(aws_region=aws_region, logger=logger)
+    projects.pop(None, None)
+    orphans = find_orphan_projects(projects,
+                                   ttl_hours=ttl_hours,
+                                   missing_from_state=missing_from_state,
+                                   state_filepath=state_filepath)
+
+    report = {project_name: {"reason": reason,
+                             "resources": [each_resource.get("ResourceARN") for each_resource in projects.get(project_name)],
+                             "status": {}}
+              for project_name, reason in orphans.items()}
+    for project_name, project_report in report.items():
+        _common_.info_logger(f"{project_name} is an orphan ({project_report.get('reason')}): "
+                             f"{project_report.get('resources')}", logger=logger)
+    if dry_run or not orphans:
+        return report
+
+    resources = []
+    for project_name in orphans:
+        _layers = {}
+        for each_resource in projects.get(project_name):
+            if not (_delete := _delete_function(each_resource.get("type"), each_resource.get("id"), aws_region)):
+                _common_.info_logger(f"no delete function for {each_resource.get('ResourceARN')}, skipped", logger=logger)
+                continue
+            _layers.setdefault(_LAYERS_.get(each_resource.get("type"), _LAST_LAYER_), []).append(
+                (each_resource.get("ResourceARN"), _delete))
+
+        for _layer, _layer_resources in _layers.items():
+            _next_layer = [each_arn for _other_layer, _other_resources in _layers.items() if _other_layer > _layer
+                           for each_arn, _ in _other_resources]
+            resources.extend(teardown_engine.resource(each_arn, _delete, depends_on=_next_layer)
+                             for each_arn, _delete in _layer_resources)
+
+    status = teardown_engine.run(resources, logger=logger)
+    for project_name, project_report in report.items():
+        # sub resources without a delete function go away with their parent and are not reported
+        project_report["status"] = {each_arn: status.get(each_arn)
+                                    for each_arn in project_report.get("resources") if each_arn in status}
+        if all(each_status == teardown_engine.DELETED for each_status in project_report.get("status").values()):
+            deregister_deployment(project_name, state_filepath)
+    return report
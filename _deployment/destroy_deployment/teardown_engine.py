@@ -0,0 +1,203 @@
+from typing import List, Dict, Callable, Union
+from time import sleep, monotonic
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from logging import Logger as Log
+from inspect import currentframe
+from _common import _common as _common_
+
+
+_MAX_WORKERS_ = 8
+_POLL_INTERVAL_ = 1
+_MAX_POLL_INTERVAL_ = 15
+_POLL_TIMEOUT_ = 600
+
+DELETED = "deleted"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+def resource(name: str,
+             delete: Callable,
+             depends_on: List[str] = None,
+             is_deleted: Callable = None,
+             timeout: int = _POLL_TIMEOUT_
+             ) -> Dict:
+    """describe a resource of a deployment for the teardown engine
+
+    Args:
+        name: unique name of the resource within the deployment
+        delete: issues the delete call(s), the return value is not used, an exception marks the resource as failed
+        depends_on: names of the resources this resource was created on top of (e.g. a lambda function depends
+                    on its iam role), they are only deleted after this resource is gone
+        is_deleted: returns True once the resource is really gone, polled with backoff after delete
+        timeout: how long to poll is_deleted before giving up
+
+    Returns:
+        the resource definition
+
+    """
+    return {"name": name,
+            "delete": delete,
+            "depends_on": depends_on or [],
+            "is_deleted": is_deleted,
+            "timeout": timeout}
+
+
+def poll_until(predicate: Callable,
+               timeout: int = _POLL_TIMEOUT_,
+               interval: float = _POLL_INTERVAL_,
+               max_interval: float = _MAX_POLL_INTERVAL_
+               ) -> bool:
+    """poll the predicate with exponential backoff until it returns True or the timeout is reached
+
+    Args:
+        predicate: function returning True when the condition is met
+        timeout: timeout in seconds
+        interval: initial interval between two polls
+        max_interval: the interval doubles after every poll up to this value
+
+    Returns:
+        True if the condition is met within the timeout, False otherwise
+
+    """
+    deadline = monotonic() + timeout
+    while True:
+        if predicate():
+            return True
+        if (remaining := deadline - monotonic()) <= 0:
+            return False
+        sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+
+
+def build_teardown_order(resources: List[Dict]) -> Dict[str, List[str]]:
+    """build the reverse dependency graph, a resource can be deleted once all of its dependents are gone
+
+    Args:
+        resources: resource definitions created by resource()
+
+    Returns:
+        resource name -> names of the resources depending on it
+
+    """
+    dependents = {each_resource.get("name"): [] for each_resource in resources}
+    for each_resource in resources:
+        for each_dependency in each_resource.get("depends_on"):
+            if each_dependency not in dependents:
+                _common_.error_logger(currentframe().f_code.co_name,
+                                      f"{each_resource.get('name')} depends on unknown resource {each_dependency}",
+                                      logger=None,
+                                      mode="error",
+                                      ignore_flag=False)
+            dependents[each_dependency].append(each_resource.get("name"))
+
+    # kahn's algorithm, every resource has to be reachable otherwise there is a cycle
+    _pending = {_name: len(_dependents) for _name, _dependents in dependents.items()}
+    _ready = [_name for _name, _count in _pending.items() if _count == 0]
+    _visited = 0
+    _depends_on = {each_resource.get("name"): each_resource.get("depends_on") for each_resource in resources}
+    while _ready:
+        _visited += 1
+        for each_dependency in _depends_on.get(_ready.pop()):
+            _pending[each_dependency] -= 1
+            if _pending[each_dependency] == 0:
+                _ready.append(each_dependency)
+
+    if _visited != len(dependents):
+        _common_.error_logger(currentframe().f_code.co_name,
+                              "the resources of the deployment have a circular dependency",
+                              logger=None,
+                              mode="error",
+                              ignore_flag=False)
+    return dependents
+
+
+def plan(resources: List[Dict]) -> List[List[str]]:
+    """the order run deletes the resources in, without deleting anything
+
+    Args:
+        resources: resource definitions created by resource()
+
+    Returns:
+        waves of resource names, a wave is deleted concurrently once the waves before it are gone
+
+    """
+    dependents = build_teardown_order(resources)
+    _depends_on = {each_resource.get("name"): each_resource.get("depends_on") for each_resource in resources}
+    _pending = {_name: len(_dependents) for _name, _dependents in dependents.items()}
+    waves = []
+    while _ready := sorted(_name for _name, _count in _pending.items() if _count == 0):
+        waves.append(_ready)
+        for _name in _ready:
+            _pending.pop(_name)
+            for each_dependency in _depends_on.get(_name):
+                _pending[each_dependency] -= 1
+    return waves
+
+
+def _delete_resource(each_resource: Dict) -> bool:
+    started = monotonic()
+    each_resource.get("delete")()
+    if (is_deleted := each_resource.get("is_deleted")) and \
+            not poll_until(is_deleted, timeout=each_resource.get("timeout")):
+        _common_.info_logger(f"{each_resource.get('name')} is still present after {each_resource.get('timeout')} seconds")
+        return False
+    _common_.info_logger(f"{each_resource.get('name')} deleted in {monotonic() - started:.1f} seconds")
+    return True
+
+
+def run(resources: List[Dict],
+        max_workers: int = _MAX_WORKERS_,
+        logger: Log = None
+        ) -> Dict[str, str]:
+    """tear down a deployment, independent resources are deleted concurrently
+
+    a resource is submitted as soon as every resource depending on it is deleted, if a resource can not be
+    deleted, the resources it depends on are skipped as their deletion would fail anyway
+
+    Args:
+        resources: resource definitions created by resource()
+        max_workers: maximum number of concurrent deletions
+        logger: logger object
+
+    Returns:
+        resource name -> deleted, failed or skipped
+
+    """
+    dependents = build_teardown_order(resources)
+    by_name = {each_resource.get("name"): each_resource for each_resource in resources}
+    _pending = {_name: len(_dependents) for _name, _dependents in dependents.items()}
+    status = {}
+    started = monotonic()
+
+    def _settle(name: str, result: str) -> List[str]:
+        # record the result and return the resources which became deletable
+        status[name] = result
+        _ready = []
+        for each_dependency in by_name.get(name).get("depends_on"):
+            _pending[each_dependency] -= 1
+            if _pending[each_dependency] == 0:
+                if any(status.get(each_dependent) != DELETED for each_dependent in dependents.get(each_dependency)):
+                    _ready.extend(_settle(each_dependency, SKIPPED))
+                else:
+                    _ready.append(each_dependency)
+        return _ready
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = {executor.submit(_delete_resource, by_name.get(_name)): _name
+                     for _name, _count in _pending.items() if _count == 0}
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for each_future in done:
+                name = in_flight.pop(each_future)
+                # error_logger raises SystemExit, keep tearing down the rest of the deployment
+                if (err := each_future.exception()) is not None:
+                    _common_.info_logger(f"unable to delete {name}: {err}", logger=logger)
+                    result = FAILED
+                else:
+                    result = DELETED if each_future.result() else FAILED
+                for each_ready in _settle(name, result):
+                    in_flight[executor.submit(_delete_resource, by_name.get(each_ready))] = each_ready
+
+    _common_.info_logger(f"teardown finished in {monotonic() - started:.1f} seconds: {status}", logger=logger)
+    return status
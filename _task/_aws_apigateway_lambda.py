@@ -1,8 +1,10 @@
 import os.path
+from typing import Dict
 from time import sleep
 from _common import _common as _common_
 from _util import _util_file as _util_file_
 from _code import _generate_docker_file, _generate_lambda_function
+from _aws import _describe_cache
 
 __WAIT_TIME__ = 10
 
@@ -13,20 +15,31 @@ __WAIT_TIME__ = 10
 """
 
 
+@_describe_cache.per_deployment
 def create_deployment(project_name: str,
                       project_path: str,
                       api_gateway_api_name: str = "MyApi_new4",
                       aws_account_number: str = "717435123117",
                       api_method: str = "GET",
+                      performance_profile: Dict = None,
+                      api_type: str = "rest",
                       aws_region: str = "us-east-1"
                       ):
     """create a new deployment using api gateway and lambda pattern
 
+    api_type selects the api gateway flavour, "rest" (apigateway) or "http" (apigatewayv2), an http api
+    proxies to lambda with payload format 2.0 through an auto-deployed $default stage, it has lower latency
+    and cost but no stage cache so performance_profile only applies to "rest"
+
+    performance_profile controls stage caching, throttling and compression (see
+    _deployment.deploy_api_gateway.api_gateway_api_stage), by default GET responses are served from a stage
+    cache keyed on the query string parameters of main()
+
 
 
     1) create ecr repository
     2) build docker image (right now it is done using shell, change it to a library call)
-    3) create lambda role
+    3) create lambda role (reused across runs, see iam_role.ensure_role)
     4) deploy lambda
     5) missing: create a new api gateway and root resource from scratch
     6) create api gateway resource
@@ -38,21 +51,26 @@ def create_deployment(project_name: str,
 
     access:
 
-    1) lambda function role (created by scratch)
-    2) api gateway role (leveage the existing role) <- ideally this needs to be created from scratch
+    1) lambda function role, role-lambda-{project_name}-{hash of trust policy and policies}
+    2) api gateway execution role, role-api-gateway-ex-{project_name}-{hash of trust policy and policies}
 
     needed:
 
     create a new api gateway from scratch
-    create a new api gateway role from scratch
 
     Returns:
 
     """
-    from _util import _util_common as _util_common_
+    if api_type not in ("rest", "http"):
+        _common_.error_logger("create_deployment",
+                              f"api_type {api_type} is not supported, valid values are rest and http",
+                              logger=None,
+                              mode="error",
+                              ignore_flag=False)
 
     ecr_repository_name = f"ecr_{project_name}"
-    lambda_function_role_name = f"role-lambda-{project_name}-{_util_common_.get_random_string(6)}"
+    from _deployment.deploy_lambda import setup_lambda_role
+    lambda_function_role_name = setup_lambda_role.get_role_name(project_name)
     lambda_function_name = f"lambda-{project_name}"
 
     # ecr_repository_name = "pg_transcribe_3_test"
@@ -66,6 +84,13 @@ def create_deployment(project_name: str,
     from _code import _generate_lambda_function
     _generate_lambda_function.generate_lambda_handler(project_path)
 
+    if performance_profile is None and api_type == "rest":
+        from _deployment.deploy_api_gateway import api_gateway_api_stage
+        performance_profile = api_gateway_api_stage.default_performance_profile(
+            resource_path=f"/{lambda_function_name}",
+            http_method=api_method,
+            cache_key_parameters=_generate_lambda_function.get_main_parameters(project_path))
+
     docker_file_path = os.path.join(project_path, "Dockerfile")
     _generate_docker_file.generate_docker_file(docker_filepath=docker_file_path,
                                                docker_template="generic_lambda_docker_template")
@@ -79,7 +104,8 @@ def create_deployment(project_name: str,
                   project_path=project_path,
                   lambda_function_name=lambda_function_name,
                   lambda_function_role=lambda_function_role_name,
-                  api_gateway_api_name=api_gateway_api_name
+                  api_gateway_api_name=api_gateway_api_name,
+                  project_name=project_name
                   )
 
     sleep(__WAIT_TIME__)
@@ -108,9 +134,9 @@ def create_deployment(project_name: str,
                           project_path=project_path,
                           lambda_function_name=lambda_function_name,
                           lambda_function_role_name=lambda_function_role_name,
-                          api_gateway_api_name=api_gateway_api_name
+                          api_gateway_api_name=api_gateway_api_name,
+                          project_name=project_name
                           )
-    sleep(__WAIT_TIME__)
 
     # deploy lambda
     from _deployment.deploy_lambda import deploy_lambda
@@ -128,29 +154,50 @@ def create_deployment(project_name: str,
     sleep(__WAIT_TIME__)
 
     # deploy api gateway
-    from _deployment.deploy_api_gateway import deploy_api_gateway
-    deploy_api_gateway.run(ecr_repository_name=ecr_repository_name,
-                           aws_account_number=aws_account_number,
-                           project_path=project_path,
-                           lambda_function_name=lambda_function_name,
-                           lambda_function_role_name=lambda_function_role_name,
-                           api_gateway_api_name=api_gateway_api_name,
-                           api_method=api_method,
-                           aws_region=aws_region
-                           )
+    if api_type == "http":
+        from _deployment.deploy_http_api import deploy_http_api
+        deploy_http_api.run(lambda_function_name=lambda_function_name,
+                            aws_account_number=aws_account_number,
+                            api_gateway_api_name=api_gateway_api_name,
+                            api_method=api_method,
+                            project_name=project_name,
+                            aws_region=aws_region
+                            )
+    else:
+        from _deployment.deploy_api_gateway import deploy_api_gateway
+        deploy_api_gateway.run(ecr_repository_name=ecr_repository_name,
+                               aws_account_number=aws_account_number,
+                               project_path=project_path,
+                               lambda_function_name=lambda_function_name,
+                               lambda_function_role_name=lambda_function_role_name,
+                               api_gateway_api_name=api_gateway_api_name,
+                               api_method=api_method,
+                               performance_profile=performance_profile,
+                               project_name=project_name,
+                               aws_region=aws_region
+                               )
+
+    # record the deployment so the orphan sweeper keeps its resources
+    from _deployment.destroy_deployment import sweep_orphans
+    sweep_orphans.register_deployment(project_name=project_name, pattern="apigateway_lambda", aws_region=aws_region)
 
 
 def destroy_deployment(lambda_function_name: str,
                       api_gateway_api_name: str,
+                      api_type: str = "rest",
+                      api_method: str = "GET",
+                      aws_account_number: str = "717435123117",
                       aws_region: str = "us-east-1"):
-    """destroy api gateway resources only
+    """destroy everything created by create_deployment
 
-    missing: destroy lambda function, ecr repository, iam role
+    api gateway route, lambda function, lambda roles, ecr repository and lambda security group are torn down
+    by the teardown engine, independent resources are deleted concurrently in reverse dependency order
 
     Returns:
+        True if every resource is deleted
 
     """
-    from _deployment.destroy_api_gateway import destroy_api_gateway
+    from _deployment.destroy_deployment import destroy_deployment as _destroy_deployment
 
     # ecr_repository_name = "pg_finance_trade_test8"
     # aws_account_number = "717435123117"
@@ -160,7 +207,16 @@ def destroy_deployment(lambda_function_name: str,
     # project_path = "/Users/jianhuang/anaconda3/envs/pg_finance_trade_1/pg_finance_trade_1"
     # api_gateway_api_name = "MyApi_new4"
 
-    destroy_api_gateway.destroy_api_gateway_resource(api_gateway_api_name=api_gateway_api_name,
-                                                     lambda_function_name=lambda_function_name,
-                                                     aws_region=aws_region
-                                                     )
\ No newline at end of file
+    # create_deployment names the lambda function lambda-{project_name}
+    project_name = lambda_function_name.removeprefix("lambda-")
+
+    resources = _destroy_deployment.lambda_pattern_resources(project_name=project_name,
+                                                             api_gateway_api_name=api_gateway_api_name,
+                                                             api_type=api_type,
+                                                             api_method=api_method,
+                                                             aws_account_number=aws_account_number,
+                                                             aws_region=aws_region)
+    if deleted := _destroy_deployment.run(resources):
+        from _deployment.destroy_deployment import sweep_orphans
+        sweep_orphans.deregister_deployment(project_name=project_name)
+    return deleted
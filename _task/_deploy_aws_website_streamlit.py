@@ -1,18 +1,23 @@
+from typing import List, Dict
 from os import path
 from time import sleep
-from jinja2 import Template
 from inspect import currentframe
 from _common import _common as _common_
 from _util import _util_common as _util_common_
 from _code import _generate_docker_file, _generate_lambda_function
+from _aws import _describe_cache
 _WAIT_TIME_ = 4
 
+@_describe_cache.per_deployment
 def create_deployment(project_name: str,
                       project_path: str,
                       website_port: int = 8501,
                       policy_name: str = "",
                       instance_type: str = "t2.micro",
+                      instance_types: List[str] = None,
                       aws_account_number: str = "717435123117",
+                      bake_ami: bool = True,
+                      auto_scaling: Dict = None,
                       aws_region: str = "us-east-1"
                       ):
 
@@ -20,9 +25,12 @@ def create_deployment(project_name: str,
 
     1) create ecr repository
     2) build docker image (right now it is done using shell, change it to a library call)
-    3) generate user data for ec2 instance
-    4) create launch template
-    5) invoke lanuch template
+    3) generate user data for ec2 instance (cloud-config running the container as a systemd service)
+    4) bake a golden image with docker and the project image preloaded (bake_ami), user data then only
+       starts the container
+    5) create launch template
+    6) invoke lanuch template, or put an auto scaling group behind a load balancer (auto_scaling, see
+       deploy_ec2.run)
 
     access:
 
@@ -85,7 +93,8 @@ def create_deployment(project_name: str,
 
     # create ecr repository
     setup_ecr.run(ecr_repository_name,
-                  aws_region
+                  aws_region,
+                  project_name=project_name
                   )
 
     sleep(_WAIT_TIME_)
@@ -102,17 +111,15 @@ def create_deployment(project_name: str,
     # exit(0)
     sleep(_WAIT_TIME_)
 
-    from _deployment.deploy_ec2 import ec2_userdata_template
-
-    user_data_input = {
-        "aws_account_number": aws_account_number,
-        "ecr_repo": ecr_repository_name,
-        "aws_region": aws_region,
-        "forwarding_port_string": f"-p {website_port}:{website_port}"
-    }
+    from _deployment.deploy_ec2 import ec2_userdata
 
-    template = Template(ec2_userdata_template.user_data_streamlit_template)
-    rendered_user_data = template.render(user_data_input)
+    # cloud-config running the container as a systemd service, nothing is installed when the ami is baked
+    rendered_user_data = ec2_userdata.generate_user_data(project_name=project_name,
+                                                         aws_account_number=aws_account_number,
+                                                         ecr_repository_name=ecr_repository_name,
+                                                         ports=[website_port],
+                                                         image_preloaded=bake_ami,
+                                                         aws_region=aws_region)
 
     # Print the rendered user data
     #print(rendered_user_data)
@@ -128,12 +135,20 @@ def create_deployment(project_name: str,
         "sg_name": sg_name,
         "sg_ingress_rules": sg_ingress_rules,
         "user_data": rendered_user_data,
+        "ecr_repository_name": ecr_repository_name,
+        "bake_ami": bake_ami,
+        "auto_scaling": auto_scaling,
         "aws_region": aws_region,
         "website_port": website_port,
-        "instance_type": instance_type
+        "instance_type": instance_type,
+        "instance_types": instance_types
     }
 
     deploy_ec2.run(**_parameters)
+
+    # record the deployment so the orphan sweeper keeps its resources
+    from _deployment.destroy_deployment import sweep_orphans
+    sweep_orphans.register_deployment(project_name=project_name, pattern="ec2_streamlit", aws_region=aws_region)
     return True
 
 
@@ -158,15 +173,6 @@ def destroy_deployment(project_name: str,
     # website_port = 8501
     # instance_type = "t2.micro"
 
-    from _deployment.build_image import setup_ecr
-
-    # create ecr repository
-    setup_ecr.destroy(ecr_repository_name,
-                      aws_region
-                      )
-
-    sleep(_WAIT_TIME_)
-
     from _deployment.deploy_ec2 import ec2_userdata_template
 
     user_data_input = {
@@ -183,9 +189,11 @@ def destroy_deployment(project_name: str,
         "keypair_name": keypair_name,
         "private_key_path": file_path,
         "sg_name": sg_name,
+        "ecr_repository_name": ecr_repository_name,
         "aws_region": aws_region
     }
 
-    deploy_ec2.destroy(**_parameters)
-
-    return True
+    if deleted := deploy_ec2.destroy(**_parameters):
+        from _deployment.destroy_deployment import sweep_orphans
+        sweep_orphans.deregister_deployment(project_name=project_name)
+    return deleted
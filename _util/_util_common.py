@@ -86,10 +86,10 @@ def is_base64_encoded(input_string: str) -> bool:
 
 
 @_common_.exception_handlers(logger=None)
-def string_to_base64(input_string: str):
+def string_to_base64(input_string: Union[str, bytes]):
 
-    # Encode the byte data to base64
-    base64_encoded = b64encode(input_string.encode('utf-8'))
+    # Encode the byte data to base64, bytes (e.g. gzipped user data) are encoded as is
+    base64_encoded = b64encode(input_string if isinstance(input_string, bytes) else input_string.encode('utf-8'))
 
     # Convert the base64 bytes back to a string
     return base64_encoded.decode('utf-8')
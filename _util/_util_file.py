@@ -2,12 +2,10 @@ import csv
 import os
 import json
 from pathlib import Path
-import yaml
 from inspect import currentframe
 from typing import List, Dict, Tuple, Union, Any
 from logging import Logger as Log
 from _common import _common as _common_
-import pandas as pd
 
 
 @_common_.exception_handler
@@ -108,6 +106,8 @@ def yaml_load(filepath: str) -> Dict:
         Dict: A Python dictionary representing the parsed content of the YAML file.
 
     """
+    import yaml
+
     with open(filepath, "r") as file:
         return yaml.safe_load(file)
 
@@ -128,6 +128,8 @@ def yaml_loads(file_content: str) -> Dict:
         Dict: A Python dictionary representing the parsed content of the YAML string.
 
     """
+    import yaml
+
     return yaml.safe_load(file_content)
 
 
@@ -149,6 +151,8 @@ def yaml_dumps(file_content) -> str:
         str: A string representation of the input data in YAML format.
 
     """
+    import yaml
+
     return yaml.dump(file_content)
 
 
@@ -273,6 +277,9 @@ def csv_to_json(filepath: str) -> Union[List, Dict]:
         depends on the structure of the JSON.
 
     """
+    # pandas takes longer to import than everything else, only this conversion needs it
+    import pandas as pd
+
     return json_loads(pd.read_csv(filepath).to_json(orient="records"))
 
 
@@ -0,0 +1,109 @@
+import os
+import sys
+import subprocess
+from typing import List, Dict
+from inspect import currentframe
+from logging import Logger as Log
+from _common import _common as _common_
+
+
+# the cli entry points, importing one of them is what every command pays before it does anything
+_ENTRY_POINTS_ = ("pgdeploy", "apply_pattern_lambda", "apply_pattern_webapp", "apply_pattern_streamlit")
+_BUDGET_MS_ = 300
+_RUNS_ = 5
+_TOP_ = 15
+
+_REPO_ROOT_ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_importtime(stderr: str) -> List[Dict]:
+    # lines look like "import time:       412 |       1733 |   _common._common", the header line is skipped
+    imports = []
+    for each_line in stderr.splitlines():
+        if not each_line.startswith("import time:"):
+            continue
+        fields = each_line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        imports.append({"module": fields[2].strip(),
+                        "self_us": int(fields[0]),
+                        "cumulative_us": int(fields[1])})
+    return imports
+
+
+def measure_import_time(module: str, runs: int = _RUNS_, logger: Log = None) -> Dict:
+
+    """import the module in a fresh interpreter with python -X importtime
+
+    every run starts from a cold interpreter, the fastest run is kept as the noise of the machine only adds time
+
+    Args:
+        module: module name, e.g. apply_pattern_lambda
+        runs: number of interpreters started
+        logger: logger object
+
+    Returns:
+        {"module", "total_ms", "imports": [{"module", "self_us", "cumulative_us"}]} of the fastest run, the
+        imports in the order they were made
+
+    """
+    fastest = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=_REPO_ROOT_,
+                                capture_output=True,
+                                text=True)
+        if result.returncode != 0:
+            _common_.error_logger(currentframe().f_code.co_name,
+                                  f"importing {module} failed: {result.stderr.strip().splitlines()[-1:]}",
+                                  logger=logger,
+                                  mode="error",
+                                  ignore_flag=False)
+        imports = _parse_importtime(result.stderr)
+        # the module itself is the last import to finish, its cumulative time covers everything it pulled in
+        total_us = next((each_import.get("cumulative_us") for each_import in reversed(imports)
+                         if each_import.get("module") == module), sum(each_import.get("self_us") for each_import in imports))
+        if fastest is None or total_us < fastest.get("total_us"):
+            fastest = {"total_us": total_us, "imports": imports}
+
+    return {"module": module, "total_ms": fastest.get("total_us") / 1000, "imports": fastest.get("imports")}
+
+
+def top_imports(measurement: Dict, top: int = _TOP_) -> List[Dict]:
+    """the imports taking the most time themselves"""
+    return sorted(measurement.get("imports"), key=lambda each_import: each_import.get("self_us"), reverse=True)[:top]
+
+
+def check_budget(modules: List[str] = _ENTRY_POINTS_,
+                 budget_ms: float = _BUDGET_MS_,
+                 runs: int = _RUNS_,
+                 top: int = _TOP_,
+                 logger: Log = None
+                 ) -> bool:
+
+    """measure the import time of the modules and report the slowest imports of the ones over budget
+
+    Args:
+        modules: module names
+        budget_ms: allowed import time of each module in milliseconds
+        runs: interpreters started per module, see measure_import_time
+        top: number of slowest imports reported for a module over budget
+        logger: logger object
+
+    Returns:
+        True if every module imports within the budget
+
+    """
+    within_budget = True
+    for each_module in modules:
+        measurement = measure_import_time(each_module, runs=runs, logger=logger)
+        status = "ok" if measurement.get("total_ms") <= budget_ms else "over budget"
+        _common_.info_logger(f"import {each_module}: {measurement.get('total_ms'):.1f} ms ({status}, budget {budget_ms} ms)",
+                             logger=logger)
+        if measurement.get("total_ms") > budget_ms:
+            within_budget = False
+            for each_import in top_imports(measurement, top=top):
+                _common_.info_logger(f"    {each_import.get('self_us') / 1000:8.1f} ms self "
+                                     f"{each_import.get('cumulative_us') / 1000:8.1f} ms cumulative  {each_import.get('module')}",
+                                     logger=logger)
+    return within_budget
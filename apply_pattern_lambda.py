@@ -21,6 +21,9 @@ def apply_pattern_lambda(project_filepath: str,
     _common_.info_logger(f"passing parameter aws_account_number: {aws_account_number}", logger=logger)
     _common_.info_logger(f"passing parameter aws_region:: {aws_region}", logger=logger)
 
+    from _aws import _session
+    _session.install()
+
 
     from _task import _aws_apigateway_lambda
 
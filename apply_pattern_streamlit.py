@@ -1,11 +1,10 @@
 import click
 from logging import Logger as Log
 from _common import _common as _common_
-from _task import _deploy_aws_website_streamlit
 from _config import _config as _config_
 
 
-def streamlit_project_specific(logger: Log = None):
+def streamlit_project_specific(project_name: str = None, logger: Log = None):
     policy_document = {
     "Version": "2012-10-17",
     "Statement": [
@@ -48,7 +47,10 @@ def streamlit_project_specific(logger: Log = None):
         if policy_arn := policy_detail.get("Arn"):
             iam_role.delete_iam_policy_by_arn(policy_arn=policy_arn)
 
-    policy_arn = iam_role.create_iam_policy(policy_name="iam_policy_full_access_pg-web-app-0001", policy_document=policy_document)
+    from _aws import _tagging
+    policy_arn = iam_role.create_iam_policy(policy_name="iam_policy_full_access_pg-web-app-0001",
+                                            policy_document=policy_document,
+                                            tags=_tagging.project_tags(project_name) if project_name else None)
 
     _config = _config_.PGConfigSingleton()
     _config.config["project_iam_policy_arn"]=policy_arn
@@ -70,19 +72,15 @@ def apply_pattern_streamlit(project_filepath: str,
     _common_.info_logger(f"passing parameter aws_account_number: {aws_account_number}", logger=logger)
     _common_.info_logger(f"passing parameter aws_region:: {aws_region}", logger=logger)
 
-    streamlit_project_specific()
+    from _aws import _session
+    _session.install()
+
+    streamlit_project_specific(project_name=project_name)
 
     kms_alias_name = "alias/ec2-custom-kms-key-5"
     from _aws import _kms
-    kms_id = ""
-    kms_arn = ""
-    if not _kms.check_alias_exists(kms_alias_name):
-        kms_id, kms_arn = _kms.create_kms_keys()
-        if kms_id:
-            _kms.create_kms_key_alias(alias_name=kms_alias_name,
-                                      key_id=kms_id)
-    else:
-        kms_arn = _kms.get_key_alias_arn(alias_name="alias/ec2-custom-kms-key-5")
+    kms_key = _kms.get_or_create_key(kms_alias_name, aws_region=aws_region, logger=logger) or {}
+    kms_id, kms_arn = kms_key.get("key_id", ""), kms_key.get("key_arn", "")
 
     _config = _config_.PGConfigSingleton()
     # _config.config["kms_arn"] = "arn:aws:kms:us-east-1:515966537984:key/9ef67a77-0c8b-4a98-a25d-662c29f7017c"
@@ -96,6 +94,7 @@ def apply_pattern_streamlit(project_filepath: str,
     # project_path = "/Users/jianhuang/anaconda3/envs/pg_simple_login_ui/pg_simple_login_ui"
 
 
+    from _task import _deploy_aws_website_streamlit
     _deploy_aws_website_streamlit.create_deployment(project_name=project_name,
                                                     project_path=project_filepath,
                                                     aws_account_number=aws_account_number,
@@ -21,17 +21,13 @@ def apply_pattern_webapp(project_filepath: str,
     _common_.info_logger(f"passing parameter aws_account_number: {aws_account_number}", logger=logger)
     _common_.info_logger(f"passing parameter aws_region:: {aws_region}", logger=logger)
 
+    from _aws import _session
+    _session.install()
+
     kms_alias_name = "alias/ec2-custom-kms-key-5"
     from _aws import _kms
-    kms_id = ""
-    kms_arn = ""
-    if not _kms.check_alias_exists(kms_alias_name):
-        kms_id, kms_arn = _kms.create_kms_keys()
-        if kms_id:
-            _kms.create_kms_key_alias(alias_name=kms_alias_name,
-                                      key_id=kms_id)
-    else:
-        kms_arn = _kms.get_key_alias_arn(alias_name="alias/ec2-custom-kms-key-5")
+    kms_key = _kms.get_or_create_key(kms_alias_name, aws_region=aws_region, logger=logger) or {}
+    kms_id, kms_arn = kms_key.get("key_id", ""), kms_key.get("key_arn", "")
 
     _config = _config_.PGConfigSingleton()
     # _config.config["kms_arn"] = "arn:aws:kms:us-east-1:515966537984:key/9ef67a77-0c8b-4a98-a25d-662c29f7017c"
@@ -41,8 +37,8 @@ def apply_pattern_webapp(project_filepath: str,
 
     from _example import example_deployment_website, example_deployment_website_react
     # return example_deployment_website_react.example_website_ec2_react_destroy()
-    return example_deployment_website_react.example_website_ec2_react(project_name="react-app",
-                                                                      project_path="/Users/jianhuang/projects/ui/pg_website_react2/template/vertical_timeline",
+    return example_deployment_website_react.example_website_ec2_react(project_name=project_name,
+                                                                      project_path=project_filepath,
                                                                       aws_account_number=aws_account_number,
                                                                       aws_region=aws_region
                                                                       )
@@ -0,0 +1,20 @@
+import sys
+import click
+from _util import _util_importtime as _util_importtime_
+
+
+@click.command()
+@click.option('--module', 'modules', multiple=True, type=str, help="module to measure, the cli entry points if empty")
+@click.option('--budget_ms', default=_util_importtime_._BUDGET_MS_, type=float)
+@click.option('--runs', default=_util_importtime_._RUNS_, type=int)
+@click.option('--top', default=_util_importtime_._TOP_, type=int)
+def bench_import_time(modules: tuple, budget_ms: float, runs: int, top: int):
+    if not _util_importtime_.check_budget(modules=list(modules) or _util_importtime_._ENTRY_POINTS_,
+                                          budget_ms=budget_ms,
+                                          runs=runs,
+                                          top=top):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    bench_import_time()
@@ -99,8 +99,6 @@ def deployment(ecr_repository_name: str,
                           api_gateway_api_name
                           )
 
-    sleep(20)
-
     from _deployment.deploy_lambda import deploy_lambda
     deploy_lambda.run(ecr_repository_name,
                       aws_region,
@@ -131,14 +131,8 @@ def main_pattern_ec2_streamlit():
 
     kms_alias_name = "alias/ec2-custom-kms-key-2"
     from _aws import _kms
-    kms_id = ""
-    kms_arn = ""
-    if not _kms.check_alias_exists(kms_alias_name):
-        kms_id, kms_arn = _kms.create_kms_keys()
-        if kms_id:
-            print(kms_id)
-            _kms.create_kms_key_alias(alias_name=kms_alias_name,
-                                      key_id=kms_id)
+    kms_key = _kms.get_or_create_key(kms_alias_name) or {}
+    kms_id, kms_arn = kms_key.get("key_id", ""), kms_key.get("key_arn", "")
 
     _config = _config_.PGConfigSingleton()
     _config.config["kms_arn"] = "arn:aws:kms:us-east-1:515966537984:key/9ef67a77-0c8b-4a98-a25d-662c29f7017c"
@@ -206,6 +200,8 @@ def main_pattern_apigateway_lambda():
 
 
 if __name__ == "__main__":
+    from _aws import _session
+    _session.install()
 
     main_pattern_ec2_streamlit()
     exit(0)
@@ -0,0 +1,30 @@
+import click
+from _cli import _lazy_group
+
+
+@click.group(cls=_lazy_group.LazyGroup,
+             lazy_commands={"destroy": ("_cli._project:destroy", "destroy the deployment of a project"),
+                            "plan": ("_cli._project:plan", "show what destroy would delete, nothing is changed"),
+                            "status": ("_cli._project:status", "show the recorded deployments and their resources"),
+                            "bench": ("bench_import_time:bench_import_time",
+                                      "check the import time of the cli entry points against a budget")})
+@click.option('--profile-run', 'profile_run', is_flag=True, help="profile the invocation with cProfile")
+@click.option('--profile-output', 'profile_output', default="pgdeploy.prof", type=str, show_default=True,
+              help="pstats file written by --profile-run")
+def pgdeploy(profile_run: bool, profile_output: str):
+    """deploy projects to aws, only the modules of the invoked command are imported"""
+
+
+@pgdeploy.group(cls=_lazy_group.LazyGroup,
+                lazy_commands={"lambda": ("apply_pattern_lambda:apply_pattern_lambda",
+                                          "deploy a project as a lambda function behind api gateway"),
+                               "webapp": ("apply_pattern_webapp:apply_pattern_webapp",
+                                          "deploy a react web app to ec2"),
+                               "streamlit": ("apply_pattern_streamlit:apply_pattern_streamlit",
+                                             "deploy a streamlit app to ec2")})
+def deploy():
+    """deploy a project with one of the deployment patterns"""
+
+
+if __name__ == '__main__':
+    pgdeploy()
@@ -0,0 +1,28 @@
+import pytest
+from _common import _common as _common_
+
+botocore_exceptions = pytest.importorskip("botocore.exceptions")
+
+
+def test_only_the_outermost_idempotent_function_retries_throttling(monkeypatch):
+    monkeypatch.setattr(_common_, "sleep", lambda seconds: None)
+    calls = {"inner": 0, "outer": 0}
+
+    @_common_.aws_client_handle_exceptions(idempotent=True)
+    def inner():
+        calls["inner"] += 1
+        raise botocore_exceptions.ClientError({"Error": {"Code": "Throttling"}}, "ListRoles")
+
+    @_common_.aws_client_handle_exceptions(idempotent=True)
+    def outer():
+        calls["outer"] += 1
+        return inner()
+
+    with pytest.raises(_common_.ThrottledError):
+        outer()
+    assert calls == {"inner": _common_._THROTTLING_RETRY_ATTEMPTS_ + 1, "outer": _common_._THROTTLING_RETRY_ATTEMPTS_ + 1}
+
+    # the retry state is released, a later call retries again
+    with pytest.raises(_common_.ThrottledError):
+        inner()
+    assert calls.get("inner") == 2 * (_common_._THROTTLING_RETRY_ATTEMPTS_ + 1)
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+from _aws import ec2, _tagging
+
+
+def test_identical_launch_template_data_has_no_diff(monkeypatch):
+    _parameters = {"project_id": "app",
+                   "image_id": "ami-0123456789abcdef0",
+                   "keypair_name": "app-keypair",
+                   "security_group_ids": ["sg-0123456789abcdef0"],
+                   "subnet_id": "subnet-0123456789abcdef0",
+                   "instance_name": "app-instance",
+                   "instance_type": "t3.micro",
+                   "kms_id": "alias/app",
+                   "iam_instance_role": "inst_app"}
+
+    current = ec2.build_launch_template_data(**_parameters)
+    # a later deploy of the same project, the project tags carry another creation time
+    project_tags = _tagging.project_tags
+    monkeypatch.setattr(_tagging, "project_tags",
+                        lambda project_name: {**project_tags(project_name), _tagging._CREATED_AT_TAG_KEY_: "2000-01-01T00:00:00Z"})
+    assert ec2.diff_launch_template_data(current, ec2.build_launch_template_data(**_parameters)) == []
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+from _aws import _kms
+
+
+@pytest.fixture
+def key_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(_kms, "_KEY_CACHE_FILEPATH_", str(tmp_path / "pg_auto" / "kms_key_cache.json"))
+    monkeypatch.setattr(_kms, "_KEY_CACHE_", {})
+    _kms._key_cache_put("us-east-1/alias/project", "cached-key", "arn:aws:kms:us-east-1:111122223333:key/cached-key")
+    return _kms._KEY_CACHE_
+
+
+@pytest.mark.parametrize("key_metadata", [
+    False,
+    {"KeyId": "cached-key", "Arn": "arn:aws:kms:us-east-1:111122223333:key/cached-key", "KeyState": "PendingDeletion"},
+])
+def test_a_cached_key_which_is_gone_or_not_enabled_is_dropped(key_cache, monkeypatch, key_metadata):
+    monkeypatch.setattr(_kms, "describe_key", lambda *args, **kwargs: key_metadata)
+
+    assert _kms.resolve_key("project") is None
+    assert "us-east-1/alias/project" not in key_cache
+
+
+def test_a_retargeted_alias_replaces_the_cached_key(key_cache, monkeypatch):
+    key_metadata = {"KeyId": "new-key", "Arn": "arn:aws:kms:us-east-1:111122223333:key/new-key", "KeyState": "Enabled"}
+    monkeypatch.setattr(_kms, "describe_key", lambda *args, **kwargs: key_metadata)
+
+    assert _kms.resolve_key("project") == {"key_id": "new-key", "key_arn": key_metadata.get("Arn")}
+    assert key_cache.get("us-east-1/alias/project").get("key_id") == "new-key"
@@ -0,0 +1,16 @@
+import threading
+from _aws import _retry
+
+
+def test_token_bucket_acquires_after_throttling_past_the_floor():
+    bucket = _retry._TokenBucket(5)
+    for _ in range(10):
+        bucket.throttled()
+    assert bucket._rate == _retry._MIN_RATE_
+
+    acquired = []
+    worker = threading.Thread(target=lambda: acquired.extend([bucket.acquire(), bucket.acquire()]), daemon=True)
+    worker.start()
+    # the second request waits for a token refilled at the floor rate
+    worker.join(timeout=3 / _retry._MIN_RATE_)
+    assert len(acquired) == 2
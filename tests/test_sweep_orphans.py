@@ -0,0 +1,17 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+from _util import _util_file as _util_file_
+from _deployment.destroy_deployment import sweep_orphans
+
+
+def test_projects_missing_from_the_local_state_are_only_orphans_on_request(tmp_path):
+    state_filepath = str(tmp_path / "deployments.json")
+    _util_file_.json_dump(state_filepath, {"recorded": {"pattern": "apigateway_lambda", "aws_region": "us-east-1"}})
+    projects = {"recorded": [], "deployed_elsewhere": []}
+
+    assert sweep_orphans.find_orphan_projects(projects, state_filepath=state_filepath) == {}
+    assert sweep_orphans.find_orphan_projects(projects,
+                                              missing_from_state=True,
+                                              state_filepath=state_filepath) == {"deployed_elsewhere": "missing from local state"}